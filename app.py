@@ -1,5 +1,4 @@
 import streamlit as st
-from foliotrack.domain.Portfolio import Portfolio
 
 # Configure page
 st.set_page_config(
@@ -12,8 +11,10 @@ st.set_page_config(
 # Main app
 st.title("📈 Portfolio Dashboard")
 
-# Initialize session state for portfolio
+# Initialize session state for portfolio (after the title, so it paints first)
 if "portfolio" not in st.session_state:
+    from foliotrack.domain.Portfolio import Portfolio
+
     st.session_state.portfolio = Portfolio()
 
 load = st.Page(
@@ -40,6 +41,12 @@ compare = st.Page(
     icon="📚",
 )
 
+sweep = st.Page(
+    "pages/contract_sweep.py",
+    title="Contract Sweep",
+    icon="🧮",
+)
+
 backtest = st.Page(
     "pages/backtest.py",
     title="Backtest Simulation",
@@ -61,6 +68,7 @@ pg = st.navigation(
         ],
         "Tools": [
             compare,
+            sweep,
             exchange,
             backtest,
         ],
@@ -2,7 +2,11 @@ import streamlit as st
 from datetime import date
 from src.services.market_service import MarketService
 from src.ui.components.sidebar import render_sidebar
+from src.ui.fragments.backtest_comparison_view import (
+    render_backtest_comparison_view,
+)
 from src.ui.fragments.backtest_view import render_backtest_view
+from src.ui.fragments.walk_forward_view import render_walk_forward_view
 
 # Side bar for file operations
 render_sidebar()
@@ -41,8 +45,20 @@ end_date = st.sidebar.date_input(
 market_service_backend = MarketService()
 
 if "portfolio" in st.session_state:
-    render_backtest_view(
-        st.session_state.portfolio, market_service_backend, begin_date, end_date
+    tab_single, tab_compare, tab_walk = st.tabs(
+        ["Backtest", "Compare Strategies", "Walk-Forward"]
     )
+    with tab_single:
+        render_backtest_view(
+            st.session_state.portfolio, market_service_backend, begin_date, end_date
+        )
+    with tab_compare:
+        render_backtest_comparison_view(
+            st.session_state.portfolio, market_service_backend, begin_date, end_date
+        )
+    with tab_walk:
+        render_walk_forward_view(
+            st.session_state.portfolio, market_service_backend, begin_date, end_date
+        )
 
 st.subheader("Backtest")
@@ -3,6 +3,7 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 
+from src.services.market_service import MarketService
 from src.services.simulation_service import SimulationService
 from src.ui.components.contract_form import create_contract_form
 
@@ -13,6 +14,28 @@ st.subheader("Compare Securities")
 st.sidebar.header("Contract Details")
 years = st.sidebar.number_input("Number of Years", value=30, min_value=1)
 
+st.sidebar.header("Return Model")
+return_model = st.sidebar.selectbox(
+    "Annual returns",
+    options=["Deterministic", "Normal", "Lognormal", "Bootstrap (historical)"],
+    key="return_model",
+)
+if return_model != "Deterministic":
+    n_paths = st.sidebar.number_input(
+        "Number of Paths", value=10000, min_value=100, max_value=200000, step=1000
+    )
+    volatility = st.sidebar.number_input(
+        "Annual Volatility (e.g. 0.15 for 15%)",
+        value=0.15,
+        format="%.3f",
+        min_value=0.0,
+        max_value=2.0,
+    )
+    if return_model == "Bootstrap (historical)":
+        bootstrap_ticker = st.sidebar.text_input(
+            "Ticker for historical returns", value="^GSPC"
+        )
+
 contracts = []
 
 col1, col2 = st.columns(2)
@@ -40,20 +63,133 @@ with col2:
         )
     )
 
-if st.button("Compare"):
-    series_list = []
-    invested_list = []
-    after_tax_curves = []
-    labels = []
-    for contract in contracts:
-        series, invested = SimulationService.simulate_contract(contract)
-        after_tax_curve = SimulationService.compute_after_tax_curve(
-            series, invested, contract["capgains_tax"]
+
+@st.cache_data(show_spinner=False)
+def _historical_annual_returns(ticker: str):
+    """Calendar year returns of a ticker over its full history"""
+    hist = MarketService().get_security_historical_data(
+        [ticker], start_date="1900-01-01"
+    )
+    if hist.empty or ("Close", ticker) not in hist.columns:
+        return None
+    return SimulationService.annual_returns_from_prices(hist[("Close", ticker)])
+
+
+def _band_color(idx, alpha=0.2) -> str:
+    """Translucent version of a plotly color for percentile bands"""
+    r, g, b = px.colors.hex_to_rgb(plotly_colors[idx % len(plotly_colors)])
+    return f"rgba({r}, {g}, {b}, {alpha})"
+
+
+def _compare_stochastic():
+    model = {
+        "Normal": "normal",
+        "Lognormal": "lognormal",
+        "Bootstrap (historical)": "bootstrap",
+    }[return_model]
+
+    historical_returns = None
+    if model == "bootstrap":
+        historical_returns = _historical_annual_returns(bootstrap_ticker)
+        if historical_returns is None or len(historical_returns) == 0:
+            st.error(f"No historical returns available for {bootstrap_ticker}.")
+            return
+
+    xs = np.arange(0, years + 1)
+    fig = go.Figure()
+    summaries = []
+    for idx, contract in enumerate(contracts):
+        paths, invested = SimulationService.simulate_contract_paths(
+            contract,
+            n_paths=int(n_paths),
+            volatility=volatility,
+            model=model,
+            historical_returns=historical_returns,
+        )
+        after_tax_paths = SimulationService.compute_after_tax_curve(
+            paths, invested, contract["capgains_tax"]
+        )
+        # Only the P5/P50/P95 curves are sent to the browser
+        bands = SimulationService.percentile_bands(paths)
+        after_tax_bands = SimulationService.percentile_bands(after_tax_paths)
+        label = contract["label"]
+        color = plotly_colors[idx % len(plotly_colors)]
+
+        fig.add_trace(
+            go.Scatter(
+                x=xs,
+                y=after_tax_bands[2],
+                mode="lines",
+                line={"width": 0},
+                showlegend=False,
+                hoverinfo="skip",
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=xs,
+                y=after_tax_bands[0],
+                mode="lines",
+                line={"width": 0},
+                fill="tonexty",
+                fillcolor=_band_color(idx),
+                name=f"{label} (after-tax P5-P95)",
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=xs,
+                y=bands[1],
+                mode="lines",
+                name=f"{label} (pre-withdrawal P50)",
+                line={"color": color, "dash": "dash"},
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=xs,
+                y=after_tax_bands[1],
+                mode="lines",
+                name=f"{label} (after-tax P50)",
+                line={"color": color, "dash": "solid"},
+            )
+        )
+        summaries.append((label, bands[:, -1], after_tax_bands[:, -1]))
+
+    fig.update_layout(
+        title=f"Security investment comparison ({return_model} returns, {int(n_paths)} paths)",
+        xaxis_title="Years",
+        yaxis_title="Portfolio value",
+        legend_title="Contracts",
+    )
+
+    # Store the plot in session state to persist across pages
+    st.session_state["comparison_plot"] = fig
+
+    for label, final, after_tax_final in summaries:
+        st.markdown(
+            f"Final value of {label} (pre-withdrawal): "
+            f"P5 {final[0]:.2f} € / P50 {final[1]:.2f} € / P95 {final[2]:.2f} €"
         )
-        series_list.append(series)
-        invested_list.append(invested)
-        after_tax_curves.append(after_tax_curve)
-        labels.append(contract["label"])
+        st.markdown(
+            f"Final value of {label} (after-tax): "
+            f"P5 {after_tax_final[0]:.2f} € / P50 {after_tax_final[1]:.2f} € / P95 {after_tax_final[2]:.2f} €"
+        )
+
+
+compare_clicked = st.button("Compare")
+
+if compare_clicked and return_model == "Deterministic":
+    # Simulate all contracts in one batched call
+    series_list, invested_list = SimulationService.simulate_contracts(
+        **SimulationService.contracts_to_arrays(contracts)
+    )
+    after_tax_curves = SimulationService.compute_after_tax_curve(
+        series_list,
+        invested_list,
+        np.array([contract["capgains_tax"] for contract in contracts]),
+    )
+    labels = [contract["label"] for contract in contracts]
 
     xs = np.arange(0, years + 1)
     fig = go.Figure()
@@ -95,6 +231,10 @@ if st.button("Compare"):
             f"Final value of {label} (after-tax): {after_tax_curves[idx][-1]:.2f} €"
         )
 
+if compare_clicked and return_model != "Deterministic":
+    with st.spinner("Simulating return paths..."):
+        _compare_stochastic()
+
 # Display the plot if it exists in session state
 if "comparison_plot" in st.session_state:
     st.plotly_chart(
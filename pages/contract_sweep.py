@@ -0,0 +1,194 @@
+import math
+
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from src.services.simulation_service import (
+    MAX_SWEEP_COMBINATIONS,
+    SWEEP_PARAMETERS,
+    SimulationService,
+)
+from src.ui.components.contract_form import create_contract_form
+
+PARAMETER_LABELS = {
+    "annual_return": "Annual Return",
+    "security_fee": "Annual Security Fee",
+    "bank_fee": "Annual Bank Fee",
+    "capgains_tax": "Capital Gains Tax",
+}
+
+# Default (min, max, steps) of each swept parameter
+DEFAULT_RANGES = {
+    "annual_return": (0.0, 0.12, 25),
+    "security_fee": (0.0, 0.02, 11),
+    "bank_fee": (0.0, 0.02, 11),
+    "capgains_tax": (0.0, 0.45, 10),
+}
+
+st.subheader("Contract Sweep")
+
+st.sidebar.header("Contract Details")
+years = st.sidebar.number_input("Number of Years", value=30, min_value=1)
+
+col1, col2 = st.columns(2)
+with col1:
+    contract_a = create_contract_form(
+        st,
+        "A",
+        label="PEA",
+        annual_return=0.06,
+        capgains_tax=0.172,
+        years=years,
+    )
+with col2:
+    contract_b = create_contract_form(
+        st,
+        "B",
+        label="CTO",
+        annual_return=0.08,
+        capgains_tax=0.30,
+        years=years,
+    )
+
+# Ranges of the parameters swept on contract A
+st.subheader(f"Parameter Ranges ({contract_a['label']})")
+grid_spec = {}
+for name in SWEEP_PARAMETERS:
+    default_min, default_max, default_steps = DEFAULT_RANGES[name]
+    col_min, col_max, col_steps = st.columns(3)
+    with col_min:
+        min_value = st.number_input(
+            f"{PARAMETER_LABELS[name]} min",
+            value=default_min,
+            format="%.3f",
+            min_value=0.0,
+            max_value=1.0,
+            key=f"sweep_min_{name}",
+        )
+    with col_max:
+        max_value = st.number_input(
+            f"{PARAMETER_LABELS[name]} max",
+            value=default_max,
+            format="%.3f",
+            min_value=0.0,
+            max_value=1.0,
+            key=f"sweep_max_{name}",
+        )
+    with col_steps:
+        steps = st.number_input(
+            f"{PARAMETER_LABELS[name]} steps",
+            value=default_steps,
+            min_value=1,
+            max_value=1000,
+            key=f"sweep_steps_{name}",
+        )
+    grid_spec[name] = (min_value, max_value, int(steps))
+
+n_combinations = math.prod(steps for _, _, steps in grid_spec.values())
+st.write(f"{n_combinations:,} combinations")
+too_large = n_combinations > MAX_SWEEP_COMBINATIONS
+if too_large:
+    st.warning(
+        f"The sweep is limited to {MAX_SWEEP_COMBINATIONS:,} combinations, "
+        "reduce the number of steps."
+    )
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _run_sweep(contract_a: dict, contract_b: dict, grid_spec: dict) -> tuple:
+    """Memoized sweep, reruns with the same parameters are served from cache"""
+    grid = {
+        name: np.linspace(min_value, max_value, steps)
+        for name, (min_value, max_value, steps) in grid_spec.items()
+    }
+    final_after_tax, breakeven = SimulationService.sweep_contract(
+        contract_a, grid, benchmark=contract_b
+    )
+    return grid, final_after_tax, breakeven
+
+
+if st.button("🧮 Run sweep", key="sweep_button", width="stretch", disabled=too_large):
+    st.session_state["sweep_inputs"] = (contract_a, contract_b, grid_spec)
+
+sweep = None
+if "sweep_inputs" in st.session_state:
+    try:
+        with st.spinner("Evaluating parameter grid..."):
+            sweep = _run_sweep(*st.session_state.sweep_inputs)
+    except ValueError as e:
+        st.error(f"Sweep failed: {e}")
+
+if sweep is not None:
+    grid, final_after_tax, breakeven = sweep
+    sweep_a, sweep_b, _ = st.session_state.sweep_inputs
+
+    col_metric, col_x, col_y = st.columns(3)
+    with col_metric:
+        metric = st.selectbox(
+            "Heatmap",
+            options=[
+                f"Final after-tax value of {sweep_a['label']}",
+                f"Breakeven year of {sweep_a['label']} vs {sweep_b['label']}",
+            ],
+            key="sweep_metric",
+        )
+    with col_x:
+        x_name = st.selectbox(
+            "X axis",
+            options=SWEEP_PARAMETERS,
+            index=0,
+            format_func=PARAMETER_LABELS.get,
+            key="sweep_x",
+        )
+    with col_y:
+        y_options = [name for name in SWEEP_PARAMETERS if name != x_name]
+        y_name = st.selectbox(
+            "Y axis",
+            options=y_options,
+            index=len(y_options) - 1,
+            format_func=PARAMETER_LABELS.get,
+            key="sweep_y",
+        )
+
+    # Remaining parameters are fixed to a selected grid value
+    selection = []
+    for name in SWEEP_PARAMETERS:
+        if name in (x_name, y_name):
+            selection.append(slice(None))
+        else:
+            options = [f"{value:.6g}" for value in grid[name]]
+            value = st.select_slider(
+                PARAMETER_LABELS[name],
+                options=options,
+                key=f"sweep_fixed_{name}",
+            )
+            selection.append(options.index(value))
+
+    values = final_after_tax if metric.startswith("Final") else breakeven
+    z = values[tuple(selection)]
+    # Remaining axes are in SWEEP_PARAMETERS order, heatmap rows are the y axis
+    if SWEEP_PARAMETERS.index(x_name) < SWEEP_PARAMETERS.index(y_name):
+        z = z.T
+
+    fig = go.Figure(
+        go.Heatmap(
+            z=z,
+            x=grid[x_name],
+            y=grid[y_name],
+            colorscale="RdYlGn" if metric.startswith("Final") else "RdYlGn_r",
+            colorbar={"title": "€" if metric.startswith("Final") else "Year"},
+        )
+    )
+    fig.update_layout(
+        title=metric,
+        xaxis_title=PARAMETER_LABELS[x_name],
+        yaxis_title=PARAMETER_LABELS[y_name],
+        height=600,
+    )
+    st.plotly_chart(fig, key="sweep_heatmap")
+    if not metric.startswith("Final"):
+        st.caption(
+            f"Year from which {sweep_a['label']} stays at or above {sweep_b['label']} "
+            "after tax, blank when it ends below."
+        )
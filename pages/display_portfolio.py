@@ -1,12 +1,13 @@
 import streamlit as st
-import pandas as pd
 from foliotrack.domain.Portfolio import Portfolio
 from src.ui.components.sidebar import render_sidebar
 from src.ui.components.plots import plot_pie_chart, plot_portfolio_evolution
 from src.services.market_service import MarketService
+from src.services.valuation_index import ValuationIndex
 
 # Initialize services
 market_service = MarketService()
+valuation_index = ValuationIndex(market_service)
 
 # Side bar for file operations
 render_sidebar()
@@ -41,21 +42,19 @@ if ticker_list != []:
             hasattr(st.session_state.portfolio, "history")
             and st.session_state.portfolio.history
         ):
-            start_date = min(
-                event["date"] for event in st.session_state.portfolio.history
+            # Daily valuation, only the dates since the last visit are computed
+            # (stored per portfolio file, unsaved portfolios are computed in full)
+            portfolio_comp = valuation_index.history(
+                st.session_state.portfolio,
+                st.session_state.get("portfolio_file") or None,
+                ticker_list,
             )
 
-            # Get historical data for all tickers in portfolio
-            hist_tickers = market_service.get_security_historical_data(
-                ticker_list, start_date=start_date, interval="1d"
-            )
-
-            if not hist_tickers.empty:
+            if not portfolio_comp.empty:
                 plot_portfolio_evolution(
                     portfolio=st.session_state.portfolio,
                     ticker_list=ticker_list,
-                    hist_tickers=hist_tickers,
-                    Date=pd.DatetimeIndex(hist_tickers.index),
+                    portfolio_comp=portfolio_comp,
                     min_y_exchange=min_y_exchange,
                     max_y_exchange=max_y_exchange,
                 )
@@ -1,5 +1,6 @@
 import streamlit as st
 from src.ui.fragments.equilibrium_view import render_equilibrium_view
+from src.ui.fragments.what_if_view import render_what_if_view
 from src.services.portfolio_service import PortfolioService
 
 # Optimization parameters
@@ -67,3 +68,6 @@ render_equilibrium_view(
     st.session_state.ticker_options,
     file_list,
 )
+
+# Recommended purchases over a range of investment amounts
+render_what_if_view(min_percent, max_diff_sec, selling)
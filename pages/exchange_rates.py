@@ -1,10 +1,13 @@
 import streamlit as st
-from foliotrack import get_rate_between, Currency
+import pandas as pd
+from src.services.currency_catalogue import get_currency_catalogue
+from src.services.fx_service import FxService
 
-# Get list of currency codes
-c = Currency()
-currencies = c._currency_data
-currency_codes = [d["name"] + " (" + d["symbol"] + ")" for d in currencies]
+fx_service = FxService()
+
+# Currency labels and their ISO codes, shared by every rerun and session
+currencies = get_currency_catalogue()
+currency_codes = list(currencies)
 
 st.subheader("Exchange Rates")
 
@@ -34,12 +37,8 @@ amount = st.number_input("Amount", value=1.0, min_value=0.0, format="%f")
 
 
 # Replace normalization of selected labels with mapping back to currency codes
-from_idx = (
-    currency_codes.index(from_currency) if from_currency in currency_codes else None
-)
-from_currency_code = currencies[from_idx].get("cc")
-to_idx = currency_codes.index(to_currency) if to_currency in currency_codes else None
-to_currency_code = currencies[to_idx].get("cc")
+from_currency_code = currencies.get(from_currency)
+to_currency_code = currencies.get(to_currency)
 
 
 # Use resolved codes when calling the API
@@ -48,33 +47,18 @@ if st.button("⚖️ Get rate", width="stretch"):
         st.error("Please provide both from and to currency ISO codes.")
     else:
         try:
-            result = get_rate_between(
-                from_currency_code, to_currency_code, date=str(date_str)
-            )
+            rate = fx_service.rate(from_currency_code, to_currency_code, date=date_str)
         except Exception as e:
             st.error(
                 f"Error fetching exchange rate: {e}. Note that reference rates are usually updated at around 16:00 CET every day by the European Central Bank. Try to change the date."
             )
         else:
-            # Try to display common result shapes
-            if isinstance(result, dict):
-                # Common keys: 'rate', 'converted', 'from', 'to'
-                rate = result.get("rate")
-                converted = result.get("converted")
-                if rate is not None:
-                    st.markdown(
-                        f"Exchange rate {from_currency_code} → {to_currency_code}: **{rate}**"
-                    )
-                if converted is not None:
-                    st.markdown(f"Converted amount: **{converted}** {to_currency_code}")
-                st.write(result)
-            elif isinstance(result, (int, float)):
-                st.markdown(
-                    f"Exchange rate {from_currency_code} → {to_currency_code}: **{result}**"
-                )
-                st.markdown(
-                    f"Converted amount: **{result * amount}** {to_currency_code}"
-                )
-            else:
-                # Generic display if the return type is different
-                st.write(result)
+            st.markdown(
+                f"Exchange rate {from_currency_code} → {to_currency_code}: **{rate:.4f}**"
+            )
+            st.markdown(f"Converted amount: **{rate * amount:.2f}** {to_currency_code}")
+
+            # Rates of the year before the selected date, read from the local store
+            history = fx_service.history(from_currency_code, to_currency_code)
+            date = pd.Timestamp(date_str or "today")
+            st.line_chart(history.loc[date - pd.DateOffset(years=1) : date])
@@ -1,9 +1,59 @@
+import os
 from pathlib import Path
 
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
 PORTFOLIOS_DIR = PROJECT_ROOT / "Portfolios"
+CACHE_DIR = PROJECT_ROOT / ".cache"
+PRICE_CACHE_DIR = CACHE_DIR / "prices"
+FX_CACHE_DIR = CACHE_DIR / "fx"
+PRICE_STORE_DIR = CACHE_DIR / "panels"
+VALUATION_INDEX_DIR = CACHE_DIR / "valuation"
 
 # Defaults
 DEFAULT_PORTFOLIO_FILE = "investment_example.json"
 DEFAULT_CURRENCY = "EUR"
+
+# Trades and price updates of a loaded portfolio file are appended to its journal,
+# compacted into the file once the journal exceeds this size (in bytes)
+JOURNAL_COMPACT_BYTES = 64 * 1024
+
+# Portfolio files listed per sidebar page
+CATALOGUE_PAGE_SIZE = 50
+
+# Market data
+# Minimum age (in seconds) of a cached price file before its tail is refreshed
+PRICE_CACHE_REFRESH_SECONDS = 15 * 60
+# Concurrent price updates: worker threads and timeout (in seconds) per request
+PRICE_UPDATE_WORKERS = 8
+PRICE_UPDATE_TIMEOUT_SECONDS = 10
+
+# Exchange rates: first ECB reference rate, minimum age (in seconds) of a stored
+# rate series before its tail is refreshed, and in-memory cap of the series
+FX_HISTORY_START = "1999-01-04"
+FX_REFRESH_SECONDS = 60 * 60
+FX_CACHE_MAX_BYTES = 16 * 1024**2
+
+# Shared in-memory cache (all sessions of the process)
+MEMORY_CACHE_MAX_BYTES = 512 * 1024**2
+QUOTE_CACHE_MAX_BYTES = 16 * 1024**2
+QUOTE_CACHE_TTL_SECONDS = 60
+
+# Price panels converted to the portfolio currency, kept until the rates are refreshed
+VALUATION_CACHE_MAX_BYTES = 64 * 1024**2
+
+# Equilibrium optimization results (shared by all sessions of the process)
+OPTIMIZATION_CACHE_MAX_BYTES = 8 * 1024**2
+OPTIMIZATION_CACHE_TTL_SECONDS = 24 * 60 * 60
+# Process pool solving batches of what-if scenarios
+OPTIMIZATION_WORKERS = os.cpu_count() or 1
+
+# Background backtest jobs: worker threads, finished jobs kept for polling and
+# delay (in seconds) between two polls of a running job
+BACKTEST_WORKERS = 2
+BACKTEST_JOB_HISTORY = 32
+BACKTEST_POLL_SECONDS = 0.5
+# Finished backtests are reused for the same inputs until new bars may be cached
+BACKTEST_RESULT_MAX_AGE_SECONDS = PRICE_CACHE_REFRESH_SECONDS
+# Process pool running the strategies of a backtest comparison
+BACKTEST_PROCESS_WORKERS = os.cpu_count() or 1
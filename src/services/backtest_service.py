@@ -1,17 +1,352 @@
-from foliotrack.services.BacktestService import (
-    BacktestService as FoliotrackBacktestService,
-)
+import dataclasses
+import gc
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import cached_property
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+import bt
+import numpy as np
+import pandas as pd
 from foliotrack.domain.Portfolio import Portfolio
+from src.config import (
+    BACKTEST_JOB_HISTORY,
+    BACKTEST_PROCESS_WORKERS,
+    BACKTEST_RESULT_MAX_AGE_SECONDS,
+    BACKTEST_WORKERS,
+)
+from src.services.job_runner import JobRunner
+from src.services.portfolio_snapshot import get_snapshot
+from src.services.return_analytics import ReturnAnalytics
+
+# Process-wide backtest jobs, shared by every Streamlit session
+BACKTEST_JOBS = JobRunner(
+    BACKTEST_WORKERS,
+    BACKTEST_JOB_HISTORY,
+    name="backtest",
+    max_age=BACKTEST_RESULT_MAX_AGE_SECONDS,
+)
+
+# Rebalance frequencies of a strategy variant and the bt algo scheduling them
+REBALANCE_ALGOS = {
+    "daily": bt.algos.RunDaily,
+    "weekly": bt.algos.RunWeekly,
+    "monthly": bt.algos.RunMonthly,
+    "quarterly": bt.algos.RunQuarterly,
+    "yearly": bt.algos.RunYearly,
+    "once": bt.algos.RunOnce,
+}
+
+
+@dataclass
+class BacktestRun:
+    """Result of a backtest and the price panel (Close, one column per ticker) it ran on"""
+
+    result: Any
+    prices: pd.DataFrame
+
+    @cached_property
+    def analytics(self) -> ReturnAnalytics:
+        """Return statistics of the equity curves, computed once per backtest"""
+        return ReturnAnalytics(self.result.prices)
+
+
+@dataclass
+class BacktestVariant:
+    """
+    One strategy of a backtest comparison. Weights (ticker -> target) default to the
+    portfolio targets and are normalized, the start date defaults to the comparison one.
+    """
+
+    name: str
+    rebalance: str = "monthly"
+    weights: dict | None = None
+    start_date: Any = None
+
+    def key(self) -> tuple:
+        weights = None if self.weights is None else tuple(sorted(self.weights.items()))
+        return (self.name, self.rebalance, weights, str(self.start_date))
+
+
+@dataclass
+class BacktestComparison:
+    """Equity curves and bt statistics of each variant (one column each), and the price panel"""
+
+    equity: pd.DataFrame
+    stats: pd.DataFrame
+    prices: pd.DataFrame
+
+    @cached_property
+    def analytics(self) -> ReturnAnalytics:
+        """Return statistics of the equity curves, computed once per comparison"""
+        return ReturnAnalytics(self.equity)
+
+
+@dataclass
+class WalkForwardRun:
+    """Full-period backtest and the statistics of each rolling window (one row per window)"""
+
+    run: BacktestRun
+    windows: pd.DataFrame
+    window_years: float
+
+
+def _run_variant(
+    shm_name: str,
+    shape: tuple,
+    dates: np.ndarray,
+    tickers: list,
+    variant: BacktestVariant,
+    weights: dict,
+) -> tuple:
+    """Pool worker: backtest one variant on the price panel held in shared memory"""
+    shm = SharedMemory(name=shm_name)
+    try:
+        equity, stats = _backtest_on_buffer(
+            shm, shape, dates, tickers, variant, weights
+        )
+    finally:
+        # bt keeps reference cycles to the panel, release them before closing
+        gc.collect()
+        shm.close()
+    return equity, stats
+
+
+def _backtest_on_buffer(shm, shape, dates, tickers, variant, weights) -> tuple:
+    values = np.ndarray(shape, dtype=float, buffer=shm.buf)
+    values.flags.writeable = False
+    prices = pd.DataFrame(
+        values, index=pd.DatetimeIndex(dates), columns=tickers, copy=False
+    )
+    if variant.start_date is not None:
+        prices = prices.loc[str(variant.start_date) :]
+
+    strategy = bt.Strategy(
+        variant.name,
+        [
+            REBALANCE_ALGOS[variant.rebalance](),
+            bt.algos.SelectAll(),
+            bt.algos.WeighSpecified(**weights),
+            bt.algos.Rebalance(),
+        ],
+    )
+    result = bt.run(bt.Backtest(strategy, prices))
+    # Copies only, nothing returned may point into the shared buffer
+    return (
+        result.prices[variant.name].copy(),
+        result.stats[variant.name].copy(),
+    )
+
+
+class _ReportProgress(bt.Algo):
+    """
+    First algo of a strategy, run on every date: reports the progress of the run
+    between start and end, so a cancelled job stops within the backtest loop.
+    """
+
+    def __init__(self, progress, dates: pd.DatetimeIndex, start: float, end: float):
+        super().__init__()
+        self.progress = progress
+        self.dates = dates
+        self.start = start
+        self.end = end
+
+    def __call__(self, target) -> bool:
+        done = self.dates.searchsorted(target.now) / max(len(self.dates), 1)
+        self.progress(
+            self.start + (self.end - self.start) * done,
+            f"Backtesting {target.now:%Y-%m-%d}...",
+        )
+        return True
 
 
 class BacktestServiceWrapper:
-    def __init__(self):
-        self.service = FoliotrackBacktestService()
+    def run_backtest(
+        self,
+        portfolio: Portfolio,
+        market_service,
+        start_date,
+        end_date,
+        progress=None,
+    ) -> BacktestRun:
+        # Load the price panel once, the backtest and every statistic reuse it
+        if progress is not None:
+            progress(0.0, "Loading prices...")
+        prices = market_service.get_historical_data(
+            list(portfolio.securities), start_date=start_date, end_date=end_date
+        )
+        if prices.empty:
+            raise ValueError("No price data found for securities.")
 
-    def run_backtest(self, portfolio: Portfolio, market_service, start_date, end_date):
-        return self.service.run_backtest(
+        if progress is not None:
+            progress(0.3, "Running backtest...")
+        # Monthly rebalance to the portfolio targets, as foliotrack's backtest
+        algos = [
+            bt.algos.RunMonthly(),
+            bt.algos.SelectAll(),
+            bt.algos.WeighSpecified(
+                **{t: portfolio._get_share(t).target for t in prices.columns}
+            ),
+            bt.algos.Rebalance(),
+        ]
+        if progress is not None:
+            algos.insert(0, _ReportProgress(progress, prices.index, 0.3, 1.0))
+        result = bt.run(bt.Backtest(bt.Strategy(portfolio.name, algos), prices))
+        if progress is not None:
+            progress(1.0, "Backtest complete")
+        return BacktestRun(result=result, prices=prices)
+
+    def run_walk_forward(
+        self,
+        portfolio: Portfolio,
+        market_service,
+        start_date,
+        end_date,
+        window_years: float = 5,
+        progress=None,
+    ) -> WalkForwardRun:
+        """
+        Statistics of every window of window_years starting each month.
+
+        A single backtest is run over the whole period, windows are then read from its
+        equity curve. With the default monthly rebalance each window starts on a
+        rebalance date, so this matches backtesting every window on its own.
+        """
+        run = self.run_backtest(
             portfolio,
             market_service,
-            start_date=start_date,
-            end_date=end_date,
+            start_date,
+            end_date,
+            progress=None
+            if progress is None
+            else lambda fraction, message: progress(0.8 * fraction, message),
+        )
+        if progress is not None:
+            progress(0.8, "Evaluating rolling windows...")
+        windows = run.analytics.rolling_windows(window_years)
+        if windows.empty:
+            raise ValueError(
+                f"Backtest period is shorter than a {window_years}-year window."
+            )
+        if progress is not None:
+            progress(1.0, f"{len(windows)} windows evaluated")
+        return WalkForwardRun(run=run, windows=windows, window_years=window_years)
+
+    def run_comparison(
+        self,
+        portfolio: Portfolio,
+        market_service,
+        variants: list,
+        start_date,
+        end_date,
+        progress=None,
+        max_workers: int = BACKTEST_PROCESS_WORKERS,
+    ) -> BacktestComparison:
+        """
+        Backtest several strategy variants of a portfolio concurrently.
+
+        The price panel is loaded once, copied into shared memory and read in place
+        by every worker of the process pool.
+        """
+        names = [variant.name for variant in variants]
+        if not variants:
+            raise ValueError("No strategy to backtest.")
+        if len(set(names)) != len(names):
+            raise ValueError("Strategy names must be unique.")
+        for variant in variants:
+            if variant.rebalance not in REBALANCE_ALGOS:
+                raise ValueError(
+                    f"Unknown rebalance frequency '{variant.rebalance}', expected one of {list(REBALANCE_ALGOS)}"
+                )
+
+        # Variants without a start date start at the comparison one, the panel at
+        # the earliest start of all variants
+        variants = [
+            dataclasses.replace(variant, start_date=start_date)
+            if variant.start_date is None
+            else variant
+            for variant in variants
+        ]
+        if progress is not None:
+            progress(0.0, "Loading prices...")
+        tickers = list(portfolio.securities)
+        earliest = min(pd.Timestamp(v.start_date) for v in variants)
+        prices = market_service.get_historical_data(
+            tickers, start_date=earliest.date(), end_date=end_date
+        )
+        if prices.empty:
+            raise ValueError("No price data found for securities.")
+        prices = prices.loc[:, tickers]
+        targets = {ticker: portfolio._get_share(ticker).target for ticker in tickers}
+
+        values = np.ascontiguousarray(prices.to_numpy(dtype=float))
+        shm = SharedMemory(create=True, size=values.nbytes)
+        pool = ProcessPoolExecutor(
+            max_workers=min(max_workers, len(variants)),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        equity, stats = {}, {}
+        try:
+            np.ndarray(values.shape, dtype=float, buffer=shm.buf)[:] = values
+            futures = {
+                pool.submit(
+                    _run_variant,
+                    shm.name,
+                    values.shape,
+                    prices.index.asi8,
+                    tickers,
+                    variant,
+                    self._normalize_weights(variant.weights or targets, tickers),
+                ): variant
+                for variant in variants
+            }
+            if progress is not None:
+                progress(0.1, f"Running {len(variants)} strategies...")
+            for done, future in enumerate(as_completed(futures), start=1):
+                variant = futures[future]
+                equity[variant.name], stats[variant.name] = future.result()
+                if progress is not None:
+                    progress(
+                        0.1 + 0.9 * done / len(variants),
+                        f"{done}/{len(variants)} strategies done",
+                    )
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            shm.close()
+            shm.unlink()
+
+        return BacktestComparison(
+            equity=pd.DataFrame(equity)[names],
+            stats=pd.DataFrame(stats)[names],
+            prices=prices,
+        )
+
+    @staticmethod
+    def _normalize_weights(weights: dict, tickers: list) -> dict:
+        """Weights of the panel tickers, scaled to sum to one"""
+        weights = {ticker: float(weights.get(ticker, 0.0)) for ticker in tickers}
+        total = sum(weights.values())
+        if total <= 0:
+            raise ValueError("Strategy weights must sum to a positive value.")
+        return {ticker: weight / total for ticker, weight in weights.items()}
+
+    @staticmethod
+    def comparison_key(
+        portfolio: Portfolio, variants: list, start_date, end_date
+    ) -> tuple:
+        """Inputs a comparison depends on: portfolio, variants and dates"""
+        return BacktestServiceWrapper.backtest_key(
+            portfolio, start_date, end_date
+        ) + tuple(variant.key() for variant in variants)
+
+    @staticmethod
+    def backtest_key(portfolio: Portfolio, start_date, end_date) -> tuple:
+        """Inputs a backtest depends on: tickers, target shares and dates"""
+        snapshot = get_snapshot(portfolio)
+        return (
+            tuple(snapshot.tickers),
+            tuple(snapshot.target.tolist()),
+            str(start_date),
+            str(end_date),
         )
@@ -0,0 +1,164 @@
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+from foliotrack.domain.Portfolio import Portfolio
+from foliotrack.domain.Security import Security
+from foliotrack.domain.ShareInfo import ShareInfo
+
+# File suffix of binary portfolio snapshots
+SNAPSHOT_SUFFIX = ".arrow"
+SNAPSHOT_FORMAT_VERSION = "1"
+
+# Stored security fields, the derived ones (values, symbols, actual shares) are
+# recomputed on load like foliotrack does for JSON files
+SECURITY_SCHEMA = pa.struct(
+    [
+        ("ticker", pa.string()),
+        ("name", pa.string()),
+        ("currency", pa.string()),
+        ("exchange_rate", pa.float64()),
+        ("price_in_security_currency", pa.float64()),
+        ("volume", pa.float64()),
+        ("volume_to_buy", pa.float64()),
+        ("amount_to_invest", pa.float64()),
+        ("fill", pa.bool_()),
+        ("target", pa.float64()),
+        ("final", pa.float64()),
+    ]
+)
+HISTORY_SCHEMA = pa.struct(
+    [("ticker", pa.string()), ("volume", pa.float64()), ("date", pa.string())]
+)
+SNAPSHOT_SCHEMA = pa.schema(
+    [
+        ("securities", pa.list_(SECURITY_SCHEMA)),
+        ("history", pa.list_(HISTORY_SCHEMA)),
+    ]
+)
+
+
+class BinaryPortfolioRepository:
+    """
+    Persistence of Portfolio objects as Arrow IPC snapshots.
+
+    A snapshot is a single row holding the securities and the transaction history
+    as columnar arrays, with the portfolio name, currency and security count in the
+    schema metadata. It is built and written as one buffer, and read back with one
+    read. The JSON layout of foliotrack's PortfolioRepository stays the export format.
+    """
+
+    def save(self, portfolio: Portfolio, filepath) -> None:
+        filepath = Path(filepath)
+        # Write to a temporary file first so readers never see a partial file
+        tmp_path = filepath.with_suffix(".tmp")
+        tmp_path.write_bytes(self.to_bytes(portfolio))
+        tmp_path.replace(filepath)
+
+    def load(self, filepath) -> Portfolio:
+        return self.from_bytes(Path(filepath).read_bytes())
+
+    def to_bytes(self, portfolio: Portfolio) -> bytes:
+        tickers = list(portfolio.securities)
+        securities = [portfolio.securities[t] for t in tickers]
+        shares = [portfolio._get_share(t) for t in tickers]
+        security_columns = {
+            "ticker": tickers,
+            "name": [s.name for s in securities],
+            "currency": [s.currency for s in securities],
+            "exchange_rate": [s.exchange_rate for s in securities],
+            "price_in_security_currency": [
+                s.price_in_security_currency for s in securities
+            ],
+            "volume": [s.volume for s in securities],
+            "volume_to_buy": [s.volume_to_buy for s in securities],
+            "amount_to_invest": [s.amount_to_invest for s in securities],
+            "fill": [s.fill for s in securities],
+            "target": [share.target for share in shares],
+            "final": [share.final for share in shares],
+        }
+        history = portfolio.history
+        history_columns = {
+            "ticker": [event["ticker"] for event in history],
+            "volume": np.fromiter(
+                (event["volume"] for event in history), float, len(history)
+            ),
+            "date": [str(event["date"]) for event in history],
+        }
+
+        table = pa.table(
+            [
+                self._single_row(security_columns, SECURITY_SCHEMA),
+                self._single_row(history_columns, HISTORY_SCHEMA),
+            ],
+            schema=SNAPSHOT_SCHEMA.with_metadata(
+                {
+                    "format_version": SNAPSHOT_FORMAT_VERSION,
+                    "name": portfolio.name,
+                    "currency": portfolio.currency,
+                    "securities": str(len(tickers)),
+                }
+            ),
+        )
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def from_bytes(self, data: bytes) -> Portfolio:
+        reader = pa.ipc.open_file(pa.py_buffer(data))
+        metadata = self._metadata(reader.schema)
+        table = reader.read_all()
+
+        portfolio = Portfolio(name=metadata["name"], currency=metadata["currency"])
+        securities = table.column("securities").combine_chunks().values
+        for row in securities.to_pylist():
+            share = ShareInfo(target=row.pop("target"), final=row.pop("final"))
+            portfolio.securities[row["ticker"]] = Security(**row)
+            portfolio.shares[row["ticker"]] = share
+
+        history = table.column("history").combine_chunks().values
+        portfolio.history = [
+            {"ticker": ticker, "volume": volume, "date": date}
+            for ticker, volume, date in zip(
+                history.field("ticker").to_pylist(),
+                history.field("volume").to_numpy().tolist(),
+                history.field("date").to_pylist(),
+            )
+        ]
+        portfolio.recalculate_shares()
+        return portfolio
+
+    @staticmethod
+    def read_header(filepath) -> dict:
+        """Name, currency and number of securities of a snapshot, from its footer only"""
+        with pa.memory_map(str(filepath)) as source:
+            metadata = BinaryPortfolioRepository._metadata(
+                pa.ipc.open_file(source).schema
+            )
+        return {
+            "name": metadata["name"],
+            "currency": metadata["currency"],
+            "securities": int(metadata["securities"]),
+        }
+
+    @staticmethod
+    def _metadata(schema: pa.Schema) -> dict:
+        metadata = {
+            key.decode(): value.decode()
+            for key, value in (schema.metadata or {}).items()
+        }
+        if metadata.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported portfolio snapshot version {metadata.get('format_version')}"
+            )
+        return metadata
+
+    @staticmethod
+    def _single_row(columns: dict, struct_type: pa.StructType) -> pa.ListArray:
+        """One list row holding the columns as a struct array"""
+        values = pa.StructArray.from_arrays(
+            [pa.array(columns[f.name], type=f.type) for f in struct_type],
+            fields=list(struct_type),
+        )
+        return pa.ListArray.from_arrays(pa.array([0, len(values)], pa.int32()), values)
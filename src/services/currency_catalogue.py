@@ -0,0 +1,15 @@
+import functools
+from types import MappingProxyType
+
+from foliotrack.utils.Currency import Currency
+
+
+@functools.cache
+def get_currency_catalogue() -> MappingProxyType:
+    """Currency labels "Name (symbol)" mapped to ISO codes, read once per process"""
+    return MappingProxyType(
+        {
+            f"{currency['name']} ({currency['symbol']})": currency["cc"]
+            for currency in Currency()._currency_data
+        }
+    )
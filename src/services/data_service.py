@@ -1,28 +1,31 @@
 import pandas as pd
 from foliotrack.domain.Portfolio import Portfolio
 
+from src.services.portfolio_snapshot import get_snapshot
+from src.services.versioning import versioned
+
 
 class DataService:
     @staticmethod
+    @versioned
     def portfolio_to_df(portfolio: Portfolio) -> pd.DataFrame:
-        """Convert portfolio info to DataFrame format for display"""
-        info = portfolio.get_portfolio_info()
-        data = []
-        for security in info:
-            data.append(
-                {
-                    "Name": security.get("name"),
-                    "Ticker": security.get("ticker"),
-                    "Currency": security.get("currency"),
-                    "Price": security.get("price_in_security_currency"),
-                    "Actual Share": security.get("actual_share"),
-                    "Target Share": security.get("target_share"),
-                    "Total value": f"{security.get('value')}{security.get('symbol')}",
-                    "Volume": security.get("volume"),
-                }
-            )
+        """Convert portfolio info to DataFrame format for display (memoized per portfolio version)"""
+        snapshot = get_snapshot(portfolio)
+        data = {
+            "Name": snapshot.names,
+            "Ticker": snapshot.tickers,
+            "Currency": snapshot.currencies,
+            "Price": snapshot.price,
+            "Actual Share": snapshot.actual,
+            "Target Share": snapshot.target,
+            "Total value": [
+                f"{value}{symbol}"
+                for value, symbol in zip(snapshot.value.tolist(), snapshot.symbols)
+            ],
+            "Volume": snapshot.volume,
+        }
 
-        if not data:
+        if len(snapshot) == 0:
             return pd.DataFrame(
                 {
                     "Name": [""],
@@ -39,26 +42,23 @@ class DataService:
         return pd.DataFrame(data)
 
     @staticmethod
+    @versioned
     def equilibrium_to_df(portfolio: Portfolio) -> pd.DataFrame:
-        """Convert portfolio info to DataFrame format for display (Equilibrium view)"""
-        info = portfolio.get_portfolio_info()
-        data = []
-        for security in info:
-            data.append(
-                {
-                    "Name": security.get("name"),
-                    "Ticker": security.get("ticker"),
-                    "Currency": security.get("currency"),
-                    "Price": security.get("price_in_security_currency"),
-                    "Target Share": security.get("target_share"),
-                    "Actual Share": security.get("actual_share"),
-                    "Final Share": security.get("final_share"),
-                    "Amount to Invest": security.get("amount_to_invest"),
-                    "Volume to buy": security.get("volume_to_buy"),
-                }
-            )
+        """Convert portfolio info to DataFrame format for display (Equilibrium view, memoized per portfolio version)"""
+        snapshot = get_snapshot(portfolio)
+        data = {
+            "Name": snapshot.names,
+            "Ticker": snapshot.tickers,
+            "Currency": snapshot.currencies,
+            "Price": snapshot.price,
+            "Target Share": snapshot.target,
+            "Actual Share": snapshot.actual,
+            "Final Share": snapshot.final,
+            "Amount to Invest": snapshot.amount_to_invest,
+            "Volume to buy": snapshot.volume_to_buy,
+        }
 
-        if not data:
+        if len(snapshot) == 0:
             return pd.DataFrame(
                 {
                     "Name": [""],
@@ -0,0 +1,127 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from ecbdata import ecbdata
+
+from src.config import (
+    FX_CACHE_DIR,
+    FX_CACHE_MAX_BYTES,
+    FX_HISTORY_START,
+    FX_REFRESH_SECONDS,
+)
+from src.services.memory_cache import MemoryCache
+from src.services.price_cache import PriceCache
+
+logger = logging.getLogger(__name__)
+
+# ECB reference rates are quoted in units of currency per euro
+BASE_CURRENCY = "EUR"
+
+# Process-wide rate series, shared by every Streamlit session
+FX_CACHE = MemoryCache(FX_CACHE_MAX_BYTES, FX_REFRESH_SECONDS, name="fx")
+
+
+class FxService:
+    """
+    Daily ECB reference rates, one series per currency (units per euro).
+
+    A series is downloaded in full once, persisted in an on-disk store and only its
+    tail is fetched afterwards. Rates are then read from memory, the rate between two
+    currencies is crossed through the euro.
+    """
+
+    def __init__(self, store: PriceCache | None = None, cache: MemoryCache = None):
+        self.store = (
+            store if store is not None else PriceCache(FX_CACHE_DIR, FX_REFRESH_SECONDS)
+        )
+        self.cache = FX_CACHE if cache is None else cache
+
+    def rate(self, from_currency: str, to_currency: str, date=None) -> float:
+        """
+        Units of to_currency per unit of from_currency on date, latest if None.
+
+        No rates are published on weekends and holidays, the last rate published on
+        or before date is used.
+        """
+        dates = pd.DatetimeIndex([pd.Timestamp.now() if date is None else date])
+        rate = self.rate_series(from_currency, to_currency, dates).iloc[0]
+        if np.isnan(rate):
+            raise ValueError(
+                f"No exchange rate {from_currency}->{to_currency} on {date or 'latest'}"
+            )
+        return float(rate)
+
+    def rate_series(
+        self, from_currency: str, to_currency: str, dates: pd.DatetimeIndex
+    ) -> pd.Series:
+        """Rate on each of dates (last published on or before it), NaN before the first rate"""
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        rates = self._per_euro(to_currency, dates) / self._per_euro(
+            from_currency, dates
+        )
+        return pd.Series(rates, index=dates, name=f"{from_currency}/{to_currency}")
+
+    def history(self, from_currency: str, to_currency: str) -> pd.Series:
+        """Every published rate between two currencies"""
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        dates = pd.DatetimeIndex([], name="Date")
+        for currency in {from_currency, to_currency} - {BASE_CURRENCY}:
+            dates = dates.union(self._series(currency).index)
+        return self.rate_series(from_currency, to_currency, dates)
+
+    def _per_euro(self, currency: str, dates: pd.DatetimeIndex) -> np.ndarray:
+        """Units of currency per euro on each of dates"""
+        if currency == BASE_CURRENCY:
+            return np.ones(len(dates))
+        series = self._series(currency)
+        positions = series.index.searchsorted(dates, side="right") - 1
+        values = series.to_numpy()[np.maximum(positions, 0)]
+        return np.where(positions >= 0, values, np.nan)
+
+    def _series(self, currency: str) -> pd.Series:
+        return self.cache.get_or_set(
+            ("fx", currency), lambda: self._load(currency)["Rate"]
+        )
+
+    def _load(self, currency: str) -> pd.DataFrame:
+        """Stored rates of a currency, their missing tail fetched if the store is stale"""
+        stored = self.store.load(currency, "1d")
+        if stored is not None and not stored.empty:
+            if self.store.is_fresh(currency, "1d"):
+                return stored
+            start = stored.index[-1]
+        else:
+            stored, start = None, FX_HISTORY_START
+
+        try:
+            new_rates = self._download_rates(currency, start)
+        except Exception as e:
+            # Offline: keep serving the stored rates
+            logger.warning(f"Could not download {currency} exchange rates: {e}")
+            if stored is None:
+                raise ValueError(f"No exchange rates available for {currency}") from e
+            return stored
+
+        rates = self.store.merge(stored, new_rates)
+        if rates.empty:
+            raise ValueError(f"No exchange rates available for {currency}")
+        # Saved even without new rates, the store is up to date
+        self.store.save(currency, "1d", rates)
+        return rates
+
+    @staticmethod
+    def _download_rates(currency: str, start) -> pd.DataFrame:
+        """Daily reference rates of currency per euro from start, from the ECB"""
+        df = ecbdata.get_series(
+            f"EXR.D.{currency}.EUR.SP00.A",
+            start=pd.Timestamp(start).strftime("%Y-%m-%d"),
+        )
+        if df.empty:
+            return pd.DataFrame({"Rate": []}, index=pd.DatetimeIndex([], name="Date"))
+        return pd.DataFrame(
+            {"Rate": pd.to_numeric(df["OBS_VALUE"], errors="coerce").to_numpy()},
+            index=pd.DatetimeIndex(pd.to_datetime(df["TIME_PERIOD"]), name="Date"),
+        ).dropna()
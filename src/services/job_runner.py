@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Job states, the last three are final
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised from a progress report once the job has been cancelled"""
+
+
+@dataclass
+class Job:
+    """State of a background job, updated by the worker thread and read by the UI"""
+
+    id: str
+    key: Hashable | None = None
+    status: str = PENDING
+    progress: float = 0.0
+    message: str = ""
+    result: Any = None
+    error: str | None = None
+    finished_at: float | None = None  # time.monotonic() at the end of the job
+    future: Future | None = field(default=None, repr=False)
+    _cancelled: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def report(self, progress: float, message: str = "") -> None:
+        """Progress callback given to the job function, also the cancellation point"""
+        if self._cancelled.is_set():
+            raise JobCancelled()
+        self.progress = min(max(progress, 0.0), 1.0)
+        self.message = message
+
+
+class JobRunner:
+    """Bounded pool of worker threads running long jobs out of the Streamlit script thread.
+
+    Results are kept by job id so any rerun (or another page visit) can poll them.
+    A single instance is meant to be shared by every Streamlit session of the process.
+    Results older than max_age seconds are not reused for new submissions, e.g. once
+    new market data may be available.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_finished: int,
+        name: str = "jobs",
+        max_age: float | None = None,
+    ):
+        self.name = name
+        self.max_finished = max_finished
+        self.max_age = max_age
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self._jobs = OrderedDict()  # id -> Job, in submission order
+        self._by_key = {}  # key -> id of the latest job with this key
+        self._lock = threading.Lock()
+
+    def submit(
+        self, func: Callable, *args, key: Hashable | None = None, **kwargs
+    ) -> str:
+        """Queue func(*args, progress=..., **kwargs) and return the job id.
+
+        A job with the same key which is queued, running or done less than max_age
+        seconds ago is reused instead.
+        """
+        with self._lock:
+            if key is not None and key in self._by_key:
+                existing = self._jobs.get(self._by_key[key])
+                if existing is not None and self._reusable(existing):
+                    return existing.id
+
+            job = Job(id=uuid.uuid4().hex, key=key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._by_key[key] = job.id
+            job.future = self._executor.submit(self._run, job, func, args, kwargs)
+            self._prune()
+        return job.id
+
+    def get(self, job_id: str) -> Job:
+        """Return the job, or None if unknown or dropped from the history"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job, or ask a running one to stop at its next progress report"""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job._cancelled.set()
+        if job.future.cancel():
+            job.status = CANCELLED
+        return True
+
+    def _reusable(self, job: Job) -> bool:
+        if job.status in (FAILED, CANCELLED):
+            return False
+        if job.status == DONE and self.max_age is not None:
+            return time.monotonic() - job.finished_at <= self.max_age
+        return True
+
+    def _run(self, job: Job, func: Callable, args: tuple, kwargs: dict) -> None:
+        if job._cancelled.is_set():
+            job.status = CANCELLED
+            return
+        job.status = RUNNING
+        try:
+            job.result = func(*args, progress=job.report, **kwargs)
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            logger.exception(f"{self.name} job {job.id} failed")
+            job.error = str(e)
+            job.status = FAILED
+        else:
+            job.progress = 1.0
+            job.finished_at = time.monotonic()
+            job.status = DONE
+
+    def _prune(self) -> None:
+        """Drop the oldest finished jobs beyond the history size"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(len(finished) - self.max_finished, 0)]:
+            job = self._jobs.pop(job_id)
+            if self._by_key.get(job.key) == job_id:
+                del self._by_key[job.key]
@@ -1,26 +1,339 @@
-from foliotrack.services.MarketService import MarketService as FoliotrackMarketService
+import functools
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
 from foliotrack.domain.Portfolio import Portfolio
-import yfinance as yf
+from foliotrack.domain.Security import Security
+import numpy as np
 import pandas as pd
+from src.config import (
+    MEMORY_CACHE_MAX_BYTES,
+    PRICE_CACHE_REFRESH_SECONDS,
+    PRICE_UPDATE_TIMEOUT_SECONDS,
+    PRICE_UPDATE_WORKERS,
+    QUOTE_CACHE_MAX_BYTES,
+    QUOTE_CACHE_TTL_SECONDS,
+)
+from src.services.fx_service import FxService
+from src.services.memory_cache import MemoryCache
+from src.services.price_cache import PriceCache
+from src.services.price_store import PriceStore
+from src.services.versioning import bump_version
+
+logger = logging.getLogger(__name__)
+
+# Process-wide caches, shared by every Streamlit session
+HISTORY_CACHE = MemoryCache(
+    MEMORY_CACHE_MAX_BYTES, PRICE_CACHE_REFRESH_SECONDS, name="history"
+)
+QUOTE_CACHE = MemoryCache(QUOTE_CACHE_MAX_BYTES, QUOTE_CACHE_TTL_SECONDS, name="quotes")
+
+
+@functools.cache
+def _cached_quote_market_service_class() -> type:
+    """foliotrack market service reading latest quotes through the shared quote cache.
+
+    Built on first use, by the first session fetching quotes.
+    """
+    from foliotrack.services.MarketService import (
+        MarketService as FoliotrackMarketService,
+    )
+
+    class _CachedQuoteMarketService(FoliotrackMarketService):
+        def __init__(self, quote_cache: MemoryCache, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.quote_cache = quote_cache
+
+        def _fetch_market_data(self, ticker: str):
+            key = (self.provider, ticker)
+            quote = self.quote_cache.get(key)
+            if quote is None:
+                quote = super()._fetch_market_data(ticker)
+                # Failed lookups are not cached so they are retried on the next update
+                if quote[0] is not None:
+                    self.quote_cache.set(key, quote)
+            return quote
+
+    return _CachedQuoteMarketService
 
 
 class MarketService:
-    def __init__(self):
-        self.service = FoliotrackMarketService()
+    def __init__(
+        self,
+        price_cache: PriceCache | None = None,
+        history_cache: MemoryCache | None = None,
+        quote_cache: MemoryCache | None = None,
+        fx_service: FxService | None = None,
+        price_store: PriceStore | None = None,
+        max_workers: int = PRICE_UPDATE_WORKERS,
+        timeout: float = PRICE_UPDATE_TIMEOUT_SECONDS,
+    ):
+        self.quote_cache = quote_cache if quote_cache is not None else QUOTE_CACHE
+        self.price_cache = price_cache if price_cache is not None else PriceCache()
+        self.history_cache = (
+            history_cache if history_cache is not None else HISTORY_CACHE
+        )
+        self.fx_service = fx_service if fx_service is not None else FxService()
+        self.price_store = price_store if price_store is not None else PriceStore()
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    @functools.cached_property
+    def service(self):
+        """foliotrack market service used for latest quotes, created on first fetch"""
+        return _cached_quote_market_service_class()(self.quote_cache)
+
+    def cache_stats(self) -> list[dict]:
+        """Hit/miss counters of the in-memory history and quote caches"""
+        return [self.history_cache.stats(), self.quote_cache.stats()]
+
+    def update_prices(self, portfolio: Portfolio) -> dict:
+        """Update prices for all securities in the portfolio.
+
+        Quotes are fetched concurrently on a bounded thread pool and each exchange rate
+        is fetched once per currency pair. Returns {ticker: error} for the securities
+        that could not be (fully) updated, the others are updated regardless.
+        """
+        return self.update_security_prices(portfolio, list(portfolio.securities))
+
+    def update_security_prices(self, portfolio: Portfolio, tickers: list[str]) -> dict:
+        """Update prices for the given securities only, e.g. the ones just bought.
+
+        Returns {ticker: error} like update_prices.
+        """
+        securities = [
+            portfolio.securities[ticker]
+            for ticker in dict.fromkeys(tickers)
+            if ticker in portfolio.securities and portfolio.securities[ticker].fill
+        ]
+        failures = self._update_securities(securities, portfolio.currency)
+        # Values changed, recalculate portfolio stats (no market data involved)
+        portfolio.recalculate_shares()
+        bump_version(portfolio)
+        return failures
+
+    def _update_securities(
+        self, securities: list[Security], portfolio_currency: str
+    ) -> dict:
+        """Fetch quotes and exchange rates for securities and update them in place"""
+        # 1. Quotes, one request per distinct ticker
+        tickers = list(dict.fromkeys(security.ticker for security in securities))
+        quotes, failures = self._run_concurrently(
+            self.service._fetch_market_data, tickers
+        )
+        for security in securities:
+            price, currency, name = quotes.get(security.ticker) or (None, None, None)
+            if price is None:
+                failures.setdefault(security.ticker, "No quote available")
+                continue
+            security.price_in_security_currency = price
+            if currency is not None:
+                security.currency = currency
+            if name is not None and security.name == "Unnamed security":
+                security.name = name
+
+        # 2. Exchange rates, one request per distinct currency pair
+        pairs = list(
+            dict.fromkeys(
+                (security.currency.upper(), portfolio_currency.upper())
+                for security in securities
+                if security.currency.lower() != portfolio_currency.lower()
+            )
+        )
+        rates, rate_failures = self._run_concurrently(self._fetch_rate, pairs)
+
+        # 3. Values in portfolio currency
+        for security in securities:
+            if security.currency.lower() == portfolio_currency.lower():
+                security.exchange_rate = 1.0
+            else:
+                pair = (security.currency.upper(), portfolio_currency.upper())
+                if pair in rates:
+                    security.exchange_rate = rates[pair]
+                else:
+                    # Keep the previous rate
+                    failures.setdefault(
+                        security.ticker,
+                        f"No exchange rate {pair[0]}->{pair[1]}: {rate_failures.get(pair)}",
+                    )
+            security.price_in_portfolio_currency = round(
+                float(security.price_in_security_currency * security.exchange_rate), 2
+            )
+            security.value = round(
+                security.volume * security.price_in_portfolio_currency, 2
+            )
+
+        for ticker, error in failures.items():
+            logger.error(f"Failed to update {ticker}: {error}")
+        return failures
 
-    def update_prices(self, portfolio: Portfolio):
-        """Update prices for all securities in the portfolio"""
-        self.service.update_prices(portfolio)
+    def _fetch_rate(self, pair: tuple[str, str]) -> float:
+        """Latest exchange rate between two currencies, from the stored reference rates"""
+        return self.fx_service.rate(*pair)
+
+    def _run_concurrently(self, fetch, keys: list) -> tuple[dict, dict]:
+        """Call fetch(key) for each key on a bounded thread pool.
+
+        Returns ({key: result}, {key: error}). The batch gets `timeout` seconds per
+        round of workers, keys still pending past that deadline are reported as timed out.
+        """
+        results, failures = {}, {}
+        if not keys:
+            return results, failures
+
+        workers = min(self.max_workers, len(keys))
+        deadline = self.timeout * math.ceil(len(keys) / workers)
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = {executor.submit(fetch, key): key for key in keys}
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                key = futures[future]
+                error = future.exception()
+                if error is None:
+                    results[key] = future.result()
+                else:
+                    failures[key] = str(error)
+        except TimeoutError:
+            for future, key in futures.items():
+                if not future.done():
+                    failures[key] = f"Timed out after {self.timeout}s"
+        finally:
+            # Do not wait for hanging requests
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results, failures
 
     def get_security_historical_data(
         self, tickers: list[str], start_date: str, interval="1d"
     ):
-        """Fetch historical market data for all tickers using yfinance and forward fill missing data."""
+        """Fetch historical market data for all tickers and forward fill missing data.
+
+        Bars are served from the shared in-memory cache, then from the on-disk price
+        cache. Tickers seen for the first time are downloaded in full once, cached
+        tickers only fetch the bars after their last cached one, and tickers that
+        cannot be fetched (e.g. offline) fall back to whatever is cached.
+
+        The bars of each ticker and their aligned panel are held once per host,
+        memory-mapped by the price store (see PriceStore): the result is a read-only
+        view of the panel, shared by every session requesting the same tickers.
+        """
         # Set pandas option to avoid future warnings
         pd.set_option("future.no_silent_downcasting", True)
 
-        stock = yf.Tickers(tickers)
-        hist = stock.history(start=start_date, period="max", interval=interval)
-        # Fill missing data with values from previous dates
-        hist.ffill(inplace=True)
-        return hist
+        bars = {}
+        full_fetch = []
+        tail_fetch = {}
+        in_memory = set()
+        for ticker in tickers:
+            cached = self.history_cache.get((ticker, interval))
+            if cached is not None:
+                bars[ticker] = cached
+                in_memory.add(ticker)
+                continue
+
+            cached = self.price_cache.load(ticker, interval)
+            bars[ticker] = cached
+            if cached is None or cached.empty:
+                full_fetch.append(ticker)
+            elif not self.price_cache.is_fresh(ticker, interval):
+                # Restart from the last complete bar so the overlap can be checked
+                tail_start = cached.index[-2] if len(cached) > 1 else cached.index[-1]
+                tail_fetch.setdefault(tail_start, []).append(ticker)
+
+        # One bulk request per distinct start date
+        if full_fetch:
+            self._refresh_cache(full_fetch, bars, interval)
+        for tail_start, group in tail_fetch.items():
+            self._refresh_cache(group, bars, interval, start=tail_start)
+
+        # Keep a single copy of the loaded bars, memory-mapped and shared with the
+        # other sessions and processes
+        for ticker, ticker_bars in bars.items():
+            if ticker not in in_memory and ticker_bars is not None:
+                bars[ticker] = self.price_store.store(ticker, interval, ticker_bars)
+                self.history_cache.set((ticker, interval), bars[ticker])
+
+        hist = self.price_store.panel(tickers, interval, bars)
+        if hist.empty:
+            return hist
+        return hist.loc[str(start_date) :]
+
+    def get_historical_data(
+        self, tickers: list[str], start_date, end_date=None, interval="1d"
+    ) -> pd.DataFrame:
+        """Close prices between two dates, one column per ticker (layout of bt.get).
+
+        Served from the same caches as get_security_historical_data, and like bt.get
+        only dates where every ticker has a price are kept.
+        """
+        hist = self.get_security_historical_data(tickers, start_date, interval)
+        if hist.empty:
+            return pd.DataFrame(columns=tickers, dtype=float)
+        close = hist["Close"].reindex(columns=tickers)
+        if end_date is not None:
+            close = close.loc[: str(end_date)]
+        return close.dropna()
+
+    def _refresh_cache(
+        self, tickers: list[str], bars: dict, interval: str, start=None
+    ) -> None:
+        """Download bars for tickers (full history if start is None) and merge them in the cache"""
+        downloaded = self._download_history(tickers, interval, start)
+        for ticker in tickers:
+            new_bars = self._extract_ticker(downloaded, ticker)
+            if new_bars.empty:
+                # Nothing fetched: keep serving the cached bars
+                continue
+
+            cached = bars[ticker] if start is not None else None
+            if cached is not None and not self._is_consistent(cached, new_bars):
+                # Prices were re-adjusted (split/dividend): reload the full history
+                logger.info(f"Adjusted prices detected for {ticker}, reloading")
+                new_bars = self._extract_ticker(
+                    self._download_history([ticker], interval, None), ticker
+                )
+                if new_bars.empty:
+                    continue
+                cached = None
+
+            merged = self.price_cache.merge(cached, new_bars)
+            self.price_cache.save(ticker, interval, merged)
+            bars[ticker] = merged
+
+    @staticmethod
+    def _download_history(tickers: list[str], interval: str, start=None):
+        """Bulk download of bars with yfinance, empty DataFrame on failure"""
+        import yfinance as yf
+
+        try:
+            stock = yf.Tickers(tickers)
+            if start is None:
+                return stock.history(period="max", interval=interval)
+            return stock.history(start=start, interval=interval)
+        except (OSError, KeyError, ValueError, yf.exceptions.YFException) as e:
+            logger.warning(f"Could not download history for {tickers}: {e}")
+            return pd.DataFrame()
+
+    @staticmethod
+    def _extract_ticker(downloaded: pd.DataFrame, ticker: str) -> pd.DataFrame:
+        """Extract the bars of a single ticker from a yfinance multi-ticker frame"""
+        if downloaded.empty or not isinstance(downloaded.columns, pd.MultiIndex):
+            return pd.DataFrame()
+        if ticker not in downloaded.columns.get_level_values(1):
+            return pd.DataFrame()
+        return downloaded.xs(ticker, axis=1, level=1).dropna(how="all")
+
+    @staticmethod
+    def _is_consistent(cached: pd.DataFrame, new_bars: pd.DataFrame) -> bool:
+        """Check that completed bars present in both frames have the same closes"""
+        # The last cached bar may have been a partial (intraday) one
+        overlap = cached.index[:-1].intersection(new_bars.index)
+        if overlap.empty or "Close" not in cached.columns:
+            return True
+        return bool(
+            np.allclose(
+                cached.loc[overlap, "Close"].to_numpy(dtype=float),
+                new_bars.loc[overlap, "Close"].to_numpy(dtype=float),
+                rtol=1e-4,
+                equal_nan=True,
+            )
+        )
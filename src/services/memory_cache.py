@@ -0,0 +1,118 @@
+import mmap
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+class MemoryCache:
+    """Thread-safe in-memory cache with TTL expiry, LRU eviction and a memory cap.
+
+    A single instance is meant to be shared by every Streamlit session of the process.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, name: str = "cache"):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._entries = OrderedDict()  # key -> (value, expires_at, nbytes)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting least recently used entries above the memory cap"""
+        nbytes = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if nbytes > self.max_bytes:
+                # Never let a single value flush the whole cache
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value, computing and storing it with factory on a miss"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Drop all entries, counters are kept"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size, for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        """Approximate memory footprint of a cached value"""
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            if _is_memory_mapped(value.to_numpy()):
+                # Values live in the OS page cache, only the index is on the heap
+                return int(value.index.memory_usage(deep=True))
+            return int(np.sum(value.memory_usage(deep=True)))
+        if isinstance(value, tuple):
+            return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+        return sys.getsizeof(value)
+
+
+def _is_memory_mapped(array: np.ndarray) -> bool:
+    """True if the array is a view of a memory-mapped file"""
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, "base", None)
+    return False
@@ -1,12 +1,157 @@
+import hashlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import cvxpy as cp
+import numpy as np
+import pandas as pd
 from foliotrack.services.OptimizationService import (
     OptimizationService as FoliotrackOptimizationService,
 )
 from foliotrack.domain.Portfolio import Portfolio
+from src.config import (
+    OPTIMIZATION_CACHE_MAX_BYTES,
+    OPTIMIZATION_CACHE_TTL_SECONDS,
+    OPTIMIZATION_WORKERS,
+)
+from src.services.memory_cache import MemoryCache
+from src.services.portfolio_snapshot import PortfolioSnapshot, get_snapshot
+from src.services.versioning import bump_version
+
+logger = logging.getLogger(__name__)
+
+# Process-wide cache of solved unit counts, shared by every Streamlit session
+EQUILIBRIUM_CACHE = MemoryCache(
+    OPTIMIZATION_CACHE_MAX_BYTES, OPTIMIZATION_CACHE_TTL_SECONDS, name="equilibrium"
+)
+
+# Big-M bound of the sell-allowed formulation, as in foliotrack
+SELLING_BIG_M = 1e6
+
+# Problems compiled by this process, pool workers keep them between scenarios
+_WORKER_PROBLEMS = {}
+
+# Errors of a scenario without a solution: infeasible, or the solver failed
+SCENARIO_ERRORS = (RuntimeError, cp.error.SolverError)
+
+# Process pool solving what-if scenarios, started on first use and kept for the
+# next batches, its workers keep their compiled problems too
+_SCENARIO_POOL = None
+_SCENARIO_POOL_LOCK = threading.Lock()
+
+
+class _EquilibriumProblem:
+    """foliotrack equilibrium MIQP with parameters, compiled once and re-solved with new data"""
+
+    def __init__(self, n: int, selling: bool):
+        self.units = cp.Variable(n, integer=True)
+        self.held = cp.Variable(n, boolean=True)
+        self.prices = cp.Parameter(n)
+        self.offset = cp.Parameter(n)
+        self.slope = cp.Parameter((n, n))
+        self.upper_bound = cp.Parameter(n)
+        self.min_invest = cp.Parameter()
+        self.max_invest = cp.Parameter()
+        self.max_held = cp.Parameter()
+
+        invested = self.prices @ self.units
+        constraints = [
+            cp.sum(self.held) <= self.max_held,
+            invested >= self.min_invest,
+            invested <= self.max_invest,
+        ]
+        if selling:
+            constraints += [
+                self.units <= SELLING_BIG_M * self.held,
+                self.units >= -SELLING_BIG_M * self.held,
+            ]
+        else:
+            constraints += [
+                self.units >= 0,
+                self.units <= cp.multiply(self.held, self.upper_bound),
+            ]
+        # ||(v + Px) - sum(v + Px) w|| written as ||(v - w sum(v)) + (P - w p^T) x||,
+        # which is affine in the parameters so the problem is only canonicalized once
+        error = cp.norm(self.offset + self.slope @ self.units, 2)
+        self.problem = cp.Problem(cp.Minimize(error), constraints)
+
+    def solve(
+        self,
+        prices: np.ndarray,
+        values: np.ndarray,
+        targets: np.ndarray,
+        investment_amount: float,
+        min_percent_to_invest: float,
+        max_different_securities: int,
+    ) -> np.ndarray:
+        """Solve for the integer units to buy, starting from the previous solution"""
+        self.prices.value = prices
+        self.offset.value = values - targets * values.sum()
+        self.slope.value = np.diag(prices) - np.outer(targets, prices)
+        safe_prices = np.where(prices > 0, prices, 1e-9)
+        self.upper_bound.value = investment_amount / safe_prices * 2
+        self.min_invest.value = min_percent_to_invest * investment_amount
+        self.max_invest.value = investment_amount
+        self.max_held.value = max_different_securities
+
+        # Variables keep the last solution, solvers supporting it start from there
+        self.problem.solve(warm_start=self.units.value is not None)
+        if self.units.value is None:
+            raise RuntimeError("Optimization did not produce a solution.")
+        return np.round(self.units.value).astype(int)
+
+
+def _solve_scenario(
+    prices: np.ndarray,
+    values: np.ndarray,
+    targets: np.ndarray,
+    investment_amount: float,
+    min_percent_to_invest: float,
+    max_different_securities: int,
+    selling: bool,
+) -> np.ndarray:
+    """Pool worker: solve one what-if scenario on its own copy of the portfolio data"""
+    problem = _WORKER_PROBLEMS.get((len(prices), selling))
+    if problem is None:
+        problem = _EquilibriumProblem(len(prices), selling)
+        _WORKER_PROBLEMS[(len(prices), selling)] = problem
+    return problem.solve(
+        prices,
+        values,
+        targets,
+        investment_amount,
+        min_percent_to_invest,
+        max_different_securities,
+    )
+
+
+def _scenario_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Shared scenario pool, (re)started if missing, broken or of another size"""
+    global _SCENARIO_POOL
+    with _SCENARIO_POOL_LOCK:
+        pool = _SCENARIO_POOL
+        # A worker died (e.g. killed): the pool cannot be used anymore
+        if pool is not None and (pool._broken or pool._max_workers != max_workers):
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = None
+        if pool is None:
+            # Spawn avoids forking the threaded server process
+            pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _SCENARIO_POOL = pool
+        return pool
 
 
 class OptimizationService:
-    def __init__(self):
+    def __init__(self, cache: MemoryCache | None = None):
         self.optimizer = FoliotrackOptimizationService()
+        self.cache = EQUILIBRIUM_CACHE if cache is None else cache
+        self._problems = {}  # (n, selling) -> _EquilibriumProblem
+        self._lock = threading.Lock()
 
     def solve_equilibrium(
         self,
@@ -16,10 +161,180 @@ class OptimizationService:
         max_different_securities: int,
         selling: bool,
     ):
-        return self.optimizer.solve_equilibrium(
+        snapshot = get_snapshot(portfolio)
+        if len(snapshot) == 0:
+            raise ValueError("Portfolio is empty.")
+        self.optimizer._validate_securities(portfolio.securities)
+
+        params = (
+            float(investment_amount),
+            float(min_percent_to_invest),
+            int(max_different_securities),
+            bool(selling),
+        )
+        key = (self.state_key(snapshot),) + params
+        counts = self.cache.get(key)
+        if counts is None:
+            counts = self._solve(snapshot, *params)
+            counts.flags.writeable = False
+            self.cache.set(key, counts)
+
+        # Write volumes to buy, amounts and final shares to the portfolio
+        total_to_invest, final_shares = self.optimizer._update_security_objects(
             portfolio,
-            investment_amount=investment_amount,
-            min_percent_to_invest=min_percent_to_invest,
-            max_different_securities=max_different_securities,
-            selling=selling,
+            counts,
+            np.diag(snapshot.price_in_portfolio_currency),
+            snapshot.value,
+        )
+        self.optimizer._log_results(portfolio, total_to_invest)
+        bump_version(portfolio)
+        return counts.copy(), total_to_invest, final_shares
+
+    def solve_scenarios(
+        self,
+        portfolio: Portfolio,
+        investment_amounts,
+        min_percent_to_invest: float,
+        max_different_securities,
+        selling: bool,
+        max_workers: int = OPTIMIZATION_WORKERS,
+    ) -> pd.DataFrame:
+        """
+        Solve the equilibrium for every combination of investment amount and maximum
+        number of securities, in parallel and without modifying the portfolio.
+
+        Returns a tidy table with one row per scenario and ticker. Volumes are NaN for
+        scenarios without a solution.
+        """
+        snapshot = get_snapshot(portfolio)
+        if len(snapshot) == 0:
+            raise ValueError("Portfolio is empty.")
+        state = self.state_key(snapshot)
+        scenarios = list(
+            dict.fromkeys(
+                (float(amount), float(min_percent_to_invest), int(k), bool(selling))
+                for k in np.atleast_1d(max_different_securities)
+                for amount in np.atleast_1d(investment_amounts)
+            )
         )
+
+        results = {}
+        missing = []
+        for scenario in scenarios:
+            counts = self.cache.get((state,) + scenario)
+            if counts is None:
+                missing.append(scenario)
+            else:
+                results[scenario] = counts
+
+        if len(missing) == 1:
+            results[missing[0]] = self._solve_or_none(snapshot, state, missing[0])
+        elif missing:
+            # Workers receive pickled copies of the snapshot columns, never the
+            # session portfolio
+            columns = (
+                snapshot.price_in_portfolio_currency,
+                snapshot.value,
+                snapshot.target,
+            )
+            pool = _scenario_pool(max_workers)
+            try:
+                futures = {
+                    pool.submit(_solve_scenario, *columns, *scenario): scenario
+                    for scenario in missing
+                }
+                for future in as_completed(futures):
+                    scenario = futures[future]
+                    try:
+                        counts = future.result()
+                    except SCENARIO_ERRORS as e:
+                        logger.warning(f"What-if scenario {scenario} failed: {e}")
+                        counts = None
+                    else:
+                        counts.flags.writeable = False
+                        self.cache.set((state,) + scenario, counts)
+                    results[scenario] = counts
+            except BrokenProcessPool as e:
+                # Scenarios left are reported as failed, the next batch restarts the pool
+                logger.error(f"What-if solver processes stopped: {e}")
+                for scenario in missing:
+                    results.setdefault(scenario, None)
+
+        return self._scenarios_to_df(snapshot, scenarios, results)
+
+    def _solve_or_none(
+        self, snapshot: PortfolioSnapshot, state: str, scenario: tuple
+    ) -> np.ndarray:
+        try:
+            counts = self._solve(snapshot, *scenario)
+        except SCENARIO_ERRORS as e:
+            logger.warning(f"What-if scenario {scenario} failed: {e}")
+            return None
+        counts.flags.writeable = False
+        self.cache.set((state,) + scenario, counts)
+        return counts
+
+    @staticmethod
+    def _scenarios_to_df(
+        snapshot: PortfolioSnapshot, scenarios: list, results: dict
+    ) -> pd.DataFrame:
+        """One row per scenario and ticker: volume, amount and final share"""
+        n = len(snapshot)
+        counts = np.array(
+            [
+                np.full(n, np.nan) if results[s] is None else results[s]
+                for s in scenarios
+            ],
+            dtype=float,
+        )
+        amounts = counts * snapshot.price_in_portfolio_currency
+        final = snapshot.value + amounts
+        with np.errstate(divide="ignore", invalid="ignore"):
+            final_shares = final / final.sum(axis=1, keepdims=True)
+
+        return pd.DataFrame(
+            {
+                "Investment Amount": np.repeat([s[0] for s in scenarios], n),
+                "Max Securities": np.repeat([s[2] for s in scenarios], n),
+                "Ticker": np.tile(snapshot.tickers, len(scenarios)),
+                "Volume to buy": counts.ravel(),
+                "Amount to Invest": amounts.ravel().round(2),
+                "Final Share": final_shares.ravel(),
+            }
+        )
+
+    def _solve(
+        self,
+        snapshot: PortfolioSnapshot,
+        investment_amount: float,
+        min_percent_to_invest: float,
+        max_different_securities: int,
+        selling: bool,
+    ) -> np.ndarray:
+        # Parameters of a shared problem are set and solved under the lock
+        with self._lock:
+            problem = self._problems.get((len(snapshot), selling))
+            if problem is None:
+                problem = _EquilibriumProblem(len(snapshot), selling)
+                self._problems[(len(snapshot), selling)] = problem
+            return problem.solve(
+                snapshot.price_in_portfolio_currency,
+                snapshot.value,
+                snapshot.target,
+                investment_amount,
+                min_percent_to_invest,
+                max_different_securities,
+            )
+
+    @staticmethod
+    def state_key(snapshot: PortfolioSnapshot) -> str:
+        """Hash of the optimization inputs of a portfolio: tickers, prices, values and targets"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update("\0".join(snapshot.tickers).encode())
+        for column in (
+            snapshot.price_in_portfolio_currency,
+            snapshot.value,
+            snapshot.target,
+        ):
+            digest.update(np.ascontiguousarray(column, dtype=float).tobytes())
+        return digest.hexdigest()
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.config import PORTFOLIOS_DIR
+from src.services.binary_repository import SNAPSHOT_SUFFIX, BinaryPortfolioRepository
+
+logger = logging.getLogger(__name__)
+
+# Suffixes of the indexed portfolio files
+PORTFOLIO_SUFFIXES = (".json", SNAPSHOT_SUFFIX)
+
+
+@dataclass(frozen=True)
+class CatalogueEntry:
+    """Index entry of a portfolio file. Name and currency are None if it cannot be read"""
+
+    filename: str
+    mtime: float
+    size: int
+    name: str | None
+    currency: str | None
+    securities: int
+
+    def label(self) -> str:
+        if self.name is None:
+            return f"{self.filename} (unreadable)"
+        return f"{self.filename} — {self.name} ({self.currency}, {self.securities} securities)"
+
+
+class PortfolioCatalogue:
+    """
+    In-memory index of the portfolio files of a directory.
+
+    Each lookup stats the directory only, it is rescanned when its mtime changed (a
+    file was added, removed or replaced) and rescans only re-read the files whose
+    mtime or size changed. Files edited in place keep the directory mtime:
+    savers call update(), refresh(force=True) rescans regardless.
+    """
+
+    def __init__(self, directory: Path = PORTFOLIOS_DIR):
+        self.directory = Path(directory)
+        self._entries = {}  # filename -> CatalogueEntry
+        self._sorted = []  # entries sorted by filename
+        self._dir_mtime = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> None:
+        """Bring the index up to date with the directory"""
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            dir_mtime = self.directory.stat().st_mtime_ns
+            if not force and dir_mtime == self._dir_mtime:
+                return
+            self._dir_mtime = dir_mtime
+
+            entries = {}
+            with os.scandir(self.directory) as it:
+                for file in it:
+                    if not file.name.endswith(PORTFOLIO_SUFFIXES) or not file.is_file():
+                        continue
+                    stat = file.stat()
+                    entry = self._entries.get(file.name)
+                    if (
+                        entry is None
+                        or entry.mtime != stat.st_mtime
+                        or entry.size != stat.st_size
+                    ):
+                        entry = self._read_entry(Path(file.path), stat)
+                    entries[file.name] = entry
+            self._set_entries(entries)
+
+    def update(self, filename: str) -> None:
+        """Re-index a single file, e.g. right after saving it"""
+        path = self.directory / filename
+        with self._lock:
+            entries = dict(self._entries)
+            if path.is_file():
+                entries[filename] = self._read_entry(path, path.stat())
+            else:
+                entries.pop(filename, None)
+            self._set_entries(entries)
+
+    def entries(self) -> list[CatalogueEntry]:
+        """All entries sorted by filename"""
+        self.refresh()
+        return self._sorted
+
+    def get(self, filename: str) -> CatalogueEntry | None:
+        self.refresh()
+        return self._entries.get(filename)
+
+    def exists(self, filename: str) -> bool:
+        """True if filename is indexed, whatever page of a search it is on"""
+        return self.get(filename) is not None
+
+    def search(
+        self, query: str = "", offset: int = 0, limit: int | None = None
+    ) -> tuple[list[CatalogueEntry], int]:
+        """
+        Entries whose filename or portfolio name contains query (case insensitive),
+        from offset and at most limit of them. Returns (entries, number of matches).
+        """
+        entries = self.entries()
+        query = query.strip().lower()
+        if query:
+            entries = [
+                entry
+                for entry in entries
+                if query in entry.filename.lower()
+                or (entry.name is not None and query in entry.name.lower())
+            ]
+        end = None if limit is None else offset + limit
+        return entries[offset:end], len(entries)
+
+    def _set_entries(self, entries: dict) -> None:
+        # Replaced, never mutated, so readers can iterate without the lock
+        self._entries = entries
+        self._sorted = sorted(entries.values(), key=lambda entry: entry.filename)
+
+    @staticmethod
+    def _read_entry(path: Path, stat: os.stat_result) -> CatalogueEntry:
+        name, currency, securities = None, None, 0
+        try:
+            if path.suffix == SNAPSHOT_SUFFIX:
+                header = BinaryPortfolioRepository.read_header(path)
+            else:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                header = {
+                    "name": data.get("name", ""),
+                    "currency": data.get("currency", ""),
+                    "securities": len(data.get("securities", {})),
+                }
+            name, currency = header["name"], header["currency"]
+            securities = header["securities"]
+        except (OSError, AttributeError, KeyError, ValueError) as e:
+            logger.warning(f"Could not index portfolio file {path}: {e}")
+        return CatalogueEntry(
+            filename=path.name,
+            mtime=stat.st_mtime,
+            size=stat.st_size,
+            name=name,
+            currency=currency,
+            securities=securities,
+        )
+
+
+# Process-wide catalogue of PORTFOLIOS_DIR, shared by every Streamlit session
+PORTFOLIO_CATALOGUE = PortfolioCatalogue()
@@ -1,45 +1,81 @@
+import json
+import logging
 from foliotrack.domain.Portfolio import Portfolio
 from foliotrack.storage.PortfolioRepository import PortfolioRepository
-from src.config import PORTFOLIOS_DIR
+from src.config import JOURNAL_COMPACT_BYTES, PORTFOLIOS_DIR
+from src.services.binary_repository import SNAPSHOT_SUFFIX, BinaryPortfolioRepository
+from src.services.portfolio_catalogue import PORTFOLIO_CATALOGUE, PortfolioCatalogue
+from src.services.transaction_journal import TransactionJournal
+from src.services.versioning import bump_version
+
+logger = logging.getLogger(__name__)
 
 
 class PortfolioService:
-    def __init__(self):
+    def __init__(self, catalogue: PortfolioCatalogue | None = None):
         self.repo = PortfolioRepository()
+        self.binary_repo = BinaryPortfolioRepository()
+        self.catalogue = PORTFOLIO_CATALOGUE if catalogue is None else catalogue
 
     def get_portfolio_files(self) -> list:
-        """Get list of JSON files in Portfolios directory"""
-        if not PORTFOLIOS_DIR.exists():
-            PORTFOLIOS_DIR.mkdir(parents=True, exist_ok=True)
-        return list(PORTFOLIOS_DIR.glob("*.json"))
+        """Get list of portfolio files in Portfolios directory, from the catalogue index"""
+        return [
+            self.catalogue.directory / entry.filename
+            for entry in self.catalogue.entries()
+        ]
 
     def get_portfolio_filenames(self) -> list:
-        """Get list of JSON filenames in Portfolios directory"""
-        files = self.get_portfolio_files()
-        return [f.name for f in files]
+        """Get list of portfolio filenames in Portfolios directory, from the catalogue index"""
+        return [entry.filename for entry in self.catalogue.entries()]
 
     def load_portfolio(self, filename: str) -> Portfolio:
-        """Load portfolio from JSON file"""
+        """Load portfolio from a JSON file, or a binary snapshot (.arrow), and replay its journal"""
+        return self.load_portfolio_journal(filename)[0]
+
+    def load_portfolio_journal(self, filename: str) -> tuple[Portfolio, list[str]]:
+        """
+        Load portfolio from a JSON file, or a binary snapshot (.arrow), and replay its
+        journal. Returns the portfolio and the journal records that could not be
+        replayed, as messages.
+        """
         # handling both full path and just filename
         filepath = PORTFOLIOS_DIR / filename
 
         try:
-            return self.repo.load_from_json(str(filepath))
+            if filepath.suffix == SNAPSHOT_SUFFIX:
+                portfolio = self.binary_repo.load(filepath)
+            else:
+                portfolio = self.repo.load_from_json(str(filepath))
+            skipped = self._replay(portfolio, TransactionJournal(filepath).records())
+            return portfolio, skipped
         except Exception as e:
             raise Exception(f"Error loading portfolio {filename}: {str(e)}")
 
     def save_portfolio(self, portfolio: Portfolio, filename: str) -> str:
-        """Save portfolio to JSON file. Returns the full path."""
+        """Save portfolio to a JSON file, or a binary snapshot (.arrow). Returns the full path."""
         try:
             # Ensure directory exists
             PORTFOLIOS_DIR.mkdir(parents=True, exist_ok=True)
 
             filepath = PORTFOLIOS_DIR / filename
-            self.repo.save_to_json(portfolio, str(filepath))
+            if filepath.suffix == SNAPSHOT_SUFFIX:
+                self.binary_repo.save(portfolio, filepath)
+            else:
+                # Replace the file atomically, a crash never leaves it half written
+                tmp_path = filepath.with_name(filepath.name + ".tmp")
+                self.repo.save_to_json(portfolio, str(tmp_path))
+                tmp_path.replace(filepath)
+            # The saved file includes every journaled change
+            TransactionJournal(filepath).reset()
+            self.catalogue.update(filename)
             return str(filepath)
         except Exception as e:
             raise Exception(f"Error saving portfolio: {str(e)}")
 
+    def export_json(self, portfolio: Portfolio) -> str:
+        """Portfolio in the JSON file layout, whatever format it was loaded from"""
+        return json.dumps(self.repo._to_dict(portfolio), indent=4, ensure_ascii=False)
+
     def buy_security(
         self,
         portfolio: Portfolio,
@@ -47,13 +83,113 @@ class PortfolioService:
         volume: float,
         price: float,
         currency: str,
+        filename: str | None = None,
     ):
+        """Buy a security, journaled to the portfolio file it was loaded from if any"""
         portfolio.buy_security(
             ticker=ticker,
             volume=volume,
             price=price,
             currency=currency,
         )
+        bump_version(portfolio)
+        if filename:
+            event = portfolio.history[-1]
+            self._journal(
+                portfolio,
+                filename,
+                [{"op": "buy", **event, "price": price, "currency": currency}],
+            )
 
-    def sell_security(self, portfolio: Portfolio, ticker: str, volume: float):
+    def sell_security(
+        self,
+        portfolio: Portfolio,
+        ticker: str,
+        volume: float,
+        filename: str | None = None,
+    ):
+        """Sell a security, journaled to the portfolio file it was loaded from if any"""
         portfolio.sell_security(ticker=ticker, volume=volume)
+        bump_version(portfolio)
+        if filename:
+            date = portfolio.history[-1]["date"]
+            self._journal(
+                portfolio,
+                filename,
+                [{"op": "sell", "ticker": ticker, "volume": volume, "date": date}],
+            )
+
+    def journal_prices(self, portfolio: Portfolio, filename: str, tickers: list):
+        """Journal the current prices of securities, e.g. after a price update"""
+        records = [
+            {
+                "op": "price",
+                "ticker": ticker,
+                "name": security.name,
+                "currency": security.currency,
+                "exchange_rate": security.exchange_rate,
+                "price_in_security_currency": security.price_in_security_currency,
+            }
+            for ticker in tickers
+            if (security := portfolio.securities.get(ticker)) is not None
+        ]
+        if records:
+            self._journal(portfolio, filename, records)
+
+    def _journal(self, portfolio: Portfolio, filename: str, records: list) -> None:
+        """Append records to the file's journal, compacted into the file when too long"""
+        filepath = PORTFOLIOS_DIR / filename
+        if not filepath.exists():
+            self.save_portfolio(portfolio, filename)
+            return
+        size = TransactionJournal(filepath).append(records)
+        if size > JOURNAL_COMPACT_BYTES:
+            self.save_portfolio(portfolio, filename)
+
+    @staticmethod
+    def _replay(portfolio: Portfolio, records: list) -> list[str]:
+        """
+        Apply journal records to a portfolio loaded from its file. A record that
+        cannot be applied (e.g. selling more than held) is skipped, the others are
+        still replayed. Returns the skipped records, as messages.
+        """
+        skipped = []
+        for record in records:
+            try:
+                PortfolioService._apply(portfolio, record)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping journal record {record}: {e}")
+                skipped.append(f"{json.dumps(record)}: {e}")
+        portfolio.recalculate_shares()
+        return skipped
+
+    @staticmethod
+    def _apply(portfolio: Portfolio, record: dict) -> None:
+        """Apply a single journal record"""
+        if record["op"] == "buy":
+            portfolio.buy_security(
+                record["ticker"],
+                record["volume"],
+                currency=record["currency"],
+                price=record["price"],
+                date=record["date"],
+            )
+        elif record["op"] == "sell":
+            portfolio.sell_security(
+                record["ticker"], record["volume"], date=record["date"]
+            )
+        elif record["op"] == "price":
+            security = portfolio.securities.get(record["ticker"])
+            if security is None:
+                return
+            security.name = record["name"]
+            security.currency = record["currency"]
+            security.exchange_rate = record["exchange_rate"]
+            security.price_in_security_currency = record["price_in_security_currency"]
+            security.price_in_portfolio_currency = round(
+                float(security.price_in_security_currency * security.exchange_rate),
+                2,
+            )
+            security.value = round(
+                security.volume * security.price_in_portfolio_currency, 2
+            )
@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+from foliotrack.domain.Portfolio import Portfolio
+
+from src.services.versioning import versioned
+
+
+def _column(values, dtype=float) -> np.ndarray:
+    """Build a read-only contiguous column"""
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True)
+class PortfolioSnapshot:
+    """
+    Columnar, read-only view of the securities of a portfolio.
+
+    One contiguous array per attribute, in portfolio order, with `index` mapping each
+    ticker to its row. Use `get_snapshot` to build it once per portfolio version.
+    """
+
+    tickers: np.ndarray
+    names: np.ndarray
+    currencies: np.ndarray
+    symbols: np.ndarray
+    price: np.ndarray
+    price_in_portfolio_currency: np.ndarray
+    exchange_rate: np.ndarray
+    volume: np.ndarray
+    value: np.ndarray
+    volume_to_buy: np.ndarray
+    amount_to_invest: np.ndarray
+    target: np.ndarray
+    actual: np.ndarray
+    final: np.ndarray
+    index: dict = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def rows(self, tickers: list[str]) -> np.ndarray:
+        """Row positions of the given tickers"""
+        return np.array([self.index[ticker] for ticker in tickers], dtype=int)
+
+    @staticmethod
+    def from_portfolio(portfolio: Portfolio) -> "PortfolioSnapshot":
+        """Build a snapshot from the current state of a portfolio"""
+        tickers = list(portfolio.securities)
+        securities = list(portfolio.securities.values())
+        shares = [portfolio._get_share(ticker) for ticker in tickers]
+        return PortfolioSnapshot(
+            tickers=_column(tickers, dtype=object),
+            names=_column([s.name for s in securities], dtype=object),
+            currencies=_column([s.currency for s in securities], dtype=object),
+            symbols=_column([s.symbol for s in securities], dtype=object),
+            price=_column([s.price_in_security_currency for s in securities]),
+            price_in_portfolio_currency=_column(
+                [s.price_in_portfolio_currency for s in securities]
+            ),
+            exchange_rate=_column([s.exchange_rate for s in securities]),
+            volume=_column([s.volume for s in securities]),
+            value=_column([s.value for s in securities]),
+            # Integer unit counts once optimized, keep the inferred dtype
+            volume_to_buy=_column([s.volume_to_buy for s in securities], dtype=None),
+            amount_to_invest=_column([s.amount_to_invest for s in securities]),
+            target=_column([share.target for share in shares]),
+            actual=_column([share.actual for share in shares]),
+            final=_column([share.final for share in shares]),
+            index={ticker: i for i, ticker in enumerate(tickers)},
+        )
+
+
+@versioned
+def get_snapshot(portfolio: Portfolio) -> PortfolioSnapshot:
+    """Columnar snapshot of a portfolio, rebuilt only when the portfolio changed"""
+    return PortfolioSnapshot.from_portfolio(portfolio)
@@ -0,0 +1,64 @@
+import logging
+import re
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.config import PRICE_CACHE_DIR, PRICE_CACHE_REFRESH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class PriceCache:
+    """On-disk Parquet store of daily (or intraday) bars, one file per ticker and interval."""
+
+    def __init__(
+        self,
+        cache_dir: Path = PRICE_CACHE_DIR,
+        refresh_seconds: float = PRICE_CACHE_REFRESH_SECONDS,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.refresh_seconds = refresh_seconds
+
+    def path(self, ticker: str, interval: str) -> Path:
+        """Return the cache file path for a ticker and interval"""
+        # Keep file names portable (tickers may contain '^', '=', '/', ...)
+        safe_ticker = re.sub(r"[^A-Za-z0-9._-]", "_", ticker)
+        return self.cache_dir / f"{safe_ticker}_{interval}.parquet"
+
+    def load(self, ticker: str, interval: str) -> pd.DataFrame | None:
+        """Load cached bars for a ticker, or None if nothing is cached"""
+        filepath = self.path(ticker, interval)
+        if not filepath.exists():
+            return None
+        try:
+            return pd.read_parquet(filepath)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable price cache {filepath}: {e}")
+            return None
+
+    def save(self, ticker: str, interval: str, bars: pd.DataFrame) -> None:
+        """Write bars for a ticker, replacing any previous cache file"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        filepath = self.path(ticker, interval)
+        # Write to a temporary file first so readers never see a partial file
+        tmp_path = filepath.with_suffix(".tmp")
+        bars.to_parquet(tmp_path)
+        tmp_path.replace(filepath)
+
+    def is_fresh(self, ticker: str, interval: str) -> bool:
+        """True if the cache file was written less than refresh_seconds ago"""
+        filepath = self.path(ticker, interval)
+        if not filepath.exists():
+            return False
+        return time.time() - filepath.stat().st_mtime < self.refresh_seconds
+
+    @staticmethod
+    def merge(cached: pd.DataFrame | None, new_bars: pd.DataFrame) -> pd.DataFrame:
+        """Append new bars to cached ones, new values winning on overlapping dates"""
+        if cached is None or cached.empty:
+            return new_bars.sort_index()
+        merged = pd.concat([cached, new_bars])
+        merged = merged[~merged.index.duplicated(keep="last")]
+        return merged.sort_index()
@@ -0,0 +1,318 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import PRICE_STORE_DIR
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within the process
+    fcntl = None
+
+# Rows preallocated past the end of the bars, so new bars are appended in place
+MIN_SPARE_ROWS = 256
+
+# Attempts at opening the generation named by a manifest, another writer may
+# replace it between the manifest read and the open
+OPEN_ATTEMPTS = 3
+
+# Maps of the arrays read by this process: (directory, name, generation) -> (dates, values)
+_MAPS = {}
+_MAPS_LOCK = threading.Lock()
+
+
+class PriceStore:
+    """
+    Memory-mapped prices, shared by every session, portfolio and process of the host.
+
+    Two kinds of (dates x columns) float64 arrays are stored on disk, each with its
+    int64 dates and a JSON manifest:
+    - the bars of a ticker and interval, one column per field (Close, High, ...)
+    - the panel of a set of tickers, one column per (field, ticker) on the union of
+      their dates, forward filled. It is built from the bars of its tickers.
+
+    Readers map the files read-only and get DataFrame views of them, the OS page
+    cache holds the only copy of the prices and sessions requesting the same tickers
+    share the same panel. A single writer at a time (lock file) either appends new
+    rows past the published ones and publishes them by replacing the manifest, or
+    writes a new generation of the files. Published rows are never written again, so
+    views stay valid and unchanged whatever is written after them.
+    """
+
+    def __init__(self, directory: Path = PRICE_STORE_DIR):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    def store(self, ticker: str, interval: str, bars: pd.DataFrame) -> pd.DataFrame:
+        """
+        Read-only view of the stored bars of a ticker, written first if they differ
+        from bars.
+        """
+        return self._stored(
+            self.name(ticker, interval), self.signature(bars), lambda: bars
+        )
+
+    def bars(self, ticker: str, interval: str) -> pd.DataFrame | None:
+        """Read-only view of the stored bars of a ticker, None if none are stored"""
+        name = self.name(ticker, interval)
+        manifest = self._read_manifest(name)
+        return None if manifest is None else self._open(name, manifest)
+
+    def panel(self, tickers: list, interval: str, bars: dict) -> pd.DataFrame:
+        """
+        (field, ticker) frame of the bars of tickers on the union of their dates,
+        forward filled: a read-only view of the stored panel of these tickers. The
+        panel is written first if their bars changed since it was stored.
+        """
+        tickers = sorted(
+            t
+            for t in dict.fromkeys(tickers)
+            if bars.get(t) is not None and not bars[t].empty
+        )
+        if not tickers:
+            return pd.DataFrame()
+        signature = hashlib.blake2b(digest_size=16)
+        for ticker in tickers:
+            signature.update(ticker.encode())
+            # Views of stored bars carry their signature, others are hashed
+            signature.update(
+                (
+                    bars[ticker].attrs.get("signature") or self.signature(bars[ticker])
+                ).encode()
+            )
+        return self._stored(
+            self.panel_name(tickers, interval),
+            signature.hexdigest(),
+            lambda: self._align(tickers, bars),
+        )
+
+    @staticmethod
+    def _align(tickers: list, bars: dict) -> pd.DataFrame:
+        panel = pd.concat({t: bars[t] for t in tickers}, axis=1, names=["Ticker"])
+        panel = panel.swaplevel(axis=1).sort_index(axis=1)
+        panel.columns = panel.columns.set_names(["Price", "Ticker"])
+        return panel.ffill()
+
+    def _stored(self, name: str, signature: str, build) -> pd.DataFrame:
+        """View of the stored array name, written from build() if its signature differs"""
+        manifest = self._read_manifest(name)
+        if manifest is None or manifest["signature"] != signature:
+            with self._lock, self._file_lock(name):
+                # Another writer may have stored the same prices meanwhile
+                manifest = self._read_manifest(name)
+                if manifest is None or manifest["signature"] != signature:
+                    manifest = self._write(name, build(), signature, manifest)
+                # Generations are only replaced under the lock
+                return self._view(name, manifest)
+        return self._open(name, manifest)
+
+    def _open(self, name: str, manifest: dict) -> pd.DataFrame | None:
+        for _ in range(OPEN_ATTEMPTS):
+            try:
+                return self._view(name, manifest)
+            except FileNotFoundError:
+                # Replaced by a new generation since the manifest was read
+                manifest = self._read_manifest(name)
+                if manifest is None:
+                    return None
+        return self._view(name, manifest)
+
+    def _view(self, name: str, manifest: dict) -> pd.DataFrame:
+        dates, values = self._map(name, manifest)
+        rows = manifest["rows"]
+        index = pd.DatetimeIndex(dates[:rows].view("datetime64[ns]"), name="Date")
+        if manifest["tz"] is not None:
+            index = index.tz_localize("UTC").tz_convert(manifest["tz"])
+        columns = manifest["columns"]
+        if columns and isinstance(columns[0], list):
+            columns = pd.MultiIndex.from_tuples(
+                [tuple(column) for column in columns], names=["Price", "Ticker"]
+            )
+        frame = pd.DataFrame(values[:rows], index=index, columns=columns, copy=False)
+        frame.attrs["signature"] = manifest["signature"]
+        return frame
+
+    def _map(self, name: str, manifest: dict) -> tuple:
+        """Read-only maps of a generation, opened once per process"""
+        key = (self.directory, name, manifest["generation"])
+        with _MAPS_LOCK:
+            maps = _MAPS.get(key)
+            if maps is None:
+                shape = (manifest["capacity"], len(manifest["columns"]))
+                maps = (
+                    np.memmap(
+                        self._path(name, manifest, "dates"),
+                        np.int64,
+                        "r",
+                        shape=shape[0],
+                    ),
+                    np.memmap(
+                        self._path(name, manifest, "values"),
+                        np.float64,
+                        "r",
+                        shape=shape,
+                    ),
+                )
+                # Views of older generations keep their own maps alive
+                for old in [k for k in _MAPS if k[:2] == key[:2]]:
+                    del _MAPS[old]
+                _MAPS[key] = maps
+        return maps
+
+    def _write(
+        self, name: str, prices: pd.DataFrame, signature: str, manifest: dict
+    ) -> dict:
+        prices = prices.sort_index()
+        columns = [
+            [str(level) for level in column]
+            if isinstance(column, tuple)
+            else str(column)
+            for column in prices.columns
+        ]
+        index = pd.DatetimeIndex(prices.index)
+        tz = None if index.tz is None else str(index.tz)
+        if tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+        dates = index.asi8
+        values = prices.to_numpy(dtype=float)
+
+        # Rows appended after the published ones only: written in place
+        start = self._append_start(name, manifest, columns, tz, dates, values)
+        if start is None:
+            manifest = {
+                "generation": 0 if manifest is None else manifest["generation"] + 1,
+                "capacity": len(dates) + max(MIN_SPARE_ROWS, len(dates) // 4),
+                "columns": columns,
+                "tz": tz,
+            }
+            start = 0
+        stored_dates, stored_values = self._open_for_write(
+            name, manifest, create=start == 0
+        )
+        stored_dates[start : len(dates)] = dates[start:]
+        stored_values[start : len(dates)] = values[start:]
+        stored_dates.flush()
+        stored_values.flush()
+        del stored_dates, stored_values
+
+        manifest = dict(manifest, rows=len(dates), signature=signature)
+        tmp_path = self._manifest_path(name).with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest))
+        tmp_path.replace(self._manifest_path(name))
+        if start == 0:
+            self._remove_old_generations(name, manifest["generation"])
+        logger.info(f"Price store {name}: rows {start}-{len(dates)} written")
+        return manifest
+
+    def _append_start(self, name, manifest, columns, tz, dates, values):
+        """First row to write in place past the published ones, None to rewrite"""
+        if (
+            manifest is None
+            or manifest["columns"] != columns
+            or manifest["tz"] != tz
+            or len(dates) > manifest["capacity"]
+        ):
+            return None
+        # Every published row must be unchanged, including a partial last bar
+        start = manifest["rows"]
+        if len(dates) <= start:
+            return None
+        stored_dates, stored_values = self._map(name, manifest)
+        if not np.array_equal(
+            stored_dates[:start], dates[:start]
+        ) or not np.array_equal(stored_values[:start], values[:start], equal_nan=True):
+            return None
+        return start
+
+    def _open_for_write(self, name: str, manifest: dict, create: bool) -> tuple:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        mode = "w+" if create else "r+"
+        shape = (manifest["capacity"], len(manifest["columns"]))
+        return (
+            np.memmap(
+                self._path(name, manifest, "dates"), np.int64, mode, shape=shape[0]
+            ),
+            np.memmap(
+                self._path(name, manifest, "values"), np.float64, mode, shape=shape
+            ),
+        )
+
+    def _remove_old_generations(self, name: str, generation: int) -> None:
+        # Maps already opened on them stay valid on POSIX systems, readers which
+        # have not opened them yet retry on the new generation
+        for path in self.directory.glob(f"{name}.*.*"):
+            if path.suffix in (".dates", ".values") and path.name.split(".")[-2] != str(
+                generation
+            ):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _read_manifest(self, name: str) -> dict | None:
+        try:
+            manifest = json.loads(self._manifest_path(name).read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+        # Written by an earlier layout of the store: rewritten from generation 0,
+        # which removes its files
+        return manifest if "columns" in manifest else None
+
+    def _manifest_path(self, name: str) -> Path:
+        return self.directory / f"{name}.json"
+
+    def _path(self, name: str, manifest: dict, kind: str) -> Path:
+        return self.directory / f"{name}.{manifest['generation']}.{kind}"
+
+    def _file_lock(self, name: str):
+        return _FileLock(self.directory / f"{name}.lock")
+
+    @staticmethod
+    def name(ticker: str, interval: str) -> str:
+        """File name stem of the bars of a ticker, e.g. AIR_PA_1d"""
+        # Keep file names portable (tickers may contain '^', '=', '/', '.', ...)
+        safe_ticker = re.sub(r"[^A-Za-z0-9_-]", "_", ticker)
+        digest = hashlib.blake2b(ticker.encode(), digest_size=4).hexdigest()
+        return f"{safe_ticker}_{digest}_{interval}"
+
+    @staticmethod
+    def panel_name(tickers: list, interval: str) -> str:
+        """File name stem of the panel of a sorted list of tickers"""
+        digest = hashlib.blake2b("\0".join(tickers).encode(), digest_size=8)
+        return f"{digest.hexdigest()}_{interval}"
+
+    @staticmethod
+    def signature(bars: pd.DataFrame) -> str:
+        """Hash of bars: dates, columns and values"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(list(bars.columns)).encode())
+        digest.update(pd.DatetimeIndex(bars.index).asi8.tobytes())
+        digest.update(np.ascontiguousarray(bars.to_numpy(dtype=float)))
+        return digest.hexdigest()
+
+
+class _FileLock:
+    """Exclusive lock on a file, held by a single writer across processes"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w")
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
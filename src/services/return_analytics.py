@@ -0,0 +1,170 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+# Calendar days per year, used to infer the sampling frequency of a price panel
+DAYS_PER_YEAR = 365.25
+
+
+class ReturnAnalytics:
+    """
+    Vectorized return statistics of a price panel (one column per strategy or security).
+
+    Every statistic is computed for all columns at once, on first access, and kept on
+    the instance: build one per backtest result and reuse it across reruns.
+    """
+
+    def __init__(self, prices):
+        if isinstance(prices, pd.Series):
+            prices = prices.to_frame()
+        self.prices = prices.astype(float)
+
+    @cached_property
+    def periods_per_year(self) -> float:
+        """Sampling frequency inferred from the number of dates per calendar year"""
+        index = self.prices.index
+        span = (index[-1] - index[0]).days if len(index) > 1 else 0
+        return (len(index) - 1) * DAYS_PER_YEAR / span if span > 0 else 252.0
+
+    @cached_property
+    def log_returns(self) -> pd.DataFrame:
+        """Per period log returns, NaN on the first row"""
+        return np.log(self.prices).diff()
+
+    @cached_property
+    def cumulative_log_returns(self) -> pd.DataFrame:
+        """Running sum of log returns, 0 at the first date"""
+        return self.log_returns.fillna(0.0).cumsum()
+
+    @cached_property
+    def monthly_returns(self) -> pd.DataFrame:
+        return self.period_returns("ME")
+
+    @cached_property
+    def yearly_returns(self) -> pd.DataFrame:
+        return self.period_returns("YE")
+
+    def period_returns(self, freq: str) -> pd.DataFrame:
+        """Compounded returns per calendar period: exp(sum of log returns) - 1"""
+        sums = self.log_returns.resample(freq).sum(min_count=1)
+        return np.expm1(sums).dropna(how="all")
+
+    def rolling_volatility(self, window: int | None = None) -> pd.DataFrame:
+        """Annualized rolling volatility of log returns, window defaults to about 3 months"""
+        if window is None:
+            window = max(round(self.periods_per_year / 4), 2)
+        return self.log_returns.rolling(window).std() * np.sqrt(self.periods_per_year)
+
+    @cached_property
+    def drawdown(self) -> pd.DataFrame:
+        """Relative distance to the running peak, 0 at new highs"""
+        return self.prices / self.prices.cummax() - 1.0
+
+    @cached_property
+    def underwater_periods(self) -> pd.DataFrame:
+        """
+        One row per drawdown episode and column: start (last peak), trough, recovery
+        date (NaT while still underwater), depth and length in periods.
+        """
+        rows = []
+        for column in self.drawdown.columns:
+            drawdown = self.drawdown[column].to_numpy()
+            underwater = drawdown < 0
+            if not underwater.any():
+                continue
+            # Episode boundaries from the edges of the underwater mask
+            edges = np.diff(np.concatenate(([False], underwater, [False])).astype(int))
+            starts = np.flatnonzero(edges == 1)
+            ends = np.flatnonzero(edges == -1)
+            depth = np.minimum.reduceat(drawdown, starts)
+            # Trough position within each episode
+            troughs = np.array(
+                [s + np.argmin(drawdown[s:e]) for s, e in zip(starts, ends)]
+            )
+            index = self.drawdown.index
+            recovered = ends < len(drawdown)
+            rows.append(
+                pd.DataFrame(
+                    {
+                        "Column": column,
+                        "Start": index[np.maximum(starts - 1, 0)],
+                        "Trough": index[troughs],
+                        "End": index[np.where(recovered, ends, 0)].where(recovered),
+                        "Depth": depth,
+                        "Length": ends - starts,
+                    }
+                )
+            )
+        if not rows:
+            return pd.DataFrame(
+                columns=["Column", "Start", "Trough", "End", "Depth", "Length"]
+            )
+        return pd.concat(rows, ignore_index=True)
+
+    def rolling_windows(self, window_years: float, step: str = "MS") -> pd.DataFrame:
+        """
+        CAGR, maximum drawdown and Sharpe ratio of every window of window_years
+        starting at each step (month start by default), for every column.
+
+        Windows are read from prefix sums over the returns of the full curves instead
+        of separate backtests, which is exact as long as the strategy state does not
+        depend on its start date (e.g. windows starting on rebalance dates).
+        """
+        index = self.prices.index
+        months = round(window_years * 12)
+        starts = pd.date_range(index[0], index[-1], freq=step)
+        if len(starts) == 0 or starts[0] > index[0]:
+            starts = starts.insert(0, index[0])
+        ends = starts + pd.DateOffset(months=months)
+        # Only complete windows
+        complete = ends <= index[-1]
+        starts, ends = starts[complete], ends[complete]
+        start_pos = index.searchsorted(starts)
+        end_pos = index.searchsorted(ends, side="right") - 1
+        valid = end_pos > start_pos + 1
+        start_pos, end_pos = start_pos[valid], end_pos[valid]
+        if len(start_pos) == 0:
+            return pd.DataFrame(
+                columns=["Column", "Start", "End", "CAGR", "Max Drawdown", "Sharpe"]
+            )
+
+        prices = self.prices.to_numpy()
+        log_prices = np.log(prices)
+        simple = np.nan_to_num(self.prices.pct_change().to_numpy(), nan=0.0)
+        # Prefix sums with a leading zero row: sum of rows i+1..j is P[j+1] - P[i+1]
+        zeros = np.zeros((1, prices.shape[1]))
+        sums = np.concatenate((zeros, np.cumsum(simple, axis=0)))
+        squares = np.concatenate((zeros, np.cumsum(simple**2, axis=0)))
+
+        n = (end_pos - start_pos)[:, None]
+        mean = (sums[end_pos + 1] - sums[start_pos + 1]) / n
+        variance = (squares[end_pos + 1] - squares[start_pos + 1] - n * mean**2) / (
+            n - 1
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe = mean / np.sqrt(variance) * np.sqrt(self.periods_per_year)
+        years = ((index[end_pos] - index[start_pos]).days / DAYS_PER_YEAR).to_numpy()
+        cagr = np.expm1((log_prices[end_pos] - log_prices[start_pos]) / years[:, None])
+
+        # Running peak of every window at once, positions past a window end are masked
+        offsets = np.arange(int(n.max()) + 1)
+        rows = np.minimum(start_pos[:, None] + offsets, len(index) - 1)
+        inside = offsets <= n
+        max_drawdown = np.empty_like(cagr)
+        for j in range(prices.shape[1]):
+            window = log_prices[rows, j]
+            drawdown = np.expm1(window - np.fmax.accumulate(window, axis=1))
+            max_drawdown[:, j] = np.where(inside, drawdown, 0.0).min(axis=1)
+
+        columns = list(self.prices.columns)
+        return pd.DataFrame(
+            {
+                "Column": np.repeat([columns], len(start_pos), axis=0).ravel(),
+                "Start": np.repeat(index[start_pos], len(columns)),
+                "End": np.repeat(index[end_pos], len(columns)),
+                "CAGR": cagr.ravel(),
+                "Max Drawdown": max_drawdown.ravel(),
+                "Sharpe": sharpe.ravel(),
+            }
+        )
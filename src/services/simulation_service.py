@@ -1,4 +1,16 @@
+import math
+
 import numpy as np
+import pandas as pd
+
+# Distributions available for stochastic annual returns
+RETURN_MODELS = ("normal", "lognormal", "bootstrap")
+
+# Contract parameters that can be swept, the number of grid points per chunk and
+# per sweep (results take 16 bytes per grid point)
+SWEEP_PARAMETERS = ("annual_return", "security_fee", "bank_fee", "capgains_tax")
+SWEEP_CHUNK_SIZE = 20_000
+MAX_SWEEP_COMBINATIONS = 2_000_000
 
 
 class SimulationService:
@@ -7,32 +19,245 @@ class SimulationService:
         """
         Simulate yearly portfolio value after applying gross return, Security fee and bank fee.
         """
-        # Initialize array to store values at each year
-        values = np.empty(contract["years"] + 1)
+        values, invested = SimulationService.simulate_contracts(
+            **SimulationService.contracts_to_arrays([contract])
+        )
+        return values[0], float(invested[0])
+
+    @staticmethod
+    def simulate_contracts(
+        initial, annual_return, security_fee, bank_fee, yearly_investment, years
+    ) -> tuple:
+        """
+        Simulate a batch of contracts given as arrays (or scalars broadcast to the batch).
+
+        Returns a (n_contracts, max(years) + 1) array of yearly values, NaN past each
+        contract's own horizon, and the (n_contracts,) total invested.
+        """
+        initial, annual_return, security_fee, bank_fee, yearly_investment, years = (
+            np.broadcast_arrays(
+                *(
+                    np.atleast_1d(np.asarray(x, dtype=float))
+                    for x in (
+                        initial,
+                        annual_return,
+                        security_fee,
+                        bank_fee,
+                        yearly_investment,
+                        years,
+                    )
+                )
+            )
+        )
+        years = years.astype(int)
+        y = np.arange(years.max(initial=0) + 1)
+
+        # Yearly growth factor: gross return, then security and bank fees
+        growth = (1.0 + annual_return) * (1.0 - security_fee) * (1.0 - bank_fee)
+        compounded = growth[:, None] ** y
+        # Yearly contributions are added at year end (after fees): geometric series
+        # sum_{k<y} g^k = (g^y - 1) / (g - 1) = expm1(y log g) / expm1(log g), or y
+        # when g == 1. The log form stays exact for g close to 1, where g - 1 cancels
+        positive = (annual_return > -1.0) & (security_fee < 1.0) & (bank_fee < 1.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_growth = np.where(
+                positive,
+                np.log1p(annual_return) + np.log1p(-security_fee) + np.log1p(-bank_fee),
+                np.nan,
+            )[:, None]
+            contributions = np.where(
+                log_growth == 0.0,
+                y,
+                np.where(
+                    positive[:, None],
+                    np.expm1(log_growth * y) / np.expm1(log_growth),
+                    (compounded - 1.0) / (growth - 1.0)[:, None],
+                ),
+            )
+        values = (
+            initial[:, None] * compounded + yearly_investment[:, None] * contributions
+        )
+        values[y > years[:, None]] = np.nan
+
+        invested = initial + yearly_investment * years
+        return values, invested
+
+    @staticmethod
+    def contracts_to_arrays(contracts: list) -> dict:
+        """
+        Stack contract dicts into the arrays expected by simulate_contracts.
+        """
+        keys = (
+            "initial",
+            "annual_return",
+            "security_fee",
+            "bank_fee",
+            "yearly_investment",
+            "years",
+        )
+        return {
+            key: np.array([contract[key] for contract in contracts]) for key in keys
+        }
+
+    @staticmethod
+    def sweep_contract(
+        contract, grid: dict, benchmark=None, chunk_size: int = SWEEP_CHUNK_SIZE
+    ) -> tuple:
+        """
+        Evaluate a contract over the Cartesian product of the parameter values in grid.
+
+        Returns the final after-tax values and, when a benchmark contract is given, the
+        breakeven year from which the contract stays at or above the benchmark (NaN if
+        it ends below). Both arrays have one axis per grid parameter, in grid order.
+        Grids of more than MAX_SWEEP_COMBINATIONS points raise a ValueError.
+        """
+        names = list(grid)
+        axes = [np.asarray(grid[name], dtype=float) for name in names]
+        shape = tuple(len(axis) for axis in axes)
+        size = math.prod(shape)
+        if size > MAX_SWEEP_COMBINATIONS:
+            raise ValueError(
+                f"{size:,} combinations, the sweep is limited to {MAX_SWEEP_COMBINATIONS:,}."
+            )
+
+        final_after_tax = np.empty(size)
+        breakeven = np.full(size, np.nan)
+        if benchmark is not None:
+            benchmark_values, benchmark_invested = SimulationService.simulate_contract(
+                benchmark
+            )
+            benchmark_after_tax = SimulationService.compute_after_tax_curve(
+                benchmark_values, benchmark_invested, benchmark["capgains_tax"]
+            )
+
+        # Chunks keep the (grid points x years) intermediates bounded in memory
+        for start in range(0, size, chunk_size):
+            flat = np.arange(start, min(start + chunk_size, size))
+            params = {key: contract[key] for key in SWEEP_PARAMETERS}
+            for name, axis, coords in zip(names, axes, np.unravel_index(flat, shape)):
+                params[name] = axis[coords]
+            values, invested = SimulationService.simulate_contracts(
+                initial=contract["initial"],
+                annual_return=params["annual_return"],
+                security_fee=params["security_fee"],
+                bank_fee=params["bank_fee"],
+                yearly_investment=contract["yearly_investment"],
+                years=np.full(len(flat), contract["years"]),
+            )
+            after_tax = SimulationService.compute_after_tax_curve(
+                values, invested, np.broadcast_to(params["capgains_tax"], len(flat))
+            )
+            final_after_tax[flat] = after_tax[:, -1]
+
+            if benchmark is not None:
+                behind = after_tax < benchmark_after_tax
+                # Year following the last year spent below the benchmark
+                last_behind = (
+                    after_tax.shape[1] - 1 - np.argmax(behind[:, ::-1], axis=1)
+                )
+                breakeven[flat] = np.where(
+                    ~behind.any(axis=1),
+                    0,
+                    np.where(behind[:, -1], np.nan, last_behind + 1),
+                )
+
+        return final_after_tax.reshape(shape), breakeven.reshape(shape)
+
+    @staticmethod
+    def simulate_contract_paths(
+        contract,
+        n_paths: int = 10_000,
+        volatility: float = 0.15,
+        model: str = "normal",
+        historical_returns=None,
+        seed=None,
+    ) -> tuple:
+        """
+        Simulate yearly portfolio values along n_paths random annual return paths.
+
+        Returns a (n_paths, years + 1) array of values and the total invested.
+        """
+        # Work in a (years, paths) layout so each yearly step is a contiguous vector
+        returns = SimulationService.sample_annual_returns(
+            contract["annual_return"],
+            volatility,
+            (contract["years"], n_paths),
+            model=model,
+            historical_returns=historical_returns,
+            seed=seed,
+        )
+        # Yearly growth factor after security and bank fees, a loss is capped at 100%
+        growth = np.maximum(1.0 + returns, 0.0)
+        growth *= (1.0 - contract["security_fee"]) * (1.0 - contract["bank_fee"])
+
+        values = np.empty((contract["years"] + 1, n_paths))
         values[0] = contract["initial"]
-        # Initialize total invested
-        invested = contract["initial"]
-        # Simulate yearly portfolio value
+        # Paths are vectorized, only the (short) years axis is iterated
         for y in range(1, contract["years"] + 1):
-            # Apply gross return
-            val = values[y - 1] * (1.0 + contract["annual_return"])
-            # Apply security expense ratio (reduces return)
-            val *= 1.0 - contract["security_fee"]
-            # Apply bank annual fee (as % of assets at year end)
-            val *= 1.0 - contract["bank_fee"]
-            # Add yearly contribution at year end (after fees)
-            if contract["yearly_investment"]:
-                val += contract["yearly_investment"]
-                invested += contract["yearly_investment"]
-            # Store value at this year
-            values[y] = val
-        return values, invested
+            np.multiply(values[y - 1], growth[y - 1], out=values[y])
+            values[y] += contract["yearly_investment"]
+        invested = (
+            contract["initial"] + contract["yearly_investment"] * contract["years"]
+        )
+        return values.T, invested
+
+    @staticmethod
+    def sample_annual_returns(
+        mean: float,
+        volatility: float,
+        size: tuple,
+        model: str = "normal",
+        historical_returns=None,
+        seed=None,
+    ) -> np.ndarray:
+        """
+        Draw annual returns from a normal, lognormal or bootstrapped (historical) distribution.
+        """
+        rng = np.random.default_rng(seed)
+        if model == "normal":
+            return rng.normal(mean, volatility, size=size)
+        if model == "lognormal":
+            # Gross return 1 + r is lognormal with mean 1 + mean and std volatility
+            sigma2 = np.log1p(volatility**2 / (1.0 + mean) ** 2)
+            mu = np.log1p(mean) - sigma2 / 2.0
+            return rng.lognormal(mu, np.sqrt(sigma2), size=size) - 1.0
+        if model == "bootstrap":
+            if historical_returns is None or len(historical_returns) == 0:
+                raise ValueError("Bootstrap model requires historical returns.")
+            return rng.choice(np.asarray(historical_returns, dtype=float), size=size)
+        raise ValueError(
+            f"Unknown return model '{model}', expected one of {RETURN_MODELS}"
+        )
+
+    @staticmethod
+    def annual_returns_from_prices(prices: pd.Series) -> np.ndarray:
+        """
+        Compute calendar year returns from a daily price series.
+        """
+        yearly = prices.dropna().resample("YE").last()
+        return yearly.pct_change().dropna().to_numpy(dtype=float)
+
+    @staticmethod
+    def percentile_bands(paths, percentiles=(5, 50, 95)) -> np.ndarray:
+        """
+        Compute percentiles across paths at each year, one row per percentile.
+        """
+        # Paths from simulate_contract_paths are stored year by year, reducing
+        # along the last axis of the transpose reads contiguous memory
+        return np.percentile(np.asarray(paths).T, percentiles, axis=-1)
 
     @staticmethod
     def compute_after_tax_curve(values, invested, capital_gains_tax) -> np.ndarray:
         """
         Compute after-tax portfolio value at each year.
+
+        For a batch of contracts, invested and capital_gains_tax hold one value per row of values.
         """
+        # Per-contract amounts apply along the years axis
+        if np.ndim(invested):
+            invested = np.asarray(invested)[..., None]
+        if np.ndim(capital_gains_tax):
+            capital_gains_tax = np.asarray(capital_gains_tax)[..., None]
         # Compute gains
         gains = np.maximum(0.0, values - invested)
         # Compute taxes
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Suffix appended to the portfolio filename, e.g. client.json.journal
+JOURNAL_SUFFIX = ".journal"
+
+
+class TransactionJournal:
+    """
+    Append-only log of the changes made to a portfolio file since it was last saved.
+
+    One JSON record per line. The first line identifies the snapshot (the portfolio
+    file) the records apply to, by its mtime, size and content hash: once the file is
+    saved again the journal no longer matches it and is ignored, even if the process
+    stopped before the journal was reset or the file kept its mtime and size. Each record is preceded by a newline so that a
+    record torn by a crash never merges with the next one, it is skipped on replay.
+    """
+
+    def __init__(self, snapshot_path: Path):
+        self.snapshot_path = Path(snapshot_path)
+        self.path = self.snapshot_path.with_name(
+            self.snapshot_path.name + JOURNAL_SUFFIX
+        )
+
+    def append(self, records: list[dict]) -> int:
+        """Durably append records, returns the journal size in bytes"""
+        lines = "".join("\n" + json.dumps(record) for record in records)
+        if not self._matches_snapshot():
+            self._write(self._header() + lines)
+        else:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        return self.path.stat().st_size
+
+    def records(self) -> list[dict]:
+        """Records to replay over the snapshot, empty if the journal is stale"""
+        if not self._matches_snapshot():
+            return []
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            next(f)
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping torn record in {self.path}")
+        return records
+
+    def reset(self) -> None:
+        """Start an empty journal for the current snapshot, after the file was saved"""
+        self._write(self._header())
+
+    def _header(self) -> str:
+        return json.dumps({"snapshot": self._stat() + [self._digest()]})
+
+    def _stat(self) -> list:
+        stat = self.snapshot_path.stat()
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _digest(self) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(self.snapshot_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _matches_snapshot(self) -> bool:
+        if not self.path.exists() or not self.snapshot_path.exists():
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            first_line = f.readline()
+        try:
+            snapshot = json.loads(first_line)["snapshot"]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            return False
+        # The content is only hashed once mtime and size match
+        return snapshot[:2] == self._stat() and snapshot[2:] == [self._digest()]
+
+    def _write(self, content: str) -> None:
+        # Replaced atomically, never truncated in place
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_path.replace(self.path)
@@ -0,0 +1,306 @@
+import json
+import logging
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from foliotrack.domain.Portfolio import Portfolio
+
+from src.config import VALUATION_INDEX_DIR
+from src.services.market_service import MarketService
+from src.services.valuation_service import ValuationService
+
+logger = logging.getLogger(__name__)
+
+# Parquet schema metadata holding the inputs an index was computed from
+METADATA_KEY = b"valuation_index"
+
+# Price fields valued, in column order
+FIELDS = ["Open", "Low", "High", "Close"]
+
+# Serializes the writers of this process, files are replaced atomically
+_WRITE_LOCK = threading.Lock()
+
+
+class ValuationIndex:
+    """
+    Daily valuation of a portfolio, persisted per portfolio: volume held and traded,
+    OHLC value and cost basis at every price date, in the portfolio currency.
+
+    The index is computed once from the first trade, then extended. A visit only
+    values the dates from the last stored one (its bar may have been partial), or
+    from the earliest trade added or removed since the index was stored, and keeps
+    the rows before. Any change of the stored prices, exchange rates, tickers or
+    currencies rebuilds the whole index.
+    """
+
+    def __init__(
+        self,
+        market_service: MarketService | None = None,
+        valuation_service: ValuationService | None = None,
+        directory: Path = VALUATION_INDEX_DIR,
+    ):
+        self.market_service = (
+            MarketService() if market_service is None else market_service
+        )
+        self.valuation_service = (
+            ValuationService(self.market_service.fx_service)
+            if valuation_service is None
+            else valuation_service
+        )
+        self.directory = Path(directory)
+
+    def history(
+        self, portfolio: Portfolio, name: str | None, ticker_list: list[str]
+    ) -> pd.DataFrame:
+        """
+        Valuation index of a portfolio, stored under name, its file name. Portfolios
+        not saved to a file (name None) have no stable identity, their index is
+        computed in full and not stored.
+
+        One row per price date from the first trade of ticker_list: columns
+        "Volume {ticker}", "Var {ticker}" (volume traded, NaN without trade),
+        Open/Low/High/Close value, "Cost {ticker}" and the total "Cost basis".
+        Empty if there is no trade or no price.
+        """
+        events = self.events(portfolio, ticker_list)
+        if not events:
+            return pd.DataFrame()
+        hist = self.market_service.get_security_historical_data(
+            ticker_list, start_date=events[0][0], interval="1d"
+        )
+        if hist.empty:
+            return pd.DataFrame()
+
+        inputs = {
+            "tickers": list(ticker_list),
+            "currencies": [
+                portfolio.securities[t].currency.upper()
+                if t in portfolio.securities
+                else portfolio.currency.upper()
+                for t in ticker_list
+            ],
+            "currency": portfolio.currency.upper(),
+        }
+        path = None if name is None else self.path(name)
+        stored, metadata = (None, None) if path is None else self._read(path)
+        start = self._recompute_from(portfolio, stored, metadata, inputs, events, hist)
+
+        # Positions and cost carried from the last row kept
+        held = cost = None
+        if start > 0:
+            held = stored[[f"Volume {t}" for t in ticker_list]].iloc[start - 1]
+            cost = stored[[f"Cost {t}" for t in ticker_list]].iloc[start - 1]
+        tail_events = [
+            event
+            for event, row in zip(events, self._rows(hist.index, events))
+            if row >= start
+        ]
+        tail = self.compute(
+            tail_events,
+            ticker_list,
+            self.valuation_service.to_portfolio_currency(portfolio, hist.iloc[start:]),
+            held=None if held is None else held.to_numpy(),
+            cost=None if cost is None else cost.to_numpy(),
+        )
+        index = tail if start == 0 else pd.concat([stored.iloc[:start], tail])
+
+        events_json = [list(event) for event in events]
+        if path is None or (
+            stored is not None
+            and metadata["events"] == events_json
+            and index.equals(stored)
+        ):
+            return index
+        self._write(
+            path,
+            index,
+            {
+                "inputs": inputs,
+                "events": events_json,
+                "prices_key": self._prices_key(portfolio, hist, len(index), inputs),
+            },
+        )
+        return index
+
+    def _recompute_from(
+        self,
+        portfolio: Portfolio,
+        stored: pd.DataFrame,
+        metadata: dict,
+        inputs: dict,
+        events: list,
+        hist: pd.DataFrame,
+    ) -> int:
+        """Position in hist of the first date to value, 0 to rebuild the index"""
+        if stored is None or stored.empty or metadata["inputs"] != inputs:
+            return 0
+        # Rows before the last one must have been valued with the same prices and
+        # rates (e.g. not with the current rate while offline)
+        prices_key = self._prices_key(portfolio, hist, len(stored), inputs)
+        if prices_key != metadata["prices_key"]:
+            logger.info("Prices or rates of a valuation index changed, rebuilding it")
+            return 0
+        start = len(stored) - 1
+
+        # Trades added or removed (e.g. back-dated) since the index was stored
+        old = Counter(tuple(event) for event in metadata["events"])
+        new = Counter(events)
+        changed = sorted((old - new) + (new - old))
+        if changed:
+            first_row = int(self._rows(hist.index, changed[:1])[0])
+            start = min(start, first_row)
+        return start
+
+    @staticmethod
+    def compute(
+        events: list,
+        ticker_list: list[str],
+        prices: pd.DataFrame,
+        held: np.ndarray | None = None,
+        cost: np.ndarray | None = None,
+    ) -> pd.DataFrame:
+        """
+        Valuation rows of a (field, ticker) price panel in the portfolio currency.
+
+        events are (date, ticker, volume) trades, each placed on the first price date
+        on or after its own, held and cost the volumes and cost basis per ticker
+        before the first date. Trades are valued at the close of their date and a
+        sale releases the average cost of the volume sold.
+        """
+        dates = prices.index
+        n_dates, n_tickers = len(dates), len(ticker_list)
+        ticker_index = {ticker: i for i, ticker in enumerate(ticker_list)}
+        held = np.zeros(n_tickers) if held is None else np.asarray(held, dtype=float)
+        cost = np.zeros(n_tickers) if cost is None else np.asarray(cost, dtype=float)
+
+        events = [event for event in events if event[1] in ticker_index]
+        rows = ValuationIndex._rows(dates, events)
+        cols = np.array([ticker_index[event[1]] for event in events], dtype=int)
+        volumes = np.array([event[2] for event in events], dtype=float)
+        in_range = rows < n_dates
+        rows, cols, volumes = rows[in_range], cols[in_range], volumes[in_range]
+
+        # Volume exchanged per date and ticker (NaN where nothing was exchanged)
+        exchanged = np.zeros((n_dates, n_tickers))
+        np.add.at(exchanged, (rows, cols), volumes)
+        has_event = np.zeros((n_dates, n_tickers), dtype=bool)
+        has_event[rows, cols] = True
+
+        # Volume held at each date is the running sum of the exchanges
+        volume_held = held + exchanged.cumsum(axis=0)
+
+        # Price panel as a (dates x fields x tickers) array, missing tickers count as 0
+        values = (
+            prices.reindex(columns=pd.MultiIndex.from_product([FIELDS, ticker_list]))
+            .to_numpy(dtype=float)
+            .reshape(n_dates, len(FIELDS), n_tickers)
+        )
+        available = np.array([("Open", t) in prices.columns for t in ticker_list])
+        values[:, :, ~available] = 0.0
+
+        # Portfolio OHLC value: volumes held times prices, summed over tickers
+        totals = np.einsum("dt,dft->df", volume_held, values)
+
+        # Cost basis changes, trade by trade in date order
+        close = np.nan_to_num(values[:, FIELDS.index("Close"), :])
+        cost_change = np.zeros((n_dates, n_tickers))
+        running_held, running_cost = held.copy(), cost.copy()
+        for row, col, volume in sorted(zip(rows, cols, volumes)):
+            if volume >= 0:
+                change = volume * close[row, col]
+            elif running_held[col] > 0:
+                change = running_cost[col] * max(volume / running_held[col], -1.0)
+            else:
+                change = 0.0
+            cost_change[row, col] += change
+            running_held[col] += volume
+            running_cost[col] += change
+        ticker_cost = cost + cost_change.cumsum(axis=0)
+
+        return pd.DataFrame(
+            np.hstack(
+                [
+                    volume_held,
+                    np.where(has_event, exchanged, np.nan),
+                    totals,
+                    ticker_cost,
+                    ticker_cost.sum(axis=1, keepdims=True),
+                ]
+            ),
+            columns=[f"Volume {t}" for t in ticker_list]
+            + [f"Var {t}" for t in ticker_list]
+            + FIELDS
+            + [f"Cost {t}" for t in ticker_list]
+            + ["Cost basis"],
+            index=dates,
+        )
+
+    @staticmethod
+    def events(portfolio: Portfolio, ticker_list: list[str]) -> list[tuple]:
+        """(date, ticker, volume) trades of ticker_list in the history, by date"""
+        tickers = set(ticker_list)
+        return sorted(
+            (
+                str(pd.Timestamp(event["date"]).date()),
+                event["ticker"],
+                float(event["volume"]),
+            )
+            for event in portfolio.history
+            if event["ticker"] in tickers
+        )
+
+    @staticmethod
+    def _rows(dates: pd.DatetimeIndex, events: list) -> np.ndarray:
+        """Position of the first date on or after each event's date"""
+        event_dates = pd.DatetimeIndex([event[0] for event in events])
+        if dates.tz is not None and event_dates.tz is None:
+            event_dates = event_dates.tz_localize(dates.tz)
+        return dates.searchsorted(event_dates)
+
+    def _prices_key(
+        self, portfolio: Portfolio, hist: pd.DataFrame, rows: int, inputs: dict
+    ) -> str:
+        """Hash of the prices of the first rows but the last one, and of their rates"""
+        service = self.valuation_service
+        head = hist.iloc[: max(rows - 1, 0)]
+        rates = service.rate_matrix(
+            portfolio, head.index, inputs["tickers"], tuple(inputs["currencies"])
+        )
+        return service.panel_key(head) + service.rates_key(rates)
+
+    def path(self, name: str) -> Path:
+        """File of the valuation index stored under name"""
+        # Keep file names portable, as the price cache does
+        safe_name = re.sub(r"[^A-Za-z0-9._-]", "_", name)
+        return self.directory / f"{safe_name}.parquet"
+
+    @staticmethod
+    def _read(path: Path) -> tuple:
+        """Stored index and its metadata, (None, None) if missing or unreadable"""
+        if not path.exists():
+            return None, None
+        try:
+            table = pq.read_table(path)
+            metadata = json.loads(table.schema.metadata[METADATA_KEY])
+            return table.to_pandas(), metadata
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable valuation index {path}: {e}")
+            return None, None
+
+    def _write(self, path: Path, index: pd.DataFrame, metadata: dict) -> None:
+        table = pa.Table.from_pandas(index)
+        table = table.replace_schema_metadata(
+            {**table.schema.metadata, METADATA_KEY: json.dumps(metadata).encode()}
+        )
+        with _WRITE_LOCK:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial file
+            tmp_path = path.with_suffix(".tmp")
+            pq.write_table(table, tmp_path)
+            tmp_path.replace(path)
@@ -0,0 +1,132 @@
+import hashlib
+import logging
+
+import numpy as np
+import pandas as pd
+from foliotrack.domain.Portfolio import Portfolio
+
+from src.config import FX_REFRESH_SECONDS, VALUATION_CACHE_MAX_BYTES
+from src.services.fx_service import FxService
+from src.services.memory_cache import MemoryCache
+
+logger = logging.getLogger(__name__)
+
+# Process-wide cache of converted price panels, shared by every Streamlit session
+VALUATION_CACHE = MemoryCache(
+    VALUATION_CACHE_MAX_BYTES, FX_REFRESH_SECONDS, name="valuation"
+)
+
+
+class ValuationService:
+    """Historical prices of a portfolio's securities in the portfolio currency"""
+
+    def __init__(
+        self, fx_service: FxService | None = None, cache: MemoryCache | None = None
+    ):
+        self.fx_service = FxService() if fx_service is None else fx_service
+        self.cache = VALUATION_CACHE if cache is None else cache
+
+    def to_portfolio_currency(
+        self, portfolio: Portfolio, hist_tickers: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Convert a (field, ticker) price panel to the portfolio currency.
+
+        Every price is multiplied by the rate of its security's currency on the same
+        date, in one pass over the (dates x fields x tickers) array. The converted
+        panel is cached, repeated renders of the same panel and rates cost a hash of
+        their values.
+        """
+        if hist_tickers.empty:
+            return hist_tickers
+        tickers = list(hist_tickers.columns.get_level_values(1).unique())
+        currencies = tuple(
+            portfolio.securities[t].currency.upper()
+            if t in portfolio.securities
+            else portfolio.currency.upper()
+            for t in tickers
+        )
+        # Rates are part of the key: panels converted with the current rate while
+        # offline are converted again once the rate history is available
+        rates = self.rate_matrix(portfolio, hist_tickers.index, tickers, currencies)
+        key = (
+            self.panel_key(hist_tickers),
+            self.rates_key(rates),
+            currencies,
+            portfolio.currency.upper(),
+        )
+        return self.cache.get_or_set(
+            key, lambda: self._convert(hist_tickers, tickers, rates)
+        )
+
+    @staticmethod
+    def _convert(
+        hist_tickers: pd.DataFrame, tickers: list, rates: np.ndarray
+    ) -> pd.DataFrame:
+        fields = list(hist_tickers.columns.get_level_values(0).unique())
+        columns = pd.MultiIndex.from_product(
+            [fields, tickers], names=hist_tickers.columns.names
+        )
+        prices = (
+            hist_tickers.reindex(columns=columns)
+            .to_numpy(dtype=float)
+            .reshape(len(hist_tickers), len(fields), len(tickers))
+        )
+        converted = prices * rates[:, None, :]
+        return pd.DataFrame(
+            converted.reshape(len(hist_tickers), -1),
+            index=hist_tickers.index,
+            columns=columns,
+        ).reindex(columns=hist_tickers.columns)
+
+    def rate_matrix(
+        self,
+        portfolio: Portfolio,
+        dates: pd.DatetimeIndex,
+        tickers: list,
+        currencies: tuple,
+    ) -> np.ndarray:
+        """(dates x tickers) rates to the portfolio currency, one series per currency"""
+        target = portfolio.currency.upper()
+        distinct, columns = np.unique(
+            np.array(currencies, dtype=object), return_inverse=True
+        )
+        per_currency = np.ones((len(dates), len(distinct)))
+        for j, currency in enumerate(distinct):
+            if currency == target:
+                continue
+            try:
+                series = self.fx_service.rate_series(currency, target, dates)
+                # Dates before the first published rate use the first one
+                per_currency[:, j] = series.bfill().to_numpy()
+            except ValueError as e:
+                # No rates at all (offline, never stored): use the current rate
+                rate = next(
+                    portfolio.securities[t].exchange_rate
+                    for t, c in zip(tickers, currencies)
+                    if c == currency
+                )
+                logger.warning(
+                    f"No {currency}->{target} rate history ({e}), using {rate}"
+                )
+                per_currency[:, j] = rate
+        return per_currency[:, columns]
+
+    @staticmethod
+    def rates_key(rates: np.ndarray) -> str:
+        """Hash of a (dates x tickers) rate matrix"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(rates.shape).encode())
+        digest.update(np.ascontiguousarray(rates, dtype=float).tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def panel_key(hist_tickers: pd.DataFrame) -> str:
+        """Hash of a price panel: columns, dates and values"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(list(hist_tickers.columns)).encode())
+        digest.update(hist_tickers.index.asi8.tobytes())
+        digest.update(
+            np.ascontiguousarray(hist_tickers.to_numpy(dtype=float)).tobytes()
+        )
+        return digest.hexdigest()
@@ -0,0 +1,40 @@
+import functools
+
+from foliotrack.domain.Portfolio import Portfolio
+
+# Attributes stored on the portfolio object itself, so a newly loaded portfolio
+# starts with a fresh version and an empty view cache
+_VERSION_ATTR = "_dashboard_version"
+_VIEW_CACHE_ATTR = "_dashboard_view_cache"
+
+
+def get_version(portfolio: Portfolio) -> int:
+    """Return the change counter of a portfolio"""
+    return portfolio.__dict__.get(_VERSION_ATTR, 0)
+
+
+def bump_version(portfolio: Portfolio) -> int:
+    """Mark a portfolio as changed (buy, sell, price update, optimization, ...)"""
+    version = get_version(portfolio) + 1
+    portfolio.__dict__[_VERSION_ATTR] = version
+    return version
+
+
+def versioned(func):
+    """Memoize a function of a portfolio against the portfolio version.
+
+    The cached result is returned as is and must not be modified by callers.
+    """
+
+    @functools.wraps(func)
+    def wrapper(portfolio: Portfolio):
+        cache = portfolio.__dict__.setdefault(_VIEW_CACHE_ATTR, {})
+        version = get_version(portfolio)
+        cached = cache.get(func.__qualname__)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        result = func(portfolio)
+        cache[func.__qualname__] = (version, result)
+        return result
+
+    return wrapper
@@ -0,0 +1,38 @@
+import streamlit as st
+
+from src.config import BACKTEST_POLL_SECONDS
+from src.services.job_runner import CANCELLED, FAILED, Job, JobRunner
+
+
+def render_job_status(runner: JobRunner, job_id: str, key: str) -> Job:
+    """
+    Show the progress of a background job and poll it until finished.
+
+    Returns the job once it completed successfully, None otherwise.
+    """
+    job = runner.get(job_id)
+    if job is None:
+        return None
+
+    if not job.finished:
+        # Polled from its own fragment, the rest of the page is not rerun
+        st.fragment(_render_progress, run_every=BACKTEST_POLL_SECONDS)(
+            runner, job.id, key
+        )
+    elif job.status == CANCELLED:
+        st.info("Job cancelled.")
+    elif job.status == FAILED:
+        st.error(f"Backtest computation failed: {job.error}")
+    else:
+        return job
+    return None
+
+
+def _render_progress(runner: JobRunner, job_id: str, key: str) -> None:
+    job = runner.get(job_id)
+    if job is None or job.finished:
+        # Stop polling, a single rerun shows the outcome
+        st.rerun()
+    st.progress(job.progress, text=job.message or "Waiting for a free worker...")
+    if st.button("✖ Cancel", key=f"cancel_{key}"):
+        runner.cancel(job.id)
@@ -4,6 +4,7 @@ import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 from foliotrack.domain.Portfolio import Portfolio
+from src.services.portfolio_snapshot import get_snapshot
 
 COLORS = px.colors.qualitative.Plotly
 
@@ -12,15 +13,16 @@ def plot_pie_chart(portfolio: Portfolio, ticker_list: list[str]):
     if not ticker_list:
         return
 
-    df = pd.DataFrame(columns=("target", "actual", "final"), index=ticker_list)
-
-    for security in portfolio.securities:
-        shares = portfolio._get_share(security)
-        df.loc[security] = [
-            shares.target,
-            shares.actual,
-            shares.final,
-        ]
+    snapshot = get_snapshot(portfolio)
+    rows = snapshot.rows(ticker_list)
+    df = pd.DataFrame(
+        {
+            "target": snapshot.target[rows],
+            "actual": snapshot.actual[rows],
+            "final": snapshot.final[rows],
+        },
+        index=ticker_list,
+    )
 
     # Create subplots: use 'domain' type for Pie subplot
     fig = make_subplots(
@@ -85,90 +87,14 @@ def plot_pie_chart(portfolio: Portfolio, ticker_list: list[str]):
     st.plotly_chart(fig)
 
 
-def _get_portfolio_history(
-    portfolio: Portfolio,
-    ticker_list: list[str],
-    hist_tickers: pd.DataFrame,
-    Date: pd.DatetimeIndex,
-) -> pd.DataFrame:
-    # Initialize dataframe to track portfolio composition over time
-    portfolio_comp = pd.DataFrame(
-        columns=[f"Volume {t}" for t in ticker_list]
-        + [f"Var {t}" for t in ticker_list]
-        + ["Open", "Low", "High", "Close"],
-        index=Date,
-    )
-
-    # Initialize volume tracker
-    count_volume = {ticker: 0 for ticker in ticker_list}
-
-    for event in portfolio.history:
-        ticker = event["ticker"]
-        volume = event["volume"]
-        date = event["date"]
-
-        # Ensure date is in index, otherwise we skip or need to handle it.
-        # Assuming date matches index frequency or is subset.
-        if date in portfolio_comp.index:
-            # Add or remove volume based on action
-            count_volume[ticker] += volume
-            portfolio_comp.loc[date, f"Volume {ticker}"] = count_volume[ticker]
-            portfolio_comp.loc[date, f"Var {ticker}"] = volume
-
-    # Verify that all volumes are filled
-    for ticker in ticker_list:
-        if not portfolio_comp.empty:
-            portfolio_comp.loc[portfolio_comp.index[-1], f"Volume {ticker}"] = (
-                count_volume[ticker]
-            )
-
-        # Fill volume between events
-        portfolio_comp[f"Volume {ticker}"] = portfolio_comp[f"Volume {ticker}"].ffill(
-            axis=0
-        )
-
-        # Fill volume remaining NaN with 0
-        portfolio_comp[f"Volume {ticker}"] = portfolio_comp[f"Volume {ticker}"].fillna(
-            0
-        )
-
-    # Compute total value
-    for i, date in enumerate(Date):
-        # Compute portfolio values
-        total_value = {"Open": 0, "Low": 0, "High": 0, "Close": 0}
-        for ticker in ticker_list:
-            vol = portfolio_comp.loc[date, f"Volume {ticker}"]
-            # Handle missing data if any
-            if ("Open", ticker) in hist_tickers.columns:
-                open_p = hist_tickers.loc[date, ("Open", ticker)]
-                low_p = hist_tickers.loc[date, ("Low", ticker)]
-                high_p = hist_tickers.loc[date, ("High", ticker)]
-                close_p = hist_tickers.loc[date, ("Close", ticker)]
-
-                total_value["Open"] += vol * open_p
-                total_value["Low"] += vol * low_p
-                total_value["High"] += vol * high_p
-                total_value["Close"] += vol * close_p
-
-        portfolio_comp.loc[date, "Open"] = total_value["Open"]
-        portfolio_comp.loc[date, "Low"] = total_value["Low"]
-        portfolio_comp.loc[date, "High"] = total_value["High"]
-        portfolio_comp.loc[date, "Close"] = total_value["Close"]
-
-    return portfolio_comp
-
-
 def plot_portfolio_evolution(
     portfolio: Portfolio,
     ticker_list: list[str],
-    hist_tickers: pd.DataFrame,
-    Date: pd.DatetimeIndex,
+    portfolio_comp: pd.DataFrame,
     min_y_exchange: float,
     max_y_exchange: float,
 ):
-    # Get portfolio composition over time
-    portfolio_comp = _get_portfolio_history(portfolio, ticker_list, hist_tickers, Date)
-
+    """Portfolio value candlesticks and traded volumes, from its valuation index"""
     # Create subplot with portfolio value evolution and stacked bar chart of bought/sold volumes
     fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.25)
 
@@ -184,6 +110,18 @@ def plot_portfolio_evolution(
         row=1,
         col=1,
     )
+    if "Cost basis" in portfolio_comp.columns:
+        fig.add_trace(
+            go.Scatter(
+                x=portfolio_comp.index,
+                y=portfolio_comp["Cost basis"],
+                name="Cost basis",
+                mode="lines",
+                line={"color": "gray", "dash": "dot"},
+            ),
+            row=1,
+            col=1,
+        )
 
     # Create stacked bar chart of bought and sold volumes over time
     for ticker in ticker_list:
@@ -221,3 +159,25 @@ def plot_portfolio_evolution(
 
     # Display stacked bar chart of security volumes over time
     st.plotly_chart(fig)
+
+
+def plot_what_if_frontier(scenarios: pd.DataFrame, symbol: str):
+    """Stacked amounts to invest per ticker along the investment amounts of a what-if"""
+    multiple = scenarios["Max Securities"].nunique() > 1
+    fig = px.area(
+        scenarios,
+        x="Investment Amount",
+        y="Amount to Invest",
+        color="Ticker",
+        facet_row="Max Securities" if multiple else None,
+        hover_data=["Volume to buy", "Final Share"],
+        color_discrete_sequence=COLORS,
+        markers=True,
+    )
+    fig.update_layout(
+        height=400 * scenarios["Max Securities"].nunique() if multiple else 500,
+        title_text="Purchase Frontier",
+        xaxis_title=f"New Investment Amount ({symbol})",
+        yaxis_title=f"Amount to Invest ({symbol})",
+    )
+    st.plotly_chart(fig, key="what_if_frontier")
@@ -1,42 +1,78 @@
+import math
 import streamlit as st
+from src.config import CATALOGUE_PAGE_SIZE, DEFAULT_PORTFOLIO_FILE
 from src.services.portfolio_service import PortfolioService
 
 portfolio_service = PortfolioService()
 
 
 def render_sidebar(key="portfolio_file_select") -> list:
-    """Sidebar for file operations. Returns list of files."""
+    """Sidebar for file operations. Returns the list of files of the current page."""
     with st.sidebar:
         st.header("Portfolio Files")
 
-        # File selection
-        portfolio_files = portfolio_service.get_portfolio_filenames()
-        # Add empty option
-        file_list = [""] + portfolio_files
-
-        selected_file = _selectbox_file(file_list, key)
+        # File selection, searched and paginated in the catalogue index
+        selected_file, file_list = _selectbox_file(key)
 
         col1, col2 = st.columns(2)
         with col1:
             if st.button("🔄 Refresh", key="refresh"):
+                portfolio_service.catalogue.refresh(force=True)
                 st.rerun()
 
         with col2:
             if st.button("📂 Load", key="load") and selected_file:
-                st.session_state.portfolio = portfolio_service.load_portfolio(
-                    selected_file
-                )
+                (
+                    st.session_state.portfolio,
+                    st.session_state.journal_skipped,
+                ) = portfolio_service.load_portfolio_journal(selected_file)
+                # Later trades and price updates are journaled to this file
+                st.session_state.portfolio_file = selected_file
+                st.session_state.pop("price_update_failures", None)
                 st.rerun()
 
+        # Report journaled changes that could not be replayed on the last load
+        skipped = st.session_state.get("journal_skipped")
+        if skipped:
+            st.warning(
+                "Some journaled changes could not be replayed:\n"
+                + "\n".join(f"- {message}" for message in skipped)
+            )
+
     return file_list
 
 
 @st.fragment
-def _selectbox_file(file_list, key) -> str:
-    return st.selectbox(
+def _selectbox_file(key) -> tuple[str, list]:
+    query = st.text_input(
+        "Search portfolios", key=f"{key}_search", placeholder="File or portfolio name"
+    )
+    _, total = portfolio_service.catalogue.search(query, limit=0)
+    pages = max(math.ceil(total / CATALOGUE_PAGE_SIZE), 1)
+    page = 1
+    if pages > 1:
+        # A narrower search may leave fewer pages than the one displayed
+        if st.session_state.get(f"{key}_page", 1) > pages:
+            st.session_state[f"{key}_page"] = pages
+        page = st.number_input(
+            f"Page (of {pages})", min_value=1, max_value=pages, key=f"{key}_page"
+        )
+    entries, _ = portfolio_service.catalogue.search(
+        query, offset=(page - 1) * CATALOGUE_PAGE_SIZE, limit=CATALOGUE_PAGE_SIZE
+    )
+    st.caption(f"{total} portfolio file(s)")
+
+    labels = {entry.filename: entry.label() for entry in entries}
+    # Add empty option
+    file_list = [""] + list(labels)
+    selected_file = st.selectbox(
         "Select Portfolio JSON",
         options=file_list,
         key=key,
-        index=1 if len(file_list) > 1 and "investment_example.json" in file_list else 0,
+        index=file_list.index(DEFAULT_PORTFOLIO_FILE)
+        if DEFAULT_PORTFOLIO_FILE in labels
+        else 0,
+        format_func=lambda filename: labels.get(filename, filename),
         accept_new_options=True,
     )
+    return selected_file, file_list
@@ -0,0 +1,138 @@
+import copy
+
+import pandas as pd
+import streamlit as st
+
+from src.services.backtest_service import (
+    BACKTEST_JOBS,
+    REBALANCE_ALGOS,
+    BacktestComparison,
+    BacktestServiceWrapper,
+    BacktestVariant,
+)
+from src.ui.components.job_status import render_job_status
+
+backtest_service = BacktestServiceWrapper()
+
+# Statistics shown first in the comparison table
+KEY_STATS = ["total_return", "cagr", "max_drawdown", "daily_sharpe", "daily_vol"]
+
+
+def _default_variants(portfolio, begin_date) -> pd.DataFrame:
+    """One row per variant, target weights of the portfolio as a starting point"""
+    targets = {
+        ticker: portfolio._get_share(ticker).target for ticker in portfolio.securities
+    }
+    rows = [
+        {"Name": f"{rebalance.capitalize()} rebalance", "Rebalance": rebalance}
+        for rebalance in ("monthly", "quarterly", "yearly")
+    ]
+    df = pd.DataFrame(rows)
+    df["Start Date"] = pd.Timestamp(begin_date)
+    for ticker, target in targets.items():
+        df[ticker] = target
+    return df
+
+
+def _variants_from_df(df: pd.DataFrame, tickers: list) -> list:
+    return [
+        BacktestVariant(
+            name=str(row["Name"]),
+            rebalance=row["Rebalance"],
+            weights={ticker: float(row[ticker]) for ticker in tickers},
+            start_date=None
+            if pd.isna(row["Start Date"])
+            else pd.Timestamp(row["Start Date"]).date(),
+        )
+        for _, row in df.dropna(subset=["Name", "Rebalance"]).iterrows()
+    ]
+
+
+@st.fragment
+def render_backtest_comparison_view(portfolio, market_service, begin_date, end_date):
+    """Renders the comparison of several strategy variants of the portfolio"""
+    tickers = list(portfolio.securities)
+    if not tickers:
+        st.info("Load a portfolio to compare strategies.")
+        return
+
+    st.caption(
+        "One row per strategy: rebalance frequency, start date and target weight "
+        "of each security (normalized)."
+    )
+    variants_df = st.data_editor(
+        _default_variants(portfolio, begin_date),
+        num_rows="dynamic",
+        width="stretch",
+        hide_index=True,
+        column_config={
+            "Name": st.column_config.TextColumn("Name", required=True),
+            "Rebalance": st.column_config.SelectboxColumn(
+                "Rebalance", options=list(REBALANCE_ALGOS), required=True
+            ),
+            "Start Date": st.column_config.DateColumn("Start Date"),
+            **{
+                ticker: st.column_config.NumberColumn(ticker, min_value=0.0)
+                for ticker in tickers
+            },
+        },
+        key="comparison_variants",
+    )
+
+    if st.button("🎬 Compare strategies", key="comparison_button", width="stretch"):
+        variants = _variants_from_df(variants_df, tickers)
+        st.session_state.comparison_job_id = BACKTEST_JOBS.submit(
+            backtest_service.run_comparison,
+            copy.deepcopy(portfolio),
+            market_service,
+            variants,
+            begin_date,
+            end_date,
+            key=backtest_service.comparison_key(
+                portfolio, variants, begin_date, end_date
+            ),
+        )
+
+    job = render_job_status(
+        BACKTEST_JOBS, st.session_state.get("comparison_job_id"), key="comparison"
+    )
+    if job is not None:
+        _render_comparison(job.result)
+
+
+def _render_comparison(comparison: BacktestComparison):
+    import plotly.express as px
+
+    st.subheader("📈 Strategy Evolution")
+    df_equity = comparison.equity.reset_index(names="Date").melt(
+        id_vars="Date", var_name="Strategy", value_name="Value"
+    )
+    fig_equity = px.line(
+        df_equity.dropna(),
+        x="Date",
+        y="Value",
+        color="Strategy",
+        title="Strategy Value Over Time",
+        template="plotly_dark",
+    )
+    st.plotly_chart(fig_equity, width="stretch")
+
+    st.subheader("📊 Statistics")
+    stats = comparison.stats
+    ordered = [name for name in KEY_STATS if name in stats.index]
+    stats = stats.loc[ordered + [name for name in stats.index if name not in ordered]]
+    st.dataframe(stats.T, width="stretch")
+
+    st.subheader("📉 Drawdown")
+    df_drawdown = comparison.analytics.drawdown.reset_index(names="Date").melt(
+        id_vars="Date", var_name="Strategy", value_name="Drawdown"
+    )
+    fig_drawdown = px.line(
+        df_drawdown.dropna(),
+        x="Date",
+        y="Drawdown",
+        color="Strategy",
+        title="Underwater Curves",
+        template="plotly_dark",
+    )
+    st.plotly_chart(fig_drawdown, width="stretch")
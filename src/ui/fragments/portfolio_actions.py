@@ -1,11 +1,10 @@
 import streamlit as st
-from foliotrack.services.MarketService import MarketService
-from foliotrack.storage.PortfolioRepository import PortfolioRepository
-from src.config import PORTFOLIOS_DIR
+from src.services.market_service import MarketService
+from src.services.portfolio_service import PortfolioService
 
 # Initialize services
 market_service = MarketService()
-repo = PortfolioRepository()
+portfolio_service = PortfolioService()
 
 
 @st.fragment
@@ -80,18 +79,28 @@ def _render_buy_box(ticker_options):
 
     if st.button("📥 Buy Security", key="buy_button", width="stretch"):
         try:
-            st.session_state.portfolio.buy_security(
+            portfolio_service.buy_security(
+                st.session_state.portfolio,
                 ticker=ticker_input_buy,
                 volume=volume_buy,
                 price=buy_price,
                 currency=currency,
+                filename=st.session_state.get("portfolio_file"),
             )
             st.success(
                 f"Bought {volume_buy} unit(s) of {ticker_input_buy} at {buy_price}"
             )
 
-            # Call update_prices to fetch name and price
-            market_service.update_prices(st.session_state.portfolio)
+            # Fetch name and price of the bought security only
+            market_service.update_security_prices(
+                st.session_state.portfolio, [ticker_input_buy]
+            )
+            if st.session_state.get("portfolio_file"):
+                portfolio_service.journal_prices(
+                    st.session_state.portfolio,
+                    st.session_state.portfolio_file,
+                    [ticker_input_buy],
+                )
 
             st.rerun()
         except Exception as e:
@@ -117,9 +126,11 @@ def _render_sell_box(ticker_options):
 
     if st.button("📤 Sell Security", key="sell_button", width="stretch"):
         try:
-            st.session_state.portfolio.sell_security(
+            portfolio_service.sell_security(
+                st.session_state.portfolio,
                 ticker=tickers,
                 volume=volumes,
+                filename=st.session_state.get("portfolio_file"),
             )
             st.success(f"Sold {volumes} unit(s) of {tickers}")
             st.rerun()  # Global rerun to update table
@@ -136,11 +147,36 @@ def _render_save_box(file_list):
         accept_new_options=True,
     )
 
-    if st.button("💾 Save Portfolio", key="save_button", width="stretch"):
+    # Only one catalogue page is listed, a name typed in may be an existing file
+    overwrite = True
+    if (
+        save_filename
+        and save_filename not in file_list
+        and save_filename != st.session_state.get("portfolio_file")
+        and portfolio_service.catalogue.exists(save_filename)
+    ):
+        st.warning(f"{save_filename} already exists.")
+        overwrite = st.checkbox("Overwrite it", key="save_overwrite")
+
+    if st.button(
+        "💾 Save Portfolio", key="save_button", width="stretch", disabled=not overwrite
+    ):
         try:
-            repo.save_to_json(
-                st.session_state.portfolio, PORTFOLIOS_DIR / save_filename
+            filepath = portfolio_service.save_portfolio(
+                st.session_state.portfolio, save_filename
             )
-            st.success(f"Portfolio saved to {PORTFOLIOS_DIR / save_filename}")
+            st.session_state.portfolio_file = save_filename
+            st.success(f"Portfolio saved to {filepath}")
         except Exception as e:
             st.error(str(e))
+
+    # JSON export, also of portfolios saved as binary snapshots (.arrow)
+    portfolio = st.session_state.portfolio
+    st.download_button(
+        "⬇️ Export JSON",
+        data=lambda: portfolio_service.export_json(portfolio),
+        file_name=f"{portfolio.name}.json",
+        mime="application/json",
+        key="export_json_button",
+        width="stretch",
+    )
@@ -1,9 +1,11 @@
 import streamlit as st
 from src.services.data_service import DataService
-from foliotrack.services.MarketService import MarketService
+from src.services.market_service import MarketService
+from src.services.portfolio_service import PortfolioService
 
 # Initialize services
 market_service = MarketService()
+portfolio_service = PortfolioService()
 
 LOAD_DATA_CONFIG = {
     "Name": st.column_config.TextColumn("Name", width="large"),
@@ -44,8 +46,24 @@ def render_portfolio_table():
     ):
         try:
             with st.spinner("Updating prices..."):
-                market_service.update_prices(st.session_state.portfolio)
+                st.session_state.price_update_failures = market_service.update_prices(
+                    st.session_state.portfolio
+                )
+            if st.session_state.get("portfolio_file"):
+                portfolio_service.journal_prices(
+                    st.session_state.portfolio,
+                    st.session_state.portfolio_file,
+                    list(st.session_state.portfolio.securities),
+                )
             st.success("Security prices updated!")
             st.rerun(scope="fragment")
         except Exception as e:
             st.error(f"Error updating prices: {str(e)}")
+
+    # Report securities that could not be updated by the last price update
+    failures = st.session_state.get("price_update_failures")
+    if failures:
+        st.warning(
+            "Some securities could not be updated:\n"
+            + "\n".join(f"- {ticker}: {error}" for ticker, error in failures.items())
+        )
@@ -0,0 +1,85 @@
+import copy
+
+import streamlit as st
+
+from src.services.backtest_service import (
+    BACKTEST_JOBS,
+    BacktestServiceWrapper,
+    WalkForwardRun,
+)
+from src.ui.components.job_status import render_job_status
+
+backtest_service = BacktestServiceWrapper()
+
+# Statistics of the windows and their display format
+WINDOW_STATS = {"CAGR": ".2%", "Max Drawdown": ".2%", "Sharpe": ".2f"}
+
+
+@st.fragment
+def render_walk_forward_view(portfolio, market_service, begin_date, end_date):
+    """Renders the distribution of backtest statistics over rolling windows"""
+    window_years = st.number_input(
+        "Window length (years)",
+        value=5,
+        min_value=1,
+        max_value=50,
+        key="walk_forward_years",
+    )
+
+    if st.button("🎬 Run walk-forward", key="walk_forward_button", width="stretch"):
+        st.session_state.walk_forward_job_id = BACKTEST_JOBS.submit(
+            backtest_service.run_walk_forward,
+            copy.deepcopy(portfolio),
+            market_service,
+            begin_date,
+            end_date,
+            window_years=int(window_years),
+            key=backtest_service.backtest_key(portfolio, begin_date, end_date)
+            + ("walk_forward", int(window_years)),
+        )
+
+    job = render_job_status(
+        BACKTEST_JOBS, st.session_state.get("walk_forward_job_id"), key="walk_forward"
+    )
+    if job is not None:
+        _render_walk_forward(job.result)
+
+
+def _render_walk_forward(walk_forward: WalkForwardRun):
+    import plotly.express as px
+
+    windows = walk_forward.windows
+    st.write(
+        f"{len(windows)} windows of {walk_forward.window_years} years, "
+        f"from {windows['Start'].min():%Y-%m-%d} to {windows['End'].max():%Y-%m-%d}"
+    )
+
+    # Distribution summary of each statistic
+    summary = windows[list(WINDOW_STATS)].describe(percentiles=[0.05, 0.5, 0.95])
+    st.dataframe(
+        summary.T[["min", "5%", "50%", "95%", "max", "mean"]],
+        width="stretch",
+    )
+
+    cols = st.columns(len(WINDOW_STATS))
+    for col, (stat, fmt) in zip(cols, WINDOW_STATS.items()):
+        with col:
+            fig = px.histogram(
+                windows,
+                x=stat,
+                nbins=30,
+                title=f"{stat} Distribution",
+                template="plotly_dark",
+            )
+            fig.update_xaxes(tickformat=fmt)
+            st.plotly_chart(fig, width="stretch", key=f"walk_forward_{stat}")
+
+    fig_cagr = px.line(
+        windows,
+        x="Start",
+        y="CAGR",
+        title="CAGR by Window Start",
+        template="plotly_dark",
+    )
+    fig_cagr.update_yaxes(tickformat=".0%")
+    st.plotly_chart(fig_cagr, width="stretch", key="walk_forward_cagr")
@@ -0,0 +1,75 @@
+import numpy as np
+import streamlit as st
+
+from src.services.optimization_service import OptimizationService
+
+# Initialize services
+optimizer = OptimizationService()
+
+# Upper bound on the number of scenarios solved per click
+MAX_SCENARIOS = 500
+
+
+@st.fragment
+def render_what_if_view(min_percent, max_diff_sec, selling):
+    """Renders the what-if optimization over a range of investment amounts"""
+
+    with st.expander("🔮 What-if: Investment Amounts"):
+        col_from, col_to, col_step = st.columns(3)
+        with col_from:
+            amount_from = st.number_input(
+                "From (€)", key="what_if_from", value=100.0, min_value=0.0
+            )
+        with col_to:
+            amount_to = st.number_input(
+                "To (€)", key="what_if_to", value=2000.0, min_value=0.0
+            )
+        with col_step:
+            amount_step = st.number_input(
+                "Step (€)", key="what_if_step", value=100.0, min_value=1.0
+            )
+
+        n_securities = len(st.session_state.portfolio.securities)
+        max_securities = st.multiselect(
+            "Maximum number of different securities",
+            options=list(range(1, max(n_securities, int(max_diff_sec)) + 1)),
+            default=[int(max_diff_sec)] if max_diff_sec > 0 else None,
+            key="what_if_max_sec",
+        )
+
+        amounts = np.arange(amount_from, amount_to + amount_step / 2, amount_step)
+        n_scenarios = len(amounts) * len(max_securities)
+        st.write(f"{n_scenarios} scenarios")
+
+        if st.button("🔮 Run what-if", key="what_if_button", width="stretch"):
+            if n_securities == 0:
+                st.error("Portfolio is empty.")
+            elif n_scenarios == 0:
+                st.error("Select at least one investment amount and security count.")
+            elif n_scenarios > MAX_SCENARIOS:
+                st.error(f"Too many scenarios, at most {MAX_SCENARIOS} are allowed.")
+            else:
+                with st.spinner(f"Solving {n_scenarios} scenarios..."):
+                    st.session_state.what_if_df = optimizer.solve_scenarios(
+                        st.session_state.portfolio,
+                        amounts,
+                        min_percent_to_invest=float(min_percent),
+                        max_different_securities=max_securities,
+                        selling=bool(selling),
+                    )
+
+        if "what_if_df" in st.session_state:
+            # plotly.express is only imported once there is something to plot
+            from src.ui.components.plots import plot_what_if_frontier
+
+            scenarios = st.session_state.what_if_df
+            plot_what_if_frontier(scenarios, st.session_state.portfolio.symbol)
+            failed = scenarios.loc[
+                scenarios["Volume to buy"].isna(), "Investment Amount"
+            ].unique()
+            if len(failed):
+                st.warning(
+                    "No solution for: "
+                    + ", ".join(f"{amount:.2f}" for amount in failed)
+                )
+            st.dataframe(scenarios, width="stretch", hide_index=True)
@@ -23,6 +23,7 @@ def original_dir():
     "filename",
     [
         "pages/compare_securities.py",
+        "pages/contract_sweep.py",
         "pages/load_portfolio.py",
         "pages/equilibrium_buy.py",
     ],
@@ -0,0 +1,197 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from foliotrack.domain.Portfolio import Portfolio
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.backtest_service import (
+    BacktestServiceWrapper,
+    BacktestVariant,
+)
+from src.services.job_runner import JobCancelled
+from src.services.market_service import MarketService
+from src.services.memory_cache import MemoryCache
+from src.services.portfolio_service import PortfolioService
+from src.services.price_cache import PriceCache
+from src.services.price_store import PriceStore
+
+
+@pytest.fixture
+def market_service(tmp_path, monkeypatch):
+    service = MarketService(
+        price_cache=PriceCache(tmp_path, refresh_seconds=3600),
+        history_cache=MemoryCache(max_bytes=10**7, ttl_seconds=3600),
+        price_store=PriceStore(tmp_path / "panels"),
+    )
+    calls = []
+    dates = pd.bdate_range("2023-01-02", "2024-12-31", name="Date")
+
+    def fake_download(tickers, interval, start=None):
+        calls.append(tuple(tickers))
+        columns = pd.MultiIndex.from_product(
+            [["Close", "High", "Low", "Open"], tickers], names=["Price", "Ticker"]
+        )
+        # Independent price path per ticker, the same on every download
+        paths = [
+            100.0
+            * np.cumprod(
+                1.0
+                + np.random.default_rng(sum(map(ord, ticker))).normal(
+                    0.0003, 0.015, len(dates)
+                )
+            )
+            for ticker in tickers
+        ]
+        return pd.DataFrame(
+            np.tile(np.column_stack(paths), 4), index=dates, columns=columns
+        )
+
+    monkeypatch.setattr(service, "_download_history", fake_download)
+    service.calls = calls
+    return service
+
+
+@pytest.fixture
+def portfolio():
+    portfolio = Portfolio()
+    service = PortfolioService()
+    for ticker, target in (("AAA", 0.6), ("BBB", 0.4)):
+        service.buy_security(portfolio, ticker, 1.0, 100.0, "EUR")
+        portfolio._get_share(ticker).target = target
+    return portfolio
+
+
+def test_backtest_exposes_price_panel(market_service, portfolio):
+    """The backtest loads prices once, bounded to its window, and returns them"""
+    run = BacktestServiceWrapper().run_backtest(
+        portfolio, market_service, "2023-06-01", "2024-05-31"
+    )
+
+    assert market_service.calls == [("AAA", "BBB")]
+    assert list(run.prices.columns) == ["AAA", "BBB"]
+    assert run.prices.index[0] >= pd.Timestamp("2023-06-01")
+    assert run.prices.index[-1] <= pd.Timestamp("2024-05-31")
+    assert not run.prices.isna().any().any()
+    assert run.result.prices.index[-1] == run.prices.index[-1]
+
+
+def test_backtest_reports_progress_within_the_run(market_service, portfolio):
+    """A cancelled job stops within the backtest loop, not after it"""
+    reports = []
+
+    def progress(fraction, message=""):
+        reports.append(fraction)
+        if 0.5 < fraction < 1.0:
+            raise JobCancelled()
+
+    with pytest.raises(JobCancelled):
+        BacktestServiceWrapper().run_backtest(
+            portfolio, market_service, "2023-06-01", "2024-05-31", progress=progress
+        )
+    assert reports[:2] == [0.0, 0.3]
+    assert 0.5 < reports[-1] < 0.6
+
+
+def test_comparison_on_process_pool(market_service, portfolio):
+    """Variants run on a process pool over one shared price panel"""
+    variants = [
+        BacktestVariant("Monthly"),
+        BacktestVariant("Yearly 50/50", "yearly", weights={"AAA": 1, "BBB": 1}),
+        BacktestVariant("Late start", "quarterly", start_date="2024-01-01"),
+    ]
+    service = BacktestServiceWrapper()
+    comparison = service.run_comparison(
+        portfolio, market_service, variants, "2023-06-01", "2024-05-31", max_workers=2
+    )
+
+    assert market_service.calls == [("AAA", "BBB")]
+    assert list(comparison.equity.columns) == [v.name for v in variants]
+    assert list(comparison.stats.columns) == [v.name for v in variants]
+    late = comparison.equity["Late start"].first_valid_index()
+    # bt starts each curve the day before its first price
+    assert late >= pd.Timestamp("2023-12-31")
+
+    # Same equity curve as the single backtest of the portfolio
+    single = service.run_backtest(portfolio, market_service, "2023-06-01", "2024-05-31")
+    np.testing.assert_allclose(
+        comparison.equity["Monthly"].dropna().to_numpy(),
+        single.result.prices.iloc[:, 0].to_numpy(),
+    )
+
+    with pytest.raises(ValueError):
+        service.run_comparison(
+            portfolio, market_service, variants[:1] * 2, "2023-06-01", "2024-05-31"
+        )
+
+
+def test_comparison_default_start_with_earlier_variant(market_service, portfolio):
+    """Variants without a start date start at the comparison one, not the panel one"""
+    variants = [
+        BacktestVariant("Default"),
+        BacktestVariant("Early", start_date="2023-03-01"),
+    ]
+    service = BacktestServiceWrapper()
+    comparison = service.run_comparison(
+        portfolio, market_service, variants, "2024-01-01", "2024-12-31", max_workers=2
+    )
+
+    default = comparison.equity["Default"].dropna()
+    early = comparison.equity["Early"].dropna()
+    # bt starts each curve the day before its first price
+    assert default.index[0] == pd.Timestamp("2023-12-31")
+    assert early.index[0] == pd.Timestamp("2023-02-28")
+
+    # Same curve as the backtest of the comparison window alone
+    single = service.run_backtest(portfolio, market_service, "2024-01-01", "2024-12-31")
+    np.testing.assert_allclose(
+        default.to_numpy(), single.result.prices.iloc[:, 0].to_numpy()
+    )
+    # Different price paths: starting earlier changes the value reached
+    assert early.iloc[-1] / early.loc[default.index[1]] != pytest.approx(
+        default.iloc[-1] / default.iloc[1]
+    )
+
+
+def test_walk_forward_matches_window_backtests(market_service, portfolio):
+    """Windows read from one backtest match backtests run on each window"""
+    service = BacktestServiceWrapper()
+    walk_forward = service.run_walk_forward(
+        portfolio, market_service, "2023-01-01", "2024-12-31", window_years=1
+    )
+    windows = walk_forward.windows
+    assert len(windows) == 12
+    assert market_service.calls == [("AAA", "BBB")]
+
+    for position in (0, 5, 11):
+        window = windows.iloc[position]
+        single = service.run_backtest(
+            portfolio,
+            market_service,
+            window["Start"].date(),
+            window["End"].date(),
+        )
+        stats = single.result.stats.iloc[:, 0]
+        # bt counts years from the day before the first price, compare total returns
+        years = (window["End"] - window["Start"]).days / 365.25
+        total_return = (1 + window["CAGR"]) ** years - 1
+        assert total_return == pytest.approx(stats["total_return"], rel=1e-3)
+        assert window["Max Drawdown"] == pytest.approx(stats["max_drawdown"], rel=1e-3)
+
+    # Tickers follow independent paths: rebalancing changes the window returns
+    buy_and_hold = service.run_comparison(
+        portfolio,
+        market_service,
+        [BacktestVariant("Once", "once")],
+        window["Start"].date(),
+        window["End"].date(),
+        max_workers=1,
+    )
+    held = buy_and_hold.equity["Once"].dropna()
+    assert held.iloc[-1] / held.iloc[0] - 1 != pytest.approx(
+        stats["total_return"], rel=1e-3
+    )
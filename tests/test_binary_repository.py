@@ -0,0 +1,76 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from foliotrack.storage.PortfolioRepository import PortfolioRepository
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.binary_repository import BinaryPortfolioRepository
+from src.services.portfolio_catalogue import PortfolioCatalogue
+from src.services.portfolio_service import PortfolioService
+
+EXAMPLE = Path(__file__).parent.parent / "Portfolios" / "investment_example.json"
+
+
+@pytest.fixture
+def portfolio():
+    portfolio = PortfolioRepository().load_from_json(str(EXAMPLE))
+    portfolio._get_share("NVDA").final = 0.25
+    # Thousands of transactions
+    tickers = list(portfolio.securities)
+    portfolio.history += [
+        {
+            "ticker": tickers[i % len(tickers)],
+            "volume": float(i % 7 - 3),
+            "date": f"20{10 + i % 15}-0{1 + i % 9}-1{i % 10}",
+        }
+        for i in range(5000)
+    ]
+    return portfolio
+
+
+def test_snapshot_round_trip(tmp_path, portfolio):
+    """A snapshot loads as the same portfolio as its JSON file"""
+    repo = PortfolioRepository()
+    binary_repo = BinaryPortfolioRepository()
+    binary_repo.save(portfolio, tmp_path / "client.arrow")
+    repo.save_to_json(portfolio, str(tmp_path / "client.json"))
+
+    start = time.perf_counter()
+    loaded = binary_repo.load(tmp_path / "client.arrow")
+    elapsed = time.perf_counter() - start
+
+    assert repo._to_dict(loaded) == repo._to_dict(
+        repo.load_from_json(str(tmp_path / "client.json"))
+    )
+    assert loaded.history == portfolio.history
+    assert loaded.shares["NVDA"].final == 0.25
+    assert elapsed < 1.0
+    assert (tmp_path / "client.arrow").stat().st_size < (
+        tmp_path / "client.json"
+    ).stat().st_size
+    assert BinaryPortfolioRepository.read_header(tmp_path / "client.arrow") == {
+        "name": portfolio.name,
+        "currency": "EUR",
+        "securities": 3,
+    }
+
+
+def test_service_formats_by_suffix(tmp_path, portfolio, monkeypatch):
+    monkeypatch.setattr("src.services.portfolio_service.PORTFOLIOS_DIR", tmp_path)
+    service = PortfolioService(catalogue=PortfolioCatalogue(tmp_path))
+
+    service.save_portfolio(portfolio, "client.arrow")
+    service.save_portfolio(portfolio, "client.json")
+
+    assert (tmp_path / "client.arrow").read_bytes()[:6] == b"ARROW1"
+    assert service.get_portfolio_filenames() == ["client.arrow", "client.json"]
+    assert service.catalogue.get("client.arrow").securities == 3
+    loaded = service.load_portfolio("client.arrow")
+    assert json.loads(service.export_json(loaded)) == json.loads(
+        (tmp_path / "client.json").read_text()
+    )
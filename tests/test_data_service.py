@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+
+import pytest
+from foliotrack.domain.Portfolio import Portfolio
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.data_service import DataService
+from src.services.portfolio_service import PortfolioService
+from src.services.portfolio_snapshot import get_snapshot
+from src.services.versioning import get_version
+
+
+def test_views_memoized_per_version():
+    """Views are only rebuilt after the portfolio changed"""
+    portfolio = Portfolio()
+    service = PortfolioService()
+    service.buy_security(portfolio, "AIR.PA", 2.0, 100.0, "EUR")
+
+    df = DataService.portfolio_to_df(portfolio)
+    assert DataService.portfolio_to_df(portfolio) is df
+    assert DataService.equilibrium_to_df(portfolio) is not df
+
+    service.buy_security(portfolio, "MC.PA", 1.0, 500.0, "EUR")
+    assert get_version(portfolio) == 2
+    updated = DataService.portfolio_to_df(portfolio)
+    assert updated is not df
+    assert updated["Ticker"].tolist() == ["AIR.PA", "MC.PA"]
+
+    service.sell_security(portfolio, "AIR.PA", 2.0)
+    assert DataService.portfolio_to_df(portfolio)["Ticker"].tolist() == ["MC.PA"]
+
+    # A freshly loaded portfolio does not reuse another portfolio's views
+    assert DataService.portfolio_to_df(Portfolio())["Ticker"].tolist() == [""]
+
+
+def test_snapshot_columns():
+    """Snapshot holds read-only columns in portfolio order, built once per version"""
+    portfolio = Portfolio()
+    service = PortfolioService()
+    service.buy_security(portfolio, "AIR.PA", 2.0, 100.0, "EUR")
+    service.buy_security(portfolio, "MC.PA", 1.0, 600.0, "EUR")
+
+    snapshot = get_snapshot(portfolio)
+    assert get_snapshot(portfolio) is snapshot
+    assert list(snapshot.tickers) == ["AIR.PA", "MC.PA"]
+    assert snapshot.value.tolist() == [200.0, 600.0]
+    assert snapshot.actual.tolist() == [0.25, 0.75]
+    assert snapshot.rows(["MC.PA", "AIR.PA"]).tolist() == [1, 0]
+    with pytest.raises(ValueError):
+        snapshot.volume[0] = 0.0
+
+    service.sell_security(portfolio, "MC.PA", 1.0)
+    assert list(get_snapshot(portfolio).tickers) == ["AIR.PA"]
@@ -76,3 +76,29 @@ def test_optimize_portfolio(page_file, original_dir):
     ), (
         f"Mismatch in 'Volume to buy' column. Got: {at.dataframe[0].value['Volume to buy'].tolist()}"
     )
+
+
+def test_what_if(page_file, original_dir):
+    """Run a what-if over three investment amounts"""
+    at = AppTest.from_file("app.py").run()
+
+    # Load a portfolio first
+    at.switch_page("pages/load_portfolio.py")
+    at.run()
+    at.selectbox(key="portfolio_file_select").set_value("investment_example.json").run()
+    at.button(key="load").click().run()
+
+    at.switch_page(page_file)
+    at.run()
+    at.number_input(key="what_if_from").set_value(500.0).run()
+    at.number_input(key="what_if_to").set_value(1500.0).run()
+    at.number_input(key="what_if_step").set_value(500.0).run()
+    at.button(key="what_if_button").click().run(timeout=60)
+
+    assert not at.exception
+    scenarios = at.session_state["what_if_df"]
+    assert scenarios["Investment Amount"].unique().tolist() == [500.0, 1000.0, 1500.0]
+    # The session portfolio is left untouched
+    assert all(
+        s.volume_to_buy == 0 for s in at.session_state.portfolio.securities.values()
+    )
@@ -0,0 +1,99 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.fx_service import FxService
+from src.services.memory_cache import MemoryCache
+from src.services.price_cache import PriceCache
+
+# Units per euro on business days, published by the ECB
+REMOTE = {
+    "USD": pd.Series(
+        [1.10, 1.12, 1.08],
+        index=pd.to_datetime(["2024-01-04", "2024-01-05", "2024-01-08"]),
+    ),
+    "JPY": pd.Series(
+        [160.0, 161.0, 158.0],
+        index=pd.to_datetime(["2024-01-04", "2024-01-05", "2024-01-08"]),
+    ),
+}
+
+
+def _fx_service(store_dir, refresh_seconds=3600):
+    return FxService(
+        store=PriceCache(store_dir, refresh_seconds=refresh_seconds),
+        cache=MemoryCache(max_bytes=10**6, ttl_seconds=0),
+    )
+
+
+@pytest.fixture
+def fx_service(tmp_path, monkeypatch):
+    service = _fx_service(tmp_path)
+    calls = []
+
+    def fake_download(currency, start):
+        calls.append((currency, str(start)))
+        rates = REMOTE[currency].loc[str(start) :]
+        return pd.DataFrame({"Rate": rates.to_numpy()}, index=rates.index)
+
+    monkeypatch.setattr(service, "_download_rates", fake_download)
+    service.calls = calls
+    return service
+
+
+def test_rate_crosses_through_euro(fx_service):
+    assert fx_service.rate("EUR", "USD", "2024-01-05") == pytest.approx(1.12)
+    assert fx_service.rate("usd", "eur", "2024-01-05") == pytest.approx(1 / 1.12)
+    assert fx_service.rate("USD", "JPY", "2024-01-05") == pytest.approx(161.0 / 1.12)
+    assert fx_service.rate("USD", "USD") == 1.0
+    # Weekend: last published rate, latest by default
+    assert fx_service.rate("EUR", "USD", "2024-01-07") == pytest.approx(1.12)
+    assert fx_service.rate("EUR", "USD") == pytest.approx(1.08)
+    with pytest.raises(ValueError):
+        fx_service.rate("EUR", "USD", "2024-01-01")
+
+
+def test_rates_loaded_once_per_currency(fx_service):
+    """A currency is downloaded in bulk once, then served from memory and disk"""
+    fx_service.cache = MemoryCache(max_bytes=10**6, ttl_seconds=60)
+    dates = pd.date_range("2024-01-03", "2024-01-09", tz="Europe/Paris")
+    series = fx_service.rate_series("USD", "EUR", dates)
+    fx_service.rate("EUR", "USD", "2024-01-05")
+    fx_service.rate("JPY", "USD", "2024-01-08")
+
+    assert [currency for currency, _ in fx_service.calls] == ["USD", "JPY"]
+    assert series.isna().tolist() == [True] + [False] * 6
+    assert series.iloc[-1] == pytest.approx(1 / 1.08)
+
+    # A new service reads the stored series without downloading
+    offline = _fx_service(fx_service.store.cache_dir)
+    offline._download_rates = None
+    assert offline.rate("USD", "JPY", "2024-01-08") == pytest.approx(158.0 / 1.08)
+
+
+def test_stale_store_fetches_only_the_tail(fx_service, monkeypatch):
+    fx_service.rate("EUR", "USD")
+    fx_service.store.refresh_seconds = 0
+    usd = REMOTE["USD"]
+    monkeypatch.setitem(
+        REMOTE,
+        "USD",
+        pd.concat([usd, pd.Series([1.09], [pd.Timestamp("2024-01-09")])]),
+    )
+
+    assert fx_service.rate("EUR", "USD") == pytest.approx(1.09)
+    assert fx_service.calls == [("USD", "1999-01-04"), ("USD", "2024-01-08 00:00:00")]
+    history = fx_service.history("EUR", "USD")
+    assert len(history) == 4
+
+    # Offline: the stored rates are still served
+    def offline(currency, start):
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(fx_service, "_download_rates", offline)
+    assert fx_service.rate("EUR", "USD", "2024-01-05") == pytest.approx(1.12)
@@ -0,0 +1,139 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+from streamlit.testing.v1.app_test import AppTest
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.job_runner import (
+    CANCELLED,
+    DONE,
+    FAILED,
+    JobRunner,
+)
+
+
+def _wait(runner, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not runner.get(job_id).finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return runner.get(job_id)
+
+
+def test_job_result_and_progress():
+    """Results are stored by job id and same-key jobs are not recomputed"""
+    runner = JobRunner(max_workers=2, max_finished=8)
+    calls = []
+
+    def work(x, progress):
+        calls.append(x)
+        progress(0.5, "Halfway")
+        return x * 2
+
+    job_id = runner.submit(work, 21, key="a")
+    job = _wait(runner, job_id)
+    assert job.status == DONE
+    assert job.result == 42
+    assert job.progress == 1.0
+    assert job.message == "Halfway"
+
+    # Submitting the same key again returns the finished job
+    assert runner.submit(work, 21, key="a") == job_id
+    assert calls == [21]
+
+
+def test_expired_result_is_recomputed(monkeypatch):
+    """A finished job older than max_age is not reused, e.g. once new bars are out"""
+    runner = JobRunner(max_workers=1, max_finished=8, max_age=60)
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+
+    job = _wait(runner, runner.submit(lambda progress: 1, key="a"))
+    now[0] += 30
+    assert runner.submit(lambda progress: 2, key="a") == job.id
+
+    now[0] += 31
+    new_id = runner.submit(lambda progress: 2, key="a")
+    assert new_id != job.id
+    assert _wait(runner, new_id).result == 2
+
+
+def test_failed_job_is_resubmitted():
+    runner = JobRunner(max_workers=1, max_finished=8)
+
+    def fail(progress):
+        raise RuntimeError("no data")
+
+    job = _wait(runner, runner.submit(fail, key="b"))
+    assert job.status == FAILED
+    assert job.error == "no data"
+    assert runner.submit(fail, key="b") != job.id
+
+
+def test_cancel_queued_and_running_jobs():
+    runner = JobRunner(max_workers=1, max_finished=8)
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking(progress):
+        started.set()
+        release.wait(5.0)
+        progress(0.5, "After wait")
+        return "not cancelled"
+
+    running_id = runner.submit(blocking)
+    queued_id = runner.submit(blocking)
+    started.wait(5.0)
+
+    # The queued job never starts, the running one stops at its next report
+    assert runner.cancel(queued_id)
+    assert runner.cancel(running_id)
+    release.set()
+    assert _wait(runner, running_id).status == CANCELLED
+    assert _wait(runner, queued_id).status == CANCELLED
+
+
+def test_finished_history_is_bounded():
+    runner = JobRunner(max_workers=1, max_finished=2)
+    ids = [runner.submit(lambda i, progress: i, i) for i in range(4)]
+    # A single worker runs jobs in order, earlier ones may already be dropped
+    _wait(runner, ids[-1])
+    runner.submit(lambda progress: None)
+    assert runner.get(ids[0]) is None
+    assert runner.get(ids[-1]).result == 3
+
+
+def _job_status_page(runner, job_id):
+    import streamlit as st
+
+    from src.ui.components.job_status import render_job_status
+
+    st.session_state.runs = st.session_state.get("runs", 0) + 1
+    render_job_status(runner, job_id, key="job")
+
+
+def test_running_job_is_polled_without_rerunning_the_page(monkeypatch):
+    # The script run replaces __main__, which spawned pools of later tests import
+    monkeypatch.setitem(sys.modules, "__main__", sys.modules["__main__"])
+    runner = JobRunner(max_workers=1, max_finished=8)
+    release = threading.Event()
+
+    def blocking(progress):
+        progress(0.4, "Working")
+        release.wait(5.0)
+
+    job_id = runner.submit(blocking)
+    try:
+        start = time.monotonic()
+        at = AppTest.from_function(_job_status_page, args=(runner, job_id)).run()
+        assert time.monotonic() - start < 2.0
+        assert not at.exception
+        # A single run of the page, the progress fragment polls on its own
+        assert at.session_state.runs == 1
+        assert at.button(key="cancel_job")
+    finally:
+        release.set()
+    assert _wait(runner, job_id).status == DONE
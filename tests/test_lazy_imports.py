@@ -0,0 +1,52 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Import time of the landing page modules on top of streamlit and foliotrack, which
+# every page loads anyway (foliotrack's __init__ imports cvxpy, bt and yfinance)
+LANDING_IMPORT_BUDGET_SECONDS = 0.25
+
+LANDING_PAGE = """
+import sys
+import foliotrack
+import streamlit
+import src.ui.components.sidebar
+import src.ui.fragments.portfolio_table
+import src.ui.fragments.portfolio_actions
+
+print("plotly.express" in sys.modules)
+"""
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    # Fresh interpreter, the test process has already imported everything
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=120,
+        check=True,
+    )
+
+
+def _import_seconds(importtime: str, prefix: str) -> float:
+    """Cumulative import time of the top-level modules named prefix*"""
+    total_us = 0
+    for line in importtime.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented and already counted by their parent
+        if name.startswith(f" {prefix}"):
+            total_us += int(cumulative)
+    return total_us / 1e6
+
+
+def test_landing_page_import_time():
+    """Landing page modules defer plotly.express and stay within their import budget"""
+    result = _run(LANDING_PAGE)
+    assert result.stdout.strip() == "False"
+    assert _import_seconds(result.stderr, "src") < LANDING_IMPORT_BUDGET_SECONDS
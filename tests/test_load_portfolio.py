@@ -20,7 +20,11 @@ def page_file():
 def original_dir():
     original = os.getcwd()
     os.chdir(str(Path(__file__).parent.parent))
+    journals = set(Path("Portfolios").glob("*.journal"))
     yield original
+    # Trades made by the tests are journaled next to the loaded files
+    for journal in set(Path("Portfolios").glob("*.journal")) - journals:
+        journal.unlink()
     os.chdir(original)
 
 
@@ -0,0 +1,222 @@
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from foliotrack.domain.Portfolio import Portfolio
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.market_service import MarketService
+from src.services.memory_cache import MemoryCache
+from src.services.price_cache import PriceCache
+from src.services.price_store import PriceStore
+
+
+def _bars(tickers, dates, close=100.0):
+    """Build a yfinance-like multi-ticker frame"""
+    index = pd.DatetimeIndex(pd.to_datetime(dates), name="Date")
+    columns = pd.MultiIndex.from_product(
+        [["Close", "High", "Low", "Open"], tickers], names=["Price", "Ticker"]
+    )
+    return pd.DataFrame(close, index=index, columns=columns)
+
+
+@pytest.fixture
+def market_service(tmp_path, monkeypatch):
+    service = MarketService(
+        price_cache=PriceCache(tmp_path, refresh_seconds=0),
+        history_cache=MemoryCache(max_bytes=10**6, ttl_seconds=0),
+        price_store=PriceStore(tmp_path / "panels"),
+    )
+    calls = []
+
+    def fake_download(tickers, interval, start=None):
+        calls.append((tuple(tickers), start))
+        return service.remote(tickers, start)
+
+    monkeypatch.setattr(service, "_download_history", fake_download)
+    service.calls = calls
+    return service
+
+
+def test_cache_fetches_only_missing_tail(market_service):
+    """Second call only downloads bars after the cached ones"""
+    market_service.remote = lambda tickers, start: _bars(
+        tickers, ["2024-01-02", "2024-01-03", "2024-01-04"]
+    )
+    hist = market_service.get_security_historical_data(["AAA"], "2024-01-01")
+    assert list(hist.index.strftime("%Y-%m-%d")) == [
+        "2024-01-02",
+        "2024-01-03",
+        "2024-01-04",
+    ]
+    assert market_service.calls == [(("AAA",), None)]
+
+    market_service.remote = lambda tickers, start: _bars(
+        tickers, ["2024-01-03", "2024-01-04", "2024-01-05"]
+    )
+    hist = market_service.get_security_historical_data(["AAA"], "2024-01-03")
+    assert market_service.calls[-1] == (("AAA",), pd.Timestamp("2024-01-03"))
+    assert list(hist.index.strftime("%Y-%m-%d")) == [
+        "2024-01-03",
+        "2024-01-04",
+        "2024-01-05",
+    ]
+    assert ("Close", "AAA") in hist.columns
+
+
+def test_cache_serves_offline(market_service):
+    """Failed downloads fall back to the cached bars"""
+    market_service.remote = lambda tickers, start: _bars(
+        tickers, ["2024-01-02", "2024-01-03"]
+    )
+    market_service.get_security_historical_data(["AAA", "BBB"], "2024-01-01")
+
+    market_service.remote = lambda tickers, start: pd.DataFrame()
+    hist = market_service.get_security_historical_data(["AAA", "BBB"], "2024-01-01")
+    assert hist.shape == (2, 8)
+    assert hist[("Close", "BBB")].tolist() == [100.0, 100.0]
+
+
+def test_cache_reloads_adjusted_history(market_service):
+    """A re-adjusted overlap triggers a full history reload"""
+    market_service.remote = lambda tickers, start: _bars(
+        tickers, ["2024-01-02", "2024-01-03", "2024-01-04"]
+    )
+    market_service.get_security_historical_data(["AAA"], "2024-01-01")
+
+    market_service.remote = lambda tickers, start: _bars(
+        tickers, ["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"], close=50.0
+    )
+    hist = market_service.get_security_historical_data(["AAA"], "2024-01-01")
+    assert market_service.calls[-1] == (("AAA",), None)
+    assert hist[("Close", "AAA")].tolist() == [50.0] * 4
+
+
+def test_history_served_from_memory(tmp_path, monkeypatch):
+    """Bars loaded once are shared through the memory cache"""
+    history_cache = MemoryCache(max_bytes=10**6, ttl_seconds=60)
+    price_store = PriceStore(tmp_path / "panels")
+    first = MarketService(
+        PriceCache(tmp_path), history_cache=history_cache, price_store=price_store
+    )
+    monkeypatch.setattr(
+        first,
+        "_download_history",
+        lambda tickers, interval, start=None: _bars(tickers, ["2024-01-02"]),
+    )
+    first_hist = first.get_security_historical_data(["AAA"], "2024-01-01")
+
+    # Another session, with no network and no disk cache
+    second = MarketService(
+        PriceCache(tmp_path / "empty"),
+        history_cache=history_cache,
+        price_store=price_store,
+    )
+    monkeypatch.setattr(
+        second, "_download_history", lambda *args, **kwargs: pd.DataFrame()
+    )
+    hist = second.get_security_historical_data(["AAA"], "2024-01-01")
+
+    assert hist[("Close", "AAA")].tolist() == [100.0]
+    assert history_cache.stats()["hits"] == 1
+    # Both sessions get views of the same stored panel
+    assert np.shares_memory(first_hist.to_numpy(), hist.to_numpy())
+
+
+def test_memory_cache_lru_and_ttl(monkeypatch):
+    """Entries expire after the TTL and the least recently used go first"""
+    now = [0.0]
+    monkeypatch.setattr("src.services.memory_cache.time.monotonic", lambda: now[0])
+    cache = MemoryCache(max_bytes=3 * 1000, ttl_seconds=10)
+    for key in "abc":
+        cache.set(key, b"x" * 900)
+    assert cache.get("a") is not None
+
+    # "b" is now the least recently used entry
+    cache.set("d", b"x" * 900)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    now[0] = 11.0
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 2, 1)
+
+
+def test_update_prices_concurrent_with_partial_failures(monkeypatch):
+    """Quotes are fetched concurrently, rates once per pair, failures reported"""
+    portfolio = Portfolio(currency="EUR")
+    for ticker, currency in [
+        ("AIR.PA", "EUR"),
+        ("NVDA", "USD"),
+        ("AAPL", "USD"),
+        ("FAIL", "USD"),
+        ("SLOW", "EUR"),
+    ]:
+        portfolio.buy_security(ticker, 1.0, currency=currency, price=1.0)
+
+    service = MarketService(
+        quote_cache=MemoryCache(max_bytes=10**6, ttl_seconds=60),
+        max_workers=4,
+        timeout=0.5,
+    )
+    release = threading.Event()
+
+    def fake_quote(ticker):
+        if ticker == "FAIL":
+            raise RuntimeError("boom")
+        if ticker == "SLOW":
+            release.wait(5)
+        return 10.0, portfolio.securities[ticker].currency, f"{ticker} Inc."
+
+    rate_calls = []
+
+    def fake_rate(from_currency, to_currency):
+        rate_calls.append((from_currency, to_currency))
+        return 0.5
+
+    monkeypatch.setattr(service.service, "_fetch_market_data", fake_quote)
+    monkeypatch.setattr(service.fx_service, "rate", fake_rate)
+
+    try:
+        failures = service.update_prices(portfolio)
+    finally:
+        release.set()
+
+    assert set(failures) == {"FAIL", "SLOW"}
+    assert "Timed out" in failures["SLOW"]
+    assert rate_calls == [("USD", "EUR")]
+    assert portfolio.securities["AIR.PA"].value == 10.0
+    assert portfolio.securities["NVDA"].value == 5.0
+    assert portfolio.securities["NVDA"].name == "NVDA Inc."
+    # Failed securities keep their previous price
+    assert portfolio.securities["FAIL"].price_in_security_currency == 1.0
+
+
+def test_update_security_prices_only_touches_given_tickers(monkeypatch):
+    """Refreshing a bought security costs a single quote request"""
+    portfolio = Portfolio(currency="EUR")
+    for ticker in ["AIR.PA", "MC.PA", "SAN.PA"]:
+        portfolio.buy_security(ticker, 1.0, currency="EUR", price=100.0)
+
+    service = MarketService(quote_cache=MemoryCache(max_bytes=10**6, ttl_seconds=60))
+    quoted = []
+
+    def fake_quote(ticker):
+        quoted.append(ticker)
+        return 300.0, "EUR", "Airbus SE"
+
+    monkeypatch.setattr(service.service, "_fetch_market_data", fake_quote)
+
+    failures = service.update_security_prices(portfolio, ["AIR.PA"])
+
+    assert failures == {}
+    assert quoted == ["AIR.PA"]
+    assert portfolio.securities["AIR.PA"].name == "Airbus SE"
+    assert portfolio.securities["MC.PA"].price_in_security_currency == 100.0
+    assert portfolio.shares["AIR.PA"].actual == pytest.approx(0.6)
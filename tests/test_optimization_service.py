@@ -0,0 +1,156 @@
+import sys
+from pathlib import Path
+
+import cvxpy as cp
+import numpy as np
+import pytest
+from foliotrack.domain.Portfolio import Portfolio
+from foliotrack.services.OptimizationService import (
+    OptimizationService as FoliotrackOptimizationService,
+)
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services import optimization_service
+from src.services.memory_cache import MemoryCache
+from src.services.optimization_service import OptimizationService
+from src.services.portfolio_service import PortfolioService
+from src.services.versioning import get_version
+
+
+def _make_portfolio(seed: int, n: int = 6) -> Portfolio:
+    rng = np.random.default_rng(seed)
+    portfolio = Portfolio()
+    service = PortfolioService()
+    targets = rng.dirichlet(np.ones(n))
+    for i in range(n):
+        ticker = f"T{i}"
+        service.buy_security(
+            portfolio,
+            ticker,
+            float(rng.integers(1, 10)),
+            float(rng.uniform(10, 300)),
+            "EUR",
+        )
+        portfolio._get_share(ticker).target = float(targets[i])
+    return portfolio
+
+
+def _optimization_cache() -> MemoryCache:
+    return MemoryCache(1024**2, 3600, name="test")
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("selling", [False, True])
+def test_matches_foliotrack(seed, selling):
+    """Parametrized problem reaches the same optimum as foliotrack"""
+    expected = _make_portfolio(seed)
+    counts, total, _ = FoliotrackOptimizationService().solve_equilibrium(
+        expected, 2000.0, 0.95, 3, selling
+    )
+
+    portfolio = _make_portfolio(seed)
+    service = OptimizationService(cache=_optimization_cache())
+    result = service.solve_equilibrium(portfolio, 2000.0, 0.95, 3, selling)
+
+    def error(units):
+        prices = np.array(
+            [s.price_in_portfolio_currency for s in portfolio.securities.values()]
+        )
+        values = np.array([s.value for s in portfolio.securities.values()])
+        targets = np.array(
+            [portfolio._get_share(t).target for t in portfolio.securities]
+        )
+        final = values + prices * units
+        return np.linalg.norm(final - final.sum() * targets)
+
+    assert error(result[0]) == pytest.approx(error(counts), rel=1e-6)
+    assert result[1] == pytest.approx(total)
+    assert [s.volume_to_buy for s in portfolio.securities.values()] == list(result[0])
+
+
+def test_results_are_memoized():
+    """Same portfolio state and parameters are served from the cache"""
+    cache = _optimization_cache()
+    service = OptimizationService(cache=cache)
+    portfolio = _make_portfolio(0)
+
+    first = service.solve_equilibrium(portfolio, 1000.0, 0.95, 3, False)
+    version = get_version(portfolio)
+    # Solving writes outputs only, the second click must hit the cache
+    second = service.solve_equilibrium(portfolio, 1000.0, 0.95, 3, False)
+    assert cache.stats()["hits"] == 1
+    assert np.array_equal(first[0], second[0])
+    assert get_version(portfolio) == version + 1
+
+    # A new session with an identical portfolio shares the result
+    other = _make_portfolio(0)
+    OptimizationService(cache=cache).solve_equilibrium(other, 1000.0, 0.95, 3, False)
+    assert cache.stats()["hits"] == 2
+    assert [s.volume_to_buy for s in other.securities.values()] == list(first[0])
+
+    # Any change of parameters or portfolio is a miss
+    service.solve_equilibrium(portfolio, 1010.0, 0.95, 3, False)
+    PortfolioService().buy_security(portfolio, "T0", 1.0, 50.0, "EUR")
+    service.solve_equilibrium(portfolio, 1000.0, 0.95, 3, False)
+    assert cache.stats()["misses"] == 3
+
+
+def test_empty_portfolio():
+    with pytest.raises(ValueError):
+        OptimizationService(cache=_optimization_cache()).solve_equilibrium(
+            Portfolio(), 1000.0, 0.95, 3, False
+        )
+
+
+def test_scenarios_on_process_pool():
+    """What-if scenarios match single solves and leave the portfolio untouched"""
+    cache = _optimization_cache()
+    service = OptimizationService(cache=cache)
+    portfolio = _make_portfolio(1)
+    version = get_version(portfolio)
+
+    amounts = [500.0, 1000.0, 2000.0]
+    table = service.solve_scenarios(
+        portfolio, amounts, 0.95, [2, 3], False, max_workers=2
+    )
+    assert len(table) == len(amounts) * 2 * len(portfolio.securities)
+    assert get_version(portfolio) == version
+    assert all(s.volume_to_buy == 0 for s in portfolio.securities.values())
+
+    # Scenarios are cached, the optimize button is then served without solving
+    counts, _, _ = service.solve_equilibrium(portfolio, 1000.0, 0.95, 3, False)
+    assert cache.stats()["hits"] == 1
+    scenario = table[
+        (table["Investment Amount"] == 1000.0) & (table["Max Securities"] == 3)
+    ]
+    assert scenario["Volume to buy"].tolist() == list(counts)
+    assert scenario["Final Share"].sum() == pytest.approx(1.0)
+
+    # The next batch reuses the running pool
+    pool = optimization_service._SCENARIO_POOL
+    service.solve_scenarios(portfolio, [700.0, 800.0], 0.95, 3, False, max_workers=2)
+    assert optimization_service._SCENARIO_POOL is pool
+
+
+def test_solver_error_fails_only_its_scenario(monkeypatch):
+    """A solver failure is reported as a scenario without solution"""
+    solve = optimization_service._EquilibriumProblem.solve
+
+    def failing_solve(self, prices, values, targets, investment_amount, *args):
+        if investment_amount == 1500.0:
+            raise cp.error.SolverError("Solver 'SCIPY' failed.")
+        return solve(self, prices, values, targets, investment_amount, *args)
+
+    monkeypatch.setattr(
+        optimization_service._EquilibriumProblem, "solve", failing_solve
+    )
+    service = OptimizationService(cache=_optimization_cache())
+    portfolio = _make_portfolio(2)
+
+    table = service.solve_scenarios(portfolio, [1500.0], 0.95, 3, False)
+    assert table["Volume to buy"].isna().all()
+
+    table = service.solve_scenarios(portfolio, 1000.0, 0.95, 3, False)
+    assert table["Volume to buy"].notna().all()
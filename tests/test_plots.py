@@ -0,0 +1,136 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from foliotrack.domain.Portfolio import Portfolio
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.memory_cache import MemoryCache
+from src.services.valuation_index import ValuationIndex
+from src.services.valuation_service import ValuationService
+
+
+class FakeMarketService:
+    def __init__(self, hist):
+        self.hist = hist
+
+    def get_security_historical_data(self, tickers, start_date, interval="1d"):
+        return self.hist.loc[str(start_date) :]
+
+
+def _history(tmp_path, portfolio, ticker_list, hist_tickers):
+    """Valuation index of a portfolio in its own currency (no exchange rate)"""
+    index = ValuationIndex(
+        FakeMarketService(hist_tickers),
+        ValuationService(fx_service=object(), cache=MemoryCache(10**7, 60)),
+        directory=tmp_path,
+    )
+    return index.history(portfolio, "portfolio", ticker_list)
+
+
+def _legacy_portfolio_history(portfolio, ticker_list, hist_tickers, Date):
+    """Cell-by-cell implementation the vectorized one replaces"""
+    portfolio_comp = pd.DataFrame(
+        columns=[f"Volume {t}" for t in ticker_list]
+        + [f"Var {t}" for t in ticker_list]
+        + ["Open", "Low", "High", "Close"],
+        index=Date,
+    )
+    count_volume = {ticker: 0 for ticker in ticker_list}
+    for event in portfolio.history:
+        ticker = event["ticker"]
+        volume = event["volume"]
+        date = event["date"]
+        if date in portfolio_comp.index:
+            count_volume[ticker] += volume
+            portfolio_comp.loc[date, f"Volume {ticker}"] = count_volume[ticker]
+            portfolio_comp.loc[date, f"Var {ticker}"] = volume
+    for ticker in ticker_list:
+        if not portfolio_comp.empty:
+            portfolio_comp.loc[portfolio_comp.index[-1], f"Volume {ticker}"] = (
+                count_volume[ticker]
+            )
+        portfolio_comp[f"Volume {ticker}"] = (
+            portfolio_comp[f"Volume {ticker}"].ffill(axis=0).fillna(0)
+        )
+    for date in Date:
+        total_value = {"Open": 0, "Low": 0, "High": 0, "Close": 0}
+        for ticker in ticker_list:
+            vol = portfolio_comp.loc[date, f"Volume {ticker}"]
+            if ("Open", ticker) in hist_tickers.columns:
+                for field in total_value:
+                    total_value[field] += vol * hist_tickers.loc[date, (field, ticker)]
+        for field, value in total_value.items():
+            portfolio_comp.loc[date, field] = value
+    return portfolio_comp
+
+
+@pytest.fixture
+def hist_tickers():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2023-01-02", periods=300, name="Date")
+    tickers = ["AIR.PA", "NVDA", "MC.PA"]
+    columns = pd.MultiIndex.from_product(
+        [["Close", "High", "Low", "Open"], tickers], names=["Price", "Ticker"]
+    )
+    hist = pd.DataFrame(
+        rng.uniform(50, 500, size=(len(dates), len(columns))),
+        index=dates,
+        columns=columns,
+    )
+    # NVDA only starts trading later
+    hist.loc[: dates[20], (slice(None), "NVDA")] = np.nan
+    return hist
+
+
+def test_portfolio_history_matches_legacy(tmp_path, hist_tickers):
+    """Vectorized history matches the previous cell-by-cell implementation"""
+    portfolio = Portfolio()
+    portfolio.history = [
+        {"ticker": "AIR.PA", "volume": 20.0, "date": "2023-01-02"},
+        {"ticker": "NVDA", "volume": 1.0, "date": "2023-02-15"},
+        {"ticker": "AIR.PA", "volume": -3.0, "date": "2023-06-01"},
+        {"ticker": "MC.PA", "volume": 2.0, "date": "2023-06-01"},
+        {"ticker": "NVDA", "volume": 4.0, "date": "2023-09-12"},
+        # Ticker without price data
+        {"ticker": "DCAM", "volume": 5.0, "date": "2023-03-01"},
+    ]
+    ticker_list = ["AIR.PA", "NVDA", "MC.PA", "DCAM"]
+    Date = pd.DatetimeIndex(hist_tickers.index)
+
+    with pd.option_context("future.no_silent_downcasting", True):
+        expected = _legacy_portfolio_history(portfolio, ticker_list, hist_tickers, Date)
+    result = _history(tmp_path, portfolio, ticker_list, hist_tickers)
+
+    pd.testing.assert_frame_equal(
+        result[expected.columns],
+        expected.astype(float),
+        check_dtype=False,
+        check_freq=False,
+    )
+
+
+def test_portfolio_history_back_dated_event(tmp_path, hist_tickers):
+    """Events are accumulated in date order, whatever the history order"""
+    portfolio = Portfolio()
+    portfolio.history = [
+        {"ticker": "AIR.PA", "volume": 10.0, "date": "2023-06-01"},
+        # Back-dated purchase, on a Sunday
+        {"ticker": "AIR.PA", "volume": 5.0, "date": "2023-01-08"},
+    ]
+
+    result = _history(tmp_path, portfolio, ["AIR.PA"], hist_tickers)
+
+    volume = result["Volume AIR.PA"]
+    # The history starts at the first trade, the Monday after it
+    assert result.index[0] == pd.Timestamp("2023-01-09")
+    assert volume.loc[:"2023-05-31"].eq(5).all()
+    assert volume.loc["2023-06-01":].eq(15).all()
+    assert result.loc["2023-01-09", "Var AIR.PA"] == 5
+    np.testing.assert_allclose(
+        result["Close"], volume * hist_tickers.loc[result.index, ("Close", "AIR.PA")]
+    )
@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.portfolio_catalogue import PortfolioCatalogue
+
+
+def _write(directory, filename, name, currency="EUR", securities=2, mtime=None):
+    path = directory / filename
+    path.write_text(
+        json.dumps(
+            {
+                "name": name,
+                "currency": currency,
+                "securities": {f"T{i}": {} for i in range(securities)},
+            }
+        )
+    )
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def catalogue(tmp_path, monkeypatch):
+    for i in range(120):
+        _write(tmp_path, f"client_{i:03d}.json", f"Client {i}", securities=i % 5)
+    _write(tmp_path, "pension.json", "Retirement Fund", currency="USD")
+    (tmp_path / "notes.txt").write_text("not a portfolio")
+    (tmp_path / "broken.json").write_text("{")
+
+    catalogue = PortfolioCatalogue(tmp_path)
+    reads = []
+    read_entry = catalogue._read_entry
+
+    def counting_read(path, stat):
+        reads.append(path.name)
+        return read_entry(path, stat)
+
+    monkeypatch.setattr(catalogue, "_read_entry", counting_read)
+    catalogue.reads = reads
+    return catalogue
+
+
+def test_index_search_and_pagination(catalogue):
+    entries, total = catalogue.search()
+    assert total == 122
+    assert entries[0].filename == "broken.json"
+    assert entries[0].name is None
+
+    pension = catalogue.get("pension.json")
+    assert (pension.name, pension.currency, pension.securities) == (
+        "Retirement Fund",
+        "USD",
+        2,
+    )
+
+    # Searched in file and portfolio names, case insensitive
+    assert [e.filename for e in catalogue.search("RETIREMENT")[0]] == ["pension.json"]
+    page, total = catalogue.search("client", offset=50, limit=50)
+    assert total == 120
+    assert [e.filename for e in page][:2] == ["client_050.json", "client_051.json"]
+    assert len(catalogue.search("client", offset=100, limit=50)[0]) == 20
+    # Existence is checked on the whole index, not on the page listed
+    first_page, _ = catalogue.search(limit=50)
+    assert "pension.json" not in {e.filename for e in first_page}
+    assert catalogue.exists("pension.json")
+    assert not catalogue.exists("new_client.json")
+
+
+def test_incremental_refresh(catalogue):
+    catalogue.refresh()
+    assert len(catalogue.reads) == 122
+
+    # Directory unchanged: nothing is listed nor read again
+    catalogue.reads.clear()
+    catalogue.refresh()
+    assert catalogue.reads == []
+
+    # Added and removed files: only the new file is read
+    _write(catalogue.directory, "new.json", "New Client")
+    (catalogue.directory / "client_000.json").unlink()
+    catalogue.refresh(force=True)
+    assert catalogue.reads == ["new.json"]
+    assert catalogue.get("client_000.json") is None
+    assert catalogue.get("new.json").name == "New Client"
+
+    # Edited in place (directory mtime unchanged): picked up by update()
+    catalogue.reads.clear()
+    _write(catalogue.directory, "pension.json", "Pension", securities=7, mtime=1e9)
+    catalogue.update("pension.json")
+    assert catalogue.reads == ["pension.json"]
+    assert catalogue.get("pension.json").securities == 7
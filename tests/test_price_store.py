@@ -0,0 +1,143 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.memory_cache import MemoryCache
+from src.services.price_store import PriceStore
+
+
+def _bars(dates, close, tz=None):
+    index = pd.DatetimeIndex(pd.to_datetime(dates), name="Date")
+    if tz is not None:
+        index = index.tz_localize(tz)
+    close = np.asarray(close, dtype=float)
+    return pd.DataFrame(
+        {"Close": close, "High": close + 1, "Low": close - 1, "Open": close},
+        index=index,
+    )
+
+
+def _manifest(store, ticker):
+    return json.loads(
+        (store.directory / f"{store.name(ticker, '1d')}.json").read_text()
+    )
+
+
+def test_sessions_share_read_only_bars(tmp_path):
+    bars = {
+        "AAA": _bars(["2024-01-02", "2024-01-03", "2024-01-04"], [1, 2, 3]),
+        "BBB": _bars(["2024-01-03", "2024-01-05"], [10, 20]),
+    }
+    first = {t: PriceStore(tmp_path).store(t, "1d", b) for t, b in bars.items()}
+    # Another session or portfolio, its own store instance and the same bars
+    second = PriceStore(tmp_path).bars("AAA", "1d")
+
+    values = second.to_numpy()
+    assert not values.flags.writeable
+    assert np.shares_memory(first["AAA"].to_numpy(), values)
+    pd.testing.assert_frame_equal(second, bars["AAA"], check_names=False)
+    # Memory-mapped bars do not count against the in-memory caches
+    assert MemoryCache._sizeof(second) < values.nbytes
+
+
+def test_sessions_share_the_aligned_panel(tmp_path):
+    store = PriceStore(tmp_path)
+    bars = {
+        "AAA": store.store(
+            "AAA", "1d", _bars(["2024-01-02", "2024-01-03", "2024-01-04"], [1, 2, 3])
+        ),
+        "BBB": store.store("BBB", "1d", _bars(["2024-01-03", "2024-01-05"], [10, 20])),
+    }
+    hist = store.panel(["BBB", "AAA"], "1d", bars)
+    assert list(hist.columns) == [
+        (field, ticker)
+        for field in ["Close", "High", "Low", "Open"]
+        for ticker in ["AAA", "BBB"]
+    ]
+    # Union of the dates, forward filled, NaN before a ticker's first bar
+    assert hist[("Close", "AAA")].tolist() == [1, 2, 3, 3]
+    assert hist[("Close", "BBB")].fillna(-1).tolist() == [-1, 10, 10, 20]
+
+    # Another session, from the bars read back: a view of the same panel
+    other = PriceStore(tmp_path)
+    again = other.panel(["AAA", "BBB"], "1d", {t: other.bars(t, "1d") for t in bars})
+    assert not again.to_numpy().flags.writeable
+    assert np.shares_memory(hist.to_numpy(), again.to_numpy())
+    assert np.shares_memory(hist.to_numpy(), again.loc["2024-01-04":].to_numpy())
+
+    # New bars of one ticker extend the panel
+    bars["BBB"] = store.store(
+        "BBB", "1d", _bars(["2024-01-03", "2024-01-05", "2024-01-08"], [10, 20, 30])
+    )
+    extended = store.panel(["AAA", "BBB"], "1d", bars)
+    assert extended[("Close", "AAA")].tolist() == [1, 2, 3, 3, 3]
+    assert hist[("Close", "BBB")].fillna(-1).tolist() == [-1, 10, 10, 20]
+
+
+def test_earlier_layout_is_replaced(tmp_path):
+    store = PriceStore(tmp_path)
+    name = store.panel_name(["AAA"], "1d")
+    # Panel files of an earlier layout of the store
+    (tmp_path / f"{name}.json").write_text(
+        json.dumps({"generation": 3, "fields": ["Close"], "tickers": ["AAA"]})
+    )
+    for kind in ("dates", "values"):
+        (tmp_path / f"{name}.3.{kind}").write_bytes(b"")
+
+    bars = {"AAA": _bars(["2024-01-02"], [1])}
+    assert store.panel(["AAA"], "1d", bars)[("Close", "AAA")].tolist() == [1]
+    assert not (tmp_path / f"{name}.3.values").exists()
+
+
+def test_published_bars_never_change(tmp_path):
+    store = PriceStore(tmp_path)
+    dates = pd.bdate_range("2024-01-01", periods=10)
+    close = np.arange(10.0)
+    view = store.store("AAA", "1d", _bars(dates[:8], close[:8]))
+    before = _manifest(store, "AAA")
+
+    # New bars only: appended in place, after the published rows
+    extended = store.store("AAA", "1d", _bars(dates[:9], close[:9]))
+    after = _manifest(store, "AAA")
+    assert after["generation"] == before["generation"]
+    assert (before["rows"], after["rows"]) == (8, 9)
+    assert extended["Close"].tolist() == close[:9].tolist()
+
+    # Last bar updated (it was partial): a new generation is written
+    close[8] = 8.5
+    updated = store.store("AAA", "1d", _bars(dates, close))
+    assert _manifest(store, "AAA")["generation"] == before["generation"] + 1
+    assert updated["Close"].tolist() == close.tolist()
+    assert len(list(tmp_path.glob("*.values"))) == 1
+
+    # Views handed out before are unchanged
+    assert view["Close"].tolist() == list(range(8))
+    assert extended["Close"].tolist() == list(range(9))
+
+
+def test_reader_retries_on_replaced_generation(tmp_path):
+    dates = pd.bdate_range("2024-01-01", periods=3)
+    writer, reader = PriceStore(tmp_path), PriceStore(tmp_path)
+    writer.store("AAA", "1d", _bars(dates, [1, 2, 3]))
+    stale = _manifest(reader, "AAA")
+
+    # Another process replaces the generation the reader is about to open
+    writer.store("AAA", "1d", _bars(dates, [2, 4, 6]))
+    stale["generation"] += 10
+
+    bars = reader._open(reader.name("AAA", "1d"), stale)
+    assert bars["Close"].tolist() == [2, 4, 6]
+
+
+def test_timezone_kept(tmp_path):
+    bars = _bars(["2024-01-02", "2024-01-03"], [1, 2], tz="America/New_York")
+    stored = PriceStore(tmp_path).store("AAA", "1d", bars)
+    pd.testing.assert_index_equal(
+        stored.index, bars.index, check_names=False, exact=False
+    )
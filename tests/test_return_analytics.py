@@ -0,0 +1,93 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.return_analytics import ReturnAnalytics
+
+
+def _panel(freq="B", periods=600, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01", periods=periods, freq=freq)
+    returns = rng.normal(0.0003, 0.01, size=(periods, 3))
+    return pd.DataFrame(
+        100.0 * np.cumprod(1.0 + returns, axis=0), index=index, columns=["A", "B", "C"]
+    )
+
+
+def test_period_returns_match_compounded_returns():
+    """Log-return sums give the same monthly and yearly returns as compounding"""
+    prices = _panel()
+    analytics = ReturnAnalytics(prices)
+    daily = prices.pct_change().dropna()
+    for freq, returns in (
+        ("ME", analytics.monthly_returns),
+        ("YE", analytics.yearly_returns),
+    ):
+        expected = daily.resample(freq).apply(lambda x: (1 + x).prod() - 1)
+        pd.testing.assert_frame_equal(returns, expected, check_freq=False)
+    # Cached per instance
+    assert analytics.monthly_returns is analytics.monthly_returns
+
+
+def test_frequency_is_inferred():
+    # Business days: about 261 per year
+    assert ReturnAnalytics(_panel("B")).periods_per_year == pytest.approx(261, rel=0.01)
+    weekly = ReturnAnalytics(_panel("W", periods=200))
+    assert weekly.periods_per_year == pytest.approx(365.25 / 7)
+    volatility = weekly.rolling_volatility()
+    assert volatility.shape == (200, 3)
+    assert volatility.iloc[-1].notna().all()
+
+
+def test_drawdown_and_underwater_periods():
+    index = pd.date_range("2024-01-01", periods=8, freq="D")
+    prices = pd.DataFrame(
+        {
+            "A": [100, 110, 99, 88, 110, 121, 115, 120],
+            "B": [100, 101, 102, 103, 104, 105, 106, 107],
+        },
+        index=index,
+    )
+    analytics = ReturnAnalytics(prices)
+    assert analytics.drawdown["A"].min() == pytest.approx(-0.2)
+    assert (analytics.drawdown["B"] == 0).all()
+
+    periods = analytics.underwater_periods
+    assert periods["Column"].tolist() == ["A", "A"]
+    first, last = periods.iloc[0], periods.iloc[1]
+    assert first["Start"] == index[1]
+    assert first["Trough"] == index[3]
+    assert first["End"] == index[4]
+    assert first["Depth"] == pytest.approx(-0.2)
+    assert first["Length"] == 2
+    # Still underwater at the end of the panel
+    assert last["Start"] == index[5]
+    assert pd.isna(last["End"])
+
+
+def test_rolling_windows_match_direct_computation():
+    """Prefix-sum windows equal statistics recomputed on each window slice"""
+    prices = _panel(periods=900)
+    analytics = ReturnAnalytics(prices)
+    windows = analytics.rolling_windows(window_years=2)
+    # One window per month start (and the first date) with two full years of data
+    assert windows["Column"].nunique() == 3
+    assert windows["Start"].iloc[0] == prices.index[0]
+    assert windows["End"].max() <= prices.index[-1]
+
+    for _, window in windows.sample(10, random_state=0).iterrows():
+        curve = prices.loc[window["Start"] : window["End"], window["Column"]]
+        years = (curve.index[-1] - curve.index[0]).days / 365.25
+        cagr = (curve.iloc[-1] / curve.iloc[0]) ** (1 / years) - 1
+        returns = curve.pct_change().dropna()
+        sharpe = returns.mean() / returns.std() * np.sqrt(analytics.periods_per_year)
+        max_drawdown = (curve / curve.cummax() - 1).min()
+        assert window["CAGR"] == pytest.approx(cagr)
+        assert window["Sharpe"] == pytest.approx(sharpe)
+        assert window["Max Drawdown"] == pytest.approx(max_drawdown)
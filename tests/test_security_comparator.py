@@ -69,3 +69,37 @@ def test_run_comparison(page_file, original_dir):
     assert at.button[0].value is True
     for i, expected in enumerate(expected_values):
         assert at.markdown[i].value == expected_values[i]
+
+
+def test_run_stochastic_comparison(page_file, original_dir):
+    """Run security comparison with normally distributed returns"""
+    at = AppTest.from_file(page_file).run()
+    at.selectbox(key="return_model").set_value("Normal").run()
+    at.button[0].click().run(timeout=30)
+
+    assert not at.exception
+    assert at.markdown[0].value.startswith("Final value of PEA (pre-withdrawal): P5")
+    assert at.markdown[3].value.startswith("Final value of CTO (after-tax): P5")
+
+
+def test_run_sweep(original_dir):
+    """Run a parameter sweep and switch the heatmap to the breakeven year"""
+    at = AppTest.from_file("pages/contract_sweep.py").run()
+    at.button(key="sweep_button").click().run(timeout=30)
+    assert not at.exception
+
+    at.selectbox(key="sweep_metric").set_value("Breakeven year of PEA vs CTO").run()
+    at.selectbox(key="sweep_x").set_value("security_fee").run()
+    assert not at.exception
+    assert at.caption[0].value.startswith("Year from which PEA stays")
+
+
+def test_oversized_sweep_is_disabled(original_dir):
+    """Grids past the sweep cap cannot be run"""
+    at = AppTest.from_file("pages/contract_sweep.py").run()
+    for name in ("annual_return", "security_fee", "bank_fee"):
+        at.number_input(key=f"sweep_steps_{name}").set_value(1000)
+    at.run()
+    assert not at.exception
+    assert at.warning[0].value.startswith("The sweep is limited to")
+    assert at.button(key="sweep_button").disabled
@@ -0,0 +1,189 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.simulation_service import (
+    MAX_SWEEP_COMBINATIONS,
+    SimulationService,
+)
+
+
+def _legacy_simulate_contract(contract):
+    """Year-by-year implementation the closed form replaces"""
+    values = np.empty(contract["years"] + 1)
+    values[0] = contract["initial"]
+    invested = contract["initial"]
+    for y in range(1, contract["years"] + 1):
+        val = values[y - 1] * (1.0 + contract["annual_return"])
+        val *= 1.0 - contract["security_fee"]
+        val *= 1.0 - contract["bank_fee"]
+        if contract["yearly_investment"]:
+            val += contract["yearly_investment"]
+            invested += contract["yearly_investment"]
+        values[y] = val
+    return values, invested
+
+
+@pytest.fixture
+def contract():
+    return {
+        "label": "PEA",
+        "initial": 10000.0,
+        "annual_return": 0.06,
+        "yearly_investment": 1000.0,
+        "security_fee": 0.005,
+        "bank_fee": 0.005,
+        "capgains_tax": 0.172,
+        "years": 30,
+    }
+
+
+@pytest.mark.parametrize("model", ["normal", "lognormal"])
+def test_paths_without_volatility_match_deterministic(contract, model):
+    """Zero volatility paths all follow the deterministic simulation"""
+    expected, expected_invested = SimulationService.simulate_contract(contract)
+    paths, invested = SimulationService.simulate_contract_paths(
+        contract, n_paths=5, volatility=0.0, model=model, seed=0
+    )
+
+    assert paths.shape == (5, contract["years"] + 1)
+    assert invested == expected_invested
+    np.testing.assert_allclose(paths, np.broadcast_to(expected, paths.shape))
+
+
+def test_percentile_bands(contract):
+    """Percentile bands are ordered and centered on the deterministic curve"""
+    expected, _ = SimulationService.simulate_contract(contract)
+    paths, invested = SimulationService.simulate_contract_paths(
+        contract, n_paths=20000, volatility=0.1, model="lognormal", seed=1
+    )
+    after_tax = SimulationService.compute_after_tax_curve(
+        paths, invested, contract["capgains_tax"]
+    )
+    bands = SimulationService.percentile_bands(paths)
+    after_tax_bands = SimulationService.percentile_bands(after_tax)
+
+    assert bands.shape == after_tax_bands.shape == (3, contract["years"] + 1)
+    assert np.all(np.diff(bands, axis=0) >= 0)
+    assert np.all(after_tax_bands <= bands)
+    # Mean of the paths is the deterministic value
+    assert paths[:, -1].mean() == pytest.approx(expected[-1], rel=0.01)
+
+
+def test_bootstrap_draws_from_history(contract):
+    """Bootstrapped returns only take historical values"""
+    returns = SimulationService.sample_annual_returns(
+        0.0, 0.0, (100, 10), model="bootstrap", historical_returns=[0.1, -0.2], seed=0
+    )
+    assert set(np.unique(returns)) == {0.1, -0.2}
+
+    with pytest.raises(ValueError):
+        SimulationService.sample_annual_returns(0.0, 0.0, (1,), model="bootstrap")
+
+
+def test_batch_matches_single_contracts(contract):
+    """Batched closed-form simulation matches contract-by-contract results"""
+    variants = [
+        dict(contract, annual_return=r, years=years, yearly_investment=c)
+        for r, years, c in [(0.06, 30, 1000.0), (0.0, 10, 500.0), (0.1, 20, 0.0)]
+    ]
+    values, invested = SimulationService.simulate_contracts(
+        **SimulationService.contracts_to_arrays(variants)
+    )
+    after_tax = SimulationService.compute_after_tax_curve(
+        values, invested, np.array([0.172, 0.3, 0.0])
+    )
+
+    assert values.shape == (3, 31)
+    for i, variant in enumerate(variants):
+        expected, expected_invested = _legacy_simulate_contract(variant)
+        n = variant["years"] + 1
+        np.testing.assert_allclose(values[i, :n], expected)
+        assert np.isnan(values[i, n:]).all()
+        assert invested[i] == expected_invested
+        np.testing.assert_allclose(
+            after_tax[i, :n],
+            SimulationService.compute_after_tax_curve(
+                expected, expected_invested, [0.172, 0.3, 0.0][i]
+            ),
+        )
+
+
+@pytest.mark.parametrize(
+    "annual_return, security_fee, bank_fee",
+    [
+        (1e-5, 0.0, 0.0),
+        (-1e-7, 0.0, 0.0),
+        (0.0, 0.0, 0.0),
+        # Return offset by the fees, up to rounding
+        (0.01, 0.005, 0.005 / 0.995 - 0.01 / 1.01),
+        (-1.0, 0.0, 0.0),
+    ],
+)
+def test_growth_close_to_one_matches_loop(
+    contract, annual_return, security_fee, bank_fee
+):
+    """The geometric series stays exact when the yearly growth is about 1"""
+    variant = dict(
+        contract,
+        initial=0.0,
+        annual_return=annual_return,
+        security_fee=security_fee,
+        bank_fee=bank_fee,
+        years=40,
+    )
+    values, invested = SimulationService.simulate_contract(variant)
+    expected, expected_invested = _legacy_simulate_contract(variant)
+
+    np.testing.assert_allclose(values, expected, rtol=1e-12, atol=1e-9)
+    assert invested == expected_invested
+
+
+def test_sweep_matches_single_contracts(contract):
+    """Every grid point of a chunked sweep matches its own simulation"""
+    benchmark = dict(contract, annual_return=0.08, capgains_tax=0.3)
+    grid = {
+        "annual_return": np.linspace(0.0, 0.12, 7),
+        "capgains_tax": np.array([0.0, 0.172, 0.3]),
+        "bank_fee": np.array([0.0, 0.01]),
+    }
+    final, breakeven = SimulationService.sweep_contract(
+        contract, grid, benchmark=benchmark, chunk_size=5
+    )
+    assert final.shape == breakeven.shape == (7, 3, 2)
+
+    benchmark_curve = SimulationService.compute_after_tax_curve(
+        *SimulationService.simulate_contract(benchmark), benchmark["capgains_tax"]
+    )
+    for i, j, k in np.ndindex(final.shape):
+        variant = dict(
+            contract,
+            annual_return=grid["annual_return"][i],
+            capgains_tax=grid["capgains_tax"][j],
+            bank_fee=grid["bank_fee"][k],
+        )
+        curve = SimulationService.compute_after_tax_curve(
+            *SimulationService.simulate_contract(variant), variant["capgains_tax"]
+        )
+        assert final[i, j, k] == pytest.approx(curve[-1])
+        behind = np.flatnonzero(curve < benchmark_curve)
+        if behind.size == 0:
+            assert breakeven[i, j, k] == 0
+        elif behind[-1] == contract["years"]:
+            assert np.isnan(breakeven[i, j, k])
+        else:
+            assert breakeven[i, j, k] == behind[-1] + 1
+
+
+def test_sweep_rejects_oversized_grid(contract):
+    """Grids past the cap fail before any result array is allocated"""
+    axis = np.linspace(0.0, 0.1, 200)
+    grid = {name: axis for name in ("annual_return", "security_fee", "bank_fee")}
+    assert len(axis) ** 3 > MAX_SWEEP_COMBINATIONS
+    with pytest.raises(ValueError, match="limited to"):
+        SimulationService.sweep_contract(contract, grid)
@@ -0,0 +1,119 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from foliotrack.storage.PortfolioRepository import PortfolioRepository
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.portfolio_catalogue import PortfolioCatalogue
+from src.services.portfolio_service import PortfolioService
+from src.services.transaction_journal import TransactionJournal
+
+EXAMPLE = Path(__file__).parent.parent / "Portfolios" / "investment_example.json"
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.services.portfolio_service.PORTFOLIOS_DIR", tmp_path)
+    service = PortfolioService(catalogue=PortfolioCatalogue(tmp_path))
+    portfolio = PortfolioRepository().load_from_json(str(EXAMPLE))
+    service.save_portfolio(portfolio, "client.json")
+    return service
+
+
+def _state(portfolio):
+    return PortfolioRepository()._to_dict(portfolio)
+
+
+def test_trades_replayed_on_load(service, tmp_path):
+    portfolio = service.load_portfolio("client.json")
+    snapshot = (tmp_path / "client.json").read_bytes()
+
+    service.buy_security(portfolio, "AIR.PA", 2.0, 190.0, "EUR", filename="client.json")
+    service.buy_security(portfolio, "SAN.PA", 3.0, 90.0, "EUR", filename="client.json")
+    service.sell_security(portfolio, "MC.PA", 1.0, filename="client.json")
+    portfolio.securities["NVDA"].exchange_rate = 0.9
+    portfolio.securities["NVDA"].price_in_security_currency = 200.0
+    service.journal_prices(portfolio, "client.json", ["NVDA"])
+
+    # The file itself is untouched, trades only append to the journal
+    assert (tmp_path / "client.json").read_bytes() == snapshot
+    assert len(TransactionJournal(tmp_path / "client.json").records()) == 4
+
+    loaded = service.load_portfolio("client.json")
+    portfolio.securities["NVDA"].price_in_portfolio_currency = 180.0
+    portfolio.securities["NVDA"].value = 180.0
+    portfolio.recalculate_shares()
+    assert _state(loaded) == _state(portfolio)
+    assert "MC.PA" not in loaded.securities
+
+
+def test_save_compacts_journal(service, tmp_path, monkeypatch):
+    portfolio = service.load_portfolio("client.json")
+    journal = TransactionJournal(tmp_path / "client.json")
+
+    service.buy_security(portfolio, "AIR.PA", 1.0, 190.0, "EUR", filename="client.json")
+    service.save_portfolio(portfolio, "client.json")
+    assert journal.records() == []
+    assert service.load_portfolio("client.json").securities["AIR.PA"].volume == 18.0
+
+    # Past the size limit, the journal is compacted into the file
+    monkeypatch.setattr("src.services.portfolio_service.JOURNAL_COMPACT_BYTES", 200)
+    for _ in range(3):
+        service.buy_security(
+            portfolio, "AIR.PA", 1.0, 190.0, "EUR", filename="client.json"
+        )
+    assert len(journal.records()) < 3
+    assert service.load_portfolio("client.json").securities["AIR.PA"].volume == 21.0
+
+
+def test_torn_and_stale_journals(service, tmp_path):
+    portfolio = service.load_portfolio("client.json")
+    journal = TransactionJournal(tmp_path / "client.json")
+    service.buy_security(portfolio, "AIR.PA", 1.0, 190.0, "EUR", filename="client.json")
+
+    # Crash in the middle of an append: the torn record is skipped
+    with open(journal.path, "a") as f:
+        f.write('\n{"op": "buy", "tick')
+    service.buy_security(portfolio, "AIR.PA", 1.0, 190.0, "EUR", filename="client.json")
+    assert service.load_portfolio("client.json").securities["AIR.PA"].volume == 19.0
+
+    # Crash after the file was saved but before the journal was reset: the journal
+    # no longer matches the file and is not replayed twice
+    PortfolioRepository().save_to_json(portfolio, str(tmp_path / "client.json"))
+    assert journal.records() == []
+    assert service.load_portfolio("client.json").securities["AIR.PA"].volume == 19.0
+
+
+def test_invalid_record_is_skipped(service, tmp_path):
+    portfolio = service.load_portfolio("client.json")
+    journal = TransactionJournal(tmp_path / "client.json")
+    service.buy_security(portfolio, "AIR.PA", 1.0, 190.0, "EUR", filename="client.json")
+    journal.append(
+        [{"op": "sell", "ticker": "NVDA", "volume": 5.0, "date": "2024-01-02"}]
+    )
+    service.buy_security(portfolio, "AIR.PA", 1.0, 190.0, "EUR", filename="client.json")
+
+    # Selling more than held fails, the other records are still replayed
+    loaded, skipped = service.load_portfolio_journal("client.json")
+    assert loaded.securities["AIR.PA"].volume == 19.0
+    assert loaded.securities["NVDA"].volume == 1.0
+    assert len(skipped) == 1 and "NVDA" in skipped[0]
+
+
+def test_journal_of_rewritten_file_with_same_stat(service, tmp_path):
+    filepath = tmp_path / "client.json"
+    portfolio = service.load_portfolio("client.json")
+    journal = TransactionJournal(filepath)
+    service.buy_security(portfolio, "AIR.PA", 1.0, 190.0, "EUR", filename="client.json")
+
+    # Same mtime and size, other content: the journal no longer applies
+    stat = filepath.stat()
+    content = filepath.read_bytes()
+    filepath.write_bytes(content.replace(b"17", b"18", 1))
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert filepath.stat().st_size == stat.st_size
+    assert journal.records() == []
@@ -0,0 +1,203 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from foliotrack.domain.Portfolio import Portfolio
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.memory_cache import MemoryCache
+from src.services.valuation_index import ValuationIndex
+from src.services.valuation_service import ValuationService
+
+TICKERS = ["AIR.PA", "MC.PA"]
+
+
+class FakeMarketService:
+    """Serves the first `rows` dates of a price panel, as if later bars were not out yet"""
+
+    def __init__(self, hist):
+        self.hist = hist
+        self.rows = len(hist)
+
+    def get_security_historical_data(self, tickers, start_date, interval="1d"):
+        return self.hist.iloc[: self.rows].loc[str(start_date) :]
+
+
+class FakeFxService:
+    """Serves a constant rate history, or none while `rate` is None (offline)"""
+
+    def __init__(self):
+        self.rate = None
+
+    def rate_series(self, from_currency, to_currency, dates):
+        if self.rate is None:
+            raise ValueError("no stored rates")
+        return pd.Series(self.rate, index=dates)
+
+
+class RecordingValuationService(ValuationService):
+    """Records the first date of every panel converted"""
+
+    def __init__(self, fx_service=None):
+        super().__init__(
+            fx_service=object() if fx_service is None else fx_service,
+            cache=MemoryCache(10**7, 60),
+        )
+        self.converted = []
+
+    def to_portfolio_currency(self, portfolio, hist_tickers):
+        self.converted.append(hist_tickers.index[0] if len(hist_tickers) else None)
+        return super().to_portfolio_currency(portfolio, hist_tickers)
+
+
+@pytest.fixture
+def hist():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2024-01-01", periods=60, name="Date")
+    columns = pd.MultiIndex.from_product(
+        [["Close", "High", "Low", "Open"], TICKERS], names=["Price", "Ticker"]
+    )
+    return pd.DataFrame(
+        rng.uniform(50, 500, size=(len(dates), len(columns))),
+        index=dates.tz_localize("Europe/Paris"),
+        columns=columns,
+    )
+
+
+@pytest.fixture
+def portfolio():
+    portfolio = Portfolio(currency="EUR")
+    portfolio.buy_security("AIR.PA", 10.0, currency="EUR", date="2024-01-03")
+    portfolio.buy_security("MC.PA", 2.0, currency="EUR", date="2024-01-20")
+    portfolio.sell_security("AIR.PA", 4.0, date="2024-02-05")
+    return portfolio
+
+
+def _index(tmp_path, market_service, fx_service=None):
+    valuation_service = RecordingValuationService(fx_service)
+    return ValuationIndex(market_service, valuation_service, directory=tmp_path)
+
+
+def _full(portfolio, hist, rows):
+    """Index computed from scratch on the first rows of the panel"""
+    prices = hist.iloc[:rows].loc["2024-01-03":]
+    return ValuationIndex.compute(
+        ValuationIndex.events(portfolio, TICKERS), TICKERS, prices
+    )
+
+
+def test_new_bars_extend_the_index(tmp_path, portfolio, hist):
+    market_service = FakeMarketService(hist)
+    market_service.rows = 40
+    index = _index(tmp_path, market_service)
+
+    first = index.history(portfolio, "client.json", TICKERS)
+    pd.testing.assert_frame_equal(first, _full(portfolio, hist, 40), check_freq=False)
+
+    # Later visit, from another session: only the last stored date and the new
+    # ones are valued
+    market_service.rows = 45
+    index = _index(tmp_path, market_service)
+    second = index.history(portfolio, "client.json", TICKERS)
+
+    pd.testing.assert_frame_equal(second, _full(portfolio, hist, 45), check_freq=False)
+    assert index.valuation_service.converted == [hist.index[39]]
+    assert index.path("client.json").exists()
+
+
+def test_back_dated_trade_recomputes_later_dates_only(tmp_path, portfolio, hist):
+    index = _index(tmp_path, FakeMarketService(hist))
+    index.history(portfolio, "client.json", TICKERS)
+
+    # Back-dated purchase on a Sunday, placed on the next Monday
+    portfolio.buy_security("MC.PA", 1.0, date="2024-01-28")
+    index.valuation_service.converted.clear()
+    result = index.history(portfolio, "client.json", TICKERS)
+
+    pd.testing.assert_frame_equal(
+        result, _full(portfolio, hist, len(hist)), check_freq=False
+    )
+    assert index.valuation_service.converted == [
+        pd.Timestamp("2024-01-29", tz="Europe/Paris")
+    ]
+    assert result.loc["2024-01-29", "Var MC.PA"] == 1.0
+
+
+def test_changed_prices_rebuild_the_index(tmp_path, portfolio, hist):
+    market_service = FakeMarketService(hist)
+    index = _index(tmp_path, market_service)
+    index.history(portfolio, "client.json", TICKERS)
+
+    # Prices re-adjusted after a split
+    market_service.hist = hist.copy()
+    market_service.hist.loc[:, (slice(None), "AIR.PA")] /= 2
+    index.valuation_service.converted.clear()
+    result = index.history(portfolio, "client.json", TICKERS)
+
+    pd.testing.assert_frame_equal(
+        result,
+        _full(portfolio, market_service.hist, len(hist)),
+        check_freq=False,
+    )
+    assert index.valuation_service.converted == [
+        pd.Timestamp("2024-01-03", tz="Europe/Paris")
+    ]
+
+
+def test_rate_history_rebuilds_index_valued_offline(tmp_path, hist):
+    portfolio = Portfolio(currency="EUR")
+    portfolio.buy_security("AIR.PA", 10.0, currency="EUR", date="2024-01-03")
+    portfolio.buy_security("MC.PA", 2.0, currency="USD", date="2024-01-03")
+    portfolio.securities["MC.PA"].exchange_rate = 0.5
+    fx_service = FakeFxService()
+    index = _index(tmp_path, FakeMarketService(hist), fx_service)
+
+    # Offline: USD prices converted with the current rate
+    offline = index.history(portfolio, "client.json", TICKERS)
+    assert offline.loc["2024-01-03", "Close"] == pytest.approx(
+        10 * hist.loc["2024-01-03", ("Close", "AIR.PA")]
+        + 2 * 0.5 * hist.loc["2024-01-03", ("Close", "MC.PA")]
+    )
+
+    # Rate history available: every stored row is valued again
+    fx_service.rate = 0.8
+    index.valuation_service.converted.clear()
+    result = index.history(portfolio, "client.json", TICKERS)
+    assert index.valuation_service.converted == [
+        pd.Timestamp("2024-01-03", tz="Europe/Paris")
+    ]
+    assert result.loc["2024-01-03", "Close"] == pytest.approx(
+        10 * hist.loc["2024-01-03", ("Close", "AIR.PA")]
+        + 2 * 0.8 * hist.loc["2024-01-03", ("Close", "MC.PA")]
+    )
+
+
+def test_unsaved_portfolio_is_not_stored(tmp_path, portfolio, hist):
+    index = _index(tmp_path, FakeMarketService(hist))
+    result = index.history(portfolio, None, TICKERS)
+
+    pd.testing.assert_frame_equal(
+        result, _full(portfolio, hist, len(hist)), check_freq=False
+    )
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cost_basis_releases_average_cost_on_sales(portfolio, hist):
+    result = _full(portfolio, hist, len(hist))
+
+    air_cost = 10 * hist.loc["2024-01-03", ("Close", "AIR.PA")]
+    mc_cost = 2 * hist.loc["2024-01-22", ("Close", "MC.PA")]
+    assert result.loc["2024-01-19", "Cost basis"] == pytest.approx(air_cost)
+    assert result.loc["2024-01-22", "Cost basis"] == pytest.approx(air_cost + mc_cost)
+    # Selling 4 of 10 units releases 40% of their cost
+    assert result.loc["2024-02-05", "Cost AIR.PA"] == pytest.approx(0.6 * air_cost)
+    assert result.loc["2024-02-05", "Volume AIR.PA"] == 6.0
+    np.testing.assert_allclose(
+        result["Close"],
+        result["Volume AIR.PA"] * hist.loc["2024-01-03":, ("Close", "AIR.PA")]
+        + result["Volume MC.PA"] * hist.loc["2024-01-03":, ("Close", "MC.PA")],
+    )
@@ -0,0 +1,117 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from foliotrack.domain.Portfolio import Portfolio
+
+# Add project root to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.fx_service import FxService
+from src.services.memory_cache import MemoryCache
+from src.services.price_cache import PriceCache
+from src.services.valuation_index import ValuationIndex
+from src.services.valuation_service import ValuationService
+
+
+class FakeMarketService:
+    def __init__(self, hist):
+        self.hist = hist
+
+    def get_security_historical_data(self, tickers, start_date, interval="1d"):
+        return self.hist.loc[str(start_date) :]
+
+
+@pytest.fixture
+def portfolio():
+    portfolio = Portfolio(currency="EUR")
+    for ticker, currency in [("AIR.PA", "EUR"), ("NVDA", "USD"), ("MC.PA", "EUR")]:
+        portfolio.buy_security(ticker, 1.0, currency=currency, price=100.0)
+    portfolio.securities["NVDA"].exchange_rate = 0.9
+    return portfolio
+
+
+@pytest.fixture
+def hist_tickers():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2024-01-02", periods=30, name="Date")
+    columns = pd.MultiIndex.from_product(
+        [["Close", "High", "Low", "Open"], ["AIR.PA", "NVDA", "MC.PA"]],
+        names=["Price", "Ticker"],
+    )
+    return pd.DataFrame(
+        rng.uniform(50, 500, size=(len(dates), len(columns))),
+        index=dates,
+        columns=columns,
+    )
+
+
+def _valuation_service(tmp_path, usd_per_euro):
+    fx_service = FxService(
+        store=PriceCache(tmp_path), cache=MemoryCache(max_bytes=10**6, ttl_seconds=60)
+    )
+    calls = []
+
+    def fake_download(currency, start):
+        calls.append(currency)
+        if usd_per_euro is None:
+            raise ConnectionError("offline")
+        return pd.DataFrame({"Rate": usd_per_euro.to_numpy()}, index=usd_per_euro.index)
+
+    fx_service._download_rates = fake_download
+    service = ValuationService(
+        fx_service, cache=MemoryCache(max_bytes=10**7, ttl_seconds=60)
+    )
+    service.calls = calls
+    return service
+
+
+def test_prices_converted_with_daily_rates(tmp_path, portfolio, hist_tickers):
+    """USD prices use the rate of their own date, EUR prices are unchanged"""
+    # Published on even business days only, starting after the first price
+    usd_per_euro = pd.Series(
+        np.linspace(1.05, 1.15, 14), index=hist_tickers.index[2::2]
+    )
+    service = _valuation_service(tmp_path, usd_per_euro)
+
+    converted = service.to_portfolio_currency(portfolio, hist_tickers)
+
+    rates = 1 / usd_per_euro.reindex(hist_tickers.index).ffill().bfill()
+    for field in ["Open", "Close"]:
+        np.testing.assert_allclose(
+            converted[(field, "NVDA")], hist_tickers[(field, "NVDA")] * rates
+        )
+        pd.testing.assert_series_equal(
+            converted[(field, "AIR.PA")], hist_tickers[(field, "AIR.PA")]
+        )
+    pd.testing.assert_index_equal(converted.columns, hist_tickers.columns)
+
+    # The portfolio value sums prices in the portfolio currency
+    portfolio.history = [
+        {"ticker": "AIR.PA", "volume": 2.0, "date": "2024-01-02"},
+        {"ticker": "NVDA", "volume": 3.0, "date": "2024-01-02"},
+    ]
+    history = ValuationIndex(
+        FakeMarketService(hist_tickers), service, directory=tmp_path
+    ).history(portfolio, "portfolio", ["AIR.PA", "NVDA", "MC.PA"])
+    np.testing.assert_allclose(
+        history["Close"],
+        2 * hist_tickers[("Close", "AIR.PA")]
+        + 3 * hist_tickers[("Close", "NVDA")] * rates,
+    )
+
+    # Repeated renders reuse the converted panel
+    assert service.to_portfolio_currency(portfolio, hist_tickers.copy()) is converted
+    assert service.calls == ["USD"]
+
+
+def test_current_rate_without_rate_history(tmp_path, portfolio, hist_tickers):
+    service = _valuation_service(tmp_path, None)
+
+    converted = service.to_portfolio_currency(portfolio, hist_tickers)
+
+    np.testing.assert_allclose(
+        converted[("Close", "NVDA")], hist_tickers[("Close", "NVDA")] * 0.9
+    )